@@ -0,0 +1,179 @@
+'''
+Benchmark of the build phases on a synthetic package.
+
+Times each phase separately (best and median of the repeats):
+
+* discovery: `DocBuilder.build_tree` walking the package.
+* extraction: `extract_nodes` extraction of all the modules.
+* render: `MdRenderer` rendering of all the pages in memory.
+* write: writing all the pages to a fresh output directory.
+* rewrite: writing the unchanged pages again (nothing is written).
+* archive: writing all the pages into a fresh tar archive (`output_archive`).
+
+The results are printed and can be saved as JSON. When a baseline JSON is
+given, every phase is compared with it and the script fails if any phase
+is slower than the tolerance. The stored `baseline.json` was measured with
+the default parameters; the timings depend on the machine, so measure the
+baseline on the same machine (e.g. on the base branch) before comparing.
+
+Usage: python benchmarks/bench_build.py [--modules 50] [--repeat 5] [--extractor static]
+       [--output results.json] [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+'''
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import DEFAULTS, add_arguments, generate_package  # noqa: E402
+from code2doc.build_config import BUILD_CONFIG, Options  # noqa: E402
+from code2doc.builder import DocBuilder, extract_nodes, get_required_fields  # noqa: E402
+from code2doc.configurer import ConfigOption  # noqa: E402
+from code2doc.constants import get_version  # noqa: E402
+from code2doc.renderer.renderer import MdRenderer  # noqa: E402
+from code2doc.sinks import ArchiveSink  # noqa: E402
+from code2doc.utils import write_file  # noqa: E402
+
+PHASES = ['discovery', 'extraction', 'render', 'write', 'rewrite', 'archive']
+# Slowdowns below this (in seconds) are considered as noise
+MIN_DIFFERENCE = 0.002
+
+
+def set_option(config, option: str, value):
+    short, _ = ConfigOption.get_short_n_full_form(option)
+    config.shorts[short].value = value
+
+
+def evict(package: str):
+    '''
+    Forgets the imported synthetic modules, so every repeat imports them again.
+    '''
+    for name in [n for n in sys.modules if n == package or n.startswith(package + '.')]:
+        del sys.modules[name]
+
+
+def run_once(root: str, out_dir: str, config) -> dict:
+    '''
+    Runs all the phases once and returns their durations in seconds.
+    '''
+    times = {}
+    package = os.path.basename(root)
+    evict(package)
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    builder = DocBuilder(root, config)
+    times['discovery'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extract_nodes(builder.get_nodes(builder.tree), builder.sources, get_required_fields(config), config)
+    times['extraction'] = time.perf_counter() - start
+    nodes = [n for n in builder.get_nodes(builder.tree) if n.module]
+
+    renderer = MdRenderer(config)
+    start = time.perf_counter()
+    pages = [(n.target, renderer.get_page(n)) for n in nodes]
+    times['render'] = time.perf_counter() - start
+
+    for phase in ('write', 'rewrite'):
+        start = time.perf_counter()
+        for target, page in pages:
+            path = os.path.join(out_dir, target)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_file(path, page)
+        times[phase] = time.perf_counter() - start
+
+    archive = out_dir + '.tar'
+    if os.path.isfile(archive):
+        os.remove(archive)
+    start = time.perf_counter()
+    sink = ArchiveSink(archive)
+    for target, page in pages:
+        with sink.open(target) as f:
+            f.write(page)
+    sink.close([target for target, _ in pages])
+    times['archive'] = time.perf_counter() - start
+    times['modules'] = len(nodes)
+    return times
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    '''
+    Prints the comparison with the baseline. Returns False on any regression.
+    '''
+    ok = True
+    if results['params'] != baseline.get('params'):
+        print('WARNING! the baseline was measured with different parameters')
+    print(f'{"phase":12} {"baseline":>12} {"current":>12} {"ratio":>8}')
+    for phase in PHASES:
+        old = baseline['phases'].get(phase, {}).get('best')
+        new = results['phases'][phase]['best']
+        if not old:
+            print(f'{phase:12} {"-":>12} {new * 1000:10.2f}ms')
+            continue
+        ratio = new / old
+        regressed = ratio > 1 + tolerance and new - old > MIN_DIFFERENCE
+        ok = ok and not regressed
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{phase:12} {old * 1000:10.2f}ms {new * 1000:10.2f}ms {ratio:7.2f}x{flag}')
+    return ok
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--extractor', default='inspect', choices=['inspect', 'static'])
+    parser.add_argument('--output', default='', help='save the results as JSON')
+    parser.add_argument('--baseline', default='', help='compare with the results of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (0.25 = 25%%)')
+    args = parser.parse_args()
+    params = {k: getattr(args, k) for k in DEFAULTS}
+    params['extractor'] = args.extractor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = generate_package(os.path.join(tmp, 'src'), **{k: getattr(args, k) for k in DEFAULTS})
+        out_dir = os.path.join(tmp, 'docs')
+        config = BUILD_CONFIG
+        set_option(config, Options.OUTPUT_DIRECTORY, out_dir)
+        set_option(config, Options.EXTRACTOR, args.extractor)
+        set_option(config, Options.BUILD_CACHE, False)
+        runs = [run_once(root, out_dir, config) for _ in range(args.repeat)]
+
+    phases = {}
+    for phase in PHASES:
+        values = [r[phase] for r in runs]
+        phases[phase] = {'best': min(values), 'median': statistics.median(values)}
+    results = {
+        'params': params,
+        'modules': runs[0]['modules'],
+        'version': get_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'phases': phases,
+    }
+
+    print(f'{results["modules"]} pages, {args.repeat} repeats ({args.extractor} extractor)')
+    for phase in PHASES:
+        print(f'{phase:12} best={phases[phase]["best"] * 1000:10.2f} ms  median={phases[phase]["median"] * 1000:10.2f} ms')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
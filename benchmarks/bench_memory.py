@@ -0,0 +1,120 @@
+'''
+Memory benchmark of the extracted documentation on a large synthetic package.
+
+Extracts every module of the package and keeps the results, like a build does
+until the pages are rendered, in two modes:
+
+* live: the extractor objects (`DocModule`, `DocClass`, `DocFunction`) with the
+  rendered fields evaluated, which keep the live modules (or the parsed trees)
+  and all the parsed sources referenced.
+* frozen: the compact `Frozen*` records returned by `extract_module`.
+
+Each mode runs in a fresh process and reports its peak RSS (above the RSS after
+the discovery) and the size of the pickled results.
+
+Usage: python benchmarks/bench_memory.py [--modules 500] [--extractor static]
+'''
+
+import os
+import sys
+import json
+import pickle
+import resource
+import tempfile
+import subprocess
+from argparse import ArgumentParser, SUPPRESS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import DEFAULTS, add_arguments, generate_package  # noqa: E402
+from code2doc.build_config import BUILD_CONFIG, Options  # noqa: E402
+from code2doc.builder import DocBuilder, extract_module, get_required_fields  # noqa: E402
+from code2doc.configurer import ConfigOption  # noqa: E402
+from code2doc.doc_types import DocClass, DocModule  # noqa: E402
+from code2doc.source import SourceIndex  # noqa: E402
+from code2doc.static_types import StaticDocModule  # noqa: E402
+
+MODES = ['live', 'frozen']
+
+
+def get_peak_rss() -> int:
+    '''
+    Peak RSS of the process in bytes.
+    '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def extract_live(node, sources: SourceIndex, fields: set):
+    '''
+    Extracts a module and evaluates the fields without freezing it.
+    '''
+    module_type = StaticDocModule if node.static else DocModule
+    module = module_type.from_path(node.path, node.package, '.' + '.'.join(node.name), sources)
+    for field in DocModule.FIELDS:
+        if field in fields:
+            getattr(module, field)
+    for cls in module.classes if 'classes' in fields else []:
+        for field in DocClass.FIELDS:
+            if 'class.' + field in fields:
+                getattr(cls, field)
+    return module
+
+
+def run_child(mode: str, root: str, extractor: str) -> dict:
+    '''
+    Runs one mode in this process and returns its measurements.
+    '''
+    config = BUILD_CONFIG
+    short, _ = ConfigOption.get_short_n_full_form(Options.EXTRACTOR)
+    config.shorts[short].value = extractor
+    builder = DocBuilder(root, config)
+    nodes = builder.get_nodes(builder.tree)
+    fields = get_required_fields(config)
+    sources = SourceIndex()
+    before = get_peak_rss()
+    if mode == 'live':
+        modules = [extract_live(n, sources, fields) for n in nodes]
+        size = 0
+    else:
+        modules = [extract_module(n.path, n.package, n.name, n.static, sources, fields) for n in nodes]
+        size = len(pickle.dumps(modules))
+    return {'modules': len(modules), 'peak': get_peak_rss() - before, 'pickled': size}
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    add_arguments(parser)
+    parser.set_defaults(modules=500, depth=3)
+    parser.add_argument('--extractor', default='inspect', choices=['inspect', 'static'])
+    parser.add_argument('--child', default='', choices=MODES, help=SUPPRESS)
+    parser.add_argument('--root', default='', help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.root, args.extractor)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        params = {k: getattr(args, k) for k in DEFAULTS}
+        root = generate_package(os.path.join(tmp, 'src'), 'large_package', **params)
+        results = {}
+        for mode in MODES:
+            output = subprocess.check_output([
+                sys.executable, os.path.abspath(__file__), '--child', mode,
+                '--root', root, '--extractor', args.extractor])
+            results[mode] = json.loads(output)
+
+    print(f'{results["frozen"]["modules"]} modules ({args.extractor} extractor)')
+    for mode in MODES:
+        r = results[mode]
+        pickled = f'  pickled={r["pickled"] / 1024:9.1f} KiB' if r['pickled'] else ''
+        print(f'{mode:8} peak rss={r["peak"] / 1024 / 1024:8.1f} MiB{pickled}')
+    if results['live']['peak']:
+        print(f'reduction: {1 - results["frozen"]["peak"] / results["live"]["peak"]:.0%}')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+'''
+Benchmark for the streaming markdown writer.
+
+Renders a synthetic module with a lot of functions in two ways:
+
+* concat: the page is built by string concatenation (the previous renderer)
+  and written in one go.
+* stream: the page is written fragment by fragment through `OutputFile`
+  (without the build cache, so no fragment is kept).
+* memoized: the same with the build cache, the unchanged function fragments are
+  copied from the previous page (like a page re-rendered after editing one of
+  its functions). A fresh page has no previous page, so everything is rendered.
+
+All are measured for a fresh file and for an unchanged one (where nothing is
+written), reporting the time and the peak memory of the allocations.
+
+Usage: python benchmarks/bench_render.py [--functions 5000] [--repeat 5]
+'''
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from code2doc.build_config import BUILD_CONFIG, Options  # noqa: E402
+from code2doc.configurer import ConfigOption  # noqa: E402
+from code2doc.builder import DocNode  # noqa: E402
+from code2doc.renderer.renderer import MdRenderer  # noqa: E402
+from code2doc.static_types import StaticDocModule  # noqa: E402
+from code2doc.utils import reindent, write_file  # noqa: E402
+
+
+def generate_module(path: str, functions: int):
+    '''
+    Writes a synthetic module with the given number of documented functions.
+    '''
+    lines = ["'''\nSynthetic module.\n'''", '']
+    for i in range(functions):
+        lines.append(f'def function{i}(a: int, b: str = "x", *args, key=None, **kwargs) -> dict:')
+        lines.append("    '''")
+        lines.append(f'    Docs for function{i}.')
+        lines.append('')
+        lines.append('    * a: int  ')
+        lines.append('        first argument.')
+        lines.append("    '''")
+        lines.append('    return {}')
+        lines.append('')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+
+
+def concat_page(renderer: MdRenderer, node: DocNode) -> str:
+    '''
+    Reproduces the previous renderer which concatenated the strings.
+    '''
+    functions = renderer.get_module_function_list(node.module)
+    s = renderer.header + f'# {node.package} \n'
+    if node.module.doc:
+        s += node.module.doc + '\n---\n'
+    s += '\nFunctions: \n'
+    for func in functions:
+        s += f'* {renderer.function_renderer.link(func)} \n'
+    s += renderer.br()
+    for func in functions:
+        f = '\n'
+        f += f'## {func.name} \n'
+        f += f'`{func.name} {func.signature}`\n\n'
+        if func.doc:
+            f += f'{reindent(func.doc)} \n'
+        s += f + renderer.br()
+    return s + renderer.footer
+
+
+def concat(renderer: MdRenderer, node: DocNode, path: str) -> bool:
+    return write_file(path, concat_page(renderer, node))
+
+
+def stream(renderer: MdRenderer, node: DocNode, path: str) -> bool:
+    return renderer.render(node)
+
+
+def memoized(renderer: MdRenderer, node: DocNode, path: str) -> bool:
+    written = renderer.render(node)
+    renderer.fragments.save([node.target])
+    return written
+
+
+def set_option(config, option: str, value):
+    short, _ = ConfigOption.get_short_n_full_form(option)
+    config.shorts[short].value = value
+
+
+def measure(func, renderer: MdRenderer, node: DocNode, path: str, repeat: int, fresh: bool):
+    elapsed, peak = 0.0, 0
+    for _ in range(repeat):
+        if fresh and os.path.isfile(path):
+            os.remove(path)
+        tracemalloc.start()
+        start = time.perf_counter()
+        func(renderer, node, path)
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed / repeat, peak
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--functions', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_module(os.path.join(tmp, 'synthetic.py'), args.functions)
+        config = BUILD_CONFIG
+        set_option(config, Options.OUTPUT_DIRECTORY, tmp)
+        node = DocNode(tmp, [], True, 'synthetic', config)
+        node.target = 'synthetic.md'
+        node.module = StaticDocModule.from_path(tmp, 'synthetic').freeze()
+        set_option(config, Options.BUILD_CACHE, True)
+        cached = MdRenderer(config)
+        set_option(config, Options.BUILD_CACHE, False)
+        renderer = MdRenderer(config)
+        path = os.path.join(tmp, node.target)
+        renderer.render(node)
+        assert concat_page(renderer, node) == renderer.get_page(node)
+
+        print(f'module with {args.functions} functions ({os.path.getsize(path)} bytes of markdown)')
+        for fresh in (True, False):
+            for name, func, r in [('concat', concat, renderer), ('stream', stream, renderer),
+                                  ('memoized', memoized, cached)]:
+                elapsed, peak = measure(func, r, node, path, args.repeat, fresh)
+                label = f'{name} ({"fresh" if fresh else "unchanged"})'
+                print(f'{label:20} time={elapsed * 1000:9.2f} ms  peak={peak / 1024:9.1f} KiB')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+'''
+Benchmark for the shared source index.
+
+Generates a module with a lot of classes and extracts it twice:
+
+* legacy: every extractor parses the file on its own (imports, globals,
+  function order, class order and once more per class for the variables).
+* indexed: the file is parsed once by the `SourceIndex` and shared.
+* full: the complete `DocModule` extraction (including inspection).
+
+Usage: python benchmarks/bench_source_index.py [--classes 150] [--repeat 5]
+'''
+
+import os
+import sys
+import ast
+import time
+import tempfile
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from code2doc.doc_types import DocModule  # noqa: E402
+from code2doc.source import SourceFile, SourceIndex  # noqa: E402
+
+
+def generate_module(path: str, classes: int, methods: int = 5):
+    '''
+    Writes a synthetic module with the given number of classes.
+    '''
+    lines = ["'''\nSynthetic module.\n'''", 'import os', 'from typing import List', '', 'LIMIT = 10', '']
+    for c in range(classes):
+        lines.append(f'class Class{c}:')
+        lines.append(f"    '''\n    Docs for Class{c}.\n    '''")
+        lines.append(f'    VALUE = {c}')
+        lines.append(f"    NAME = 'class{c}'")
+        for m in range(methods):
+            lines.append(f'    def method{m}(self, a: int, b: str = "x") -> List[int]:')
+            lines.append(f"        '''Docs for method{m}.'''")
+            lines.append('        return [a]')
+        lines.append('')
+        lines.append(f'def function{c}(x, y=None):')
+        lines.append('    return x')
+        lines.append('')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+
+
+class ParseCounter:
+    ''' Counts the calls made to `ast.parse` for source files '''
+    def __init__(self):
+        self.count = 0
+        self.original = ast.parse
+
+    def __enter__(self):
+        def parse(source, filename='<unknown>', *args, **kwargs):
+            if os.path.isfile(filename):
+                self.count += 1
+            return self.original(source, filename, *args, **kwargs)
+        ast.parse = parse
+        return self
+
+    def __exit__(self, *args):
+        ast.parse = self.original
+
+
+def legacy(module):
+    '''
+    Reproduces the old extraction cost: one parse per extractor and one per class.
+    '''
+    DocModule.get_imports(module, SourceFile(module.__file__))
+    DocModule.get_globals(SourceFile(module.__file__))
+    SourceFile(module.__file__).function_order
+    classes = SourceFile(module.__file__).class_order
+    for name, _ in classes:
+        SourceFile(module.__file__).class_variables.get(name)
+
+
+def indexed(module):
+    '''
+    Extraction through a single shared index.
+    '''
+    source = SourceIndex().get(module.__file__)
+    DocModule.get_imports(module, source)
+    DocModule.get_globals(source)
+    source.function_order
+    for name, _ in source.class_order:
+        source.class_variables.get(name)
+
+
+def full(module):
+    '''
+    Complete `DocModule` extraction, which goes through the index as well.
+    '''
+    DocModule(module, SourceIndex()).freeze()
+
+
+def measure(func, module, repeat: int):
+    with ParseCounter() as counter:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(module)
+        elapsed = (time.perf_counter() - start) / repeat
+    return counter.count // repeat, elapsed
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('--classes', type=int, default=150)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_module(os.path.join(tmp, 'synthetic.py'), args.classes)
+        sys.path.insert(0, tmp)
+        import synthetic
+
+        print(f'module with {args.classes} classes ({os.path.getsize(synthetic.__file__)} bytes)')
+        for name, func in [('legacy', legacy), ('indexed', indexed), ('full', full)]:
+            parses, elapsed = measure(func, synthetic, args.repeat)
+            print(f'{name:8} parses={parses:5}  time={elapsed * 1000:9.2f} ms')
+
+
+if __name__ == "__main__":
+    main()
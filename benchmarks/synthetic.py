@@ -0,0 +1,121 @@
+'''
+Synthetic package generator for the benchmarks.
+
+Writes a package tree with the given directory depth, number of modules,
+classes per module, methods per class, globals per module and docstring size.
+Every module imports from a sibling (relatively) so the import resolution is
+exercised as well.
+
+Usage: python benchmarks/synthetic.py <directory> [--depth 2] [--modules 50] ...
+'''
+
+import os
+from argparse import ArgumentParser
+
+DEFAULTS = {
+    'depth': 2,
+    'modules': 50,
+    'classes': 5,
+    'methods': 5,
+    'globals': 5,
+    'doc_lines': 5,
+}
+
+
+def docstring(title: str, lines: int, indent: str = '') -> list:
+    '''
+    Returns the lines of a docstring with `lines` lines of text.
+    '''
+    text = [f"{indent}'''", f'{indent}{title}', '']
+    for i in range(lines):
+        text.append(f'{indent}Line {i} of the documentation of {title}, long enough to be wrapped.')
+    text.append(f"{indent}'''")
+    return text
+
+
+def generate_module(index: int, params: dict) -> str:
+    '''
+    Returns the source of the module number `index`.
+    '''
+    lines = docstring(f'Module {index}', params['doc_lines'])
+    lines += ['', 'import os', 'from typing import List, Dict']
+    if index:
+        lines.append(f'from .module{index - 1} import Class0 as Base')
+    lines.append('')
+    for g in range(params['globals']):
+        lines.append(f'GLOBAL_{g} = {g}')
+    lines.append('')
+    for c in range(params['classes']):
+        base = '(Base)' if index and c == 0 else ''
+        lines.append('')
+        lines.append(f'class Class{c}{base}:')
+        lines += docstring(f'Class{c}', params['doc_lines'], '    ')
+        lines.append(f'    VALUE = {c}')
+        lines.append('')
+        for m in range(params['methods']):
+            lines.append(f'    def method{m}(self, a: int, b: str = "x", *args, c: List[int] = None) -> Dict[str, int]:')
+            lines += docstring(f'method{m}', params['doc_lines'], '        ')
+            lines.append('        return {}')
+            lines.append('')
+        lines.append(f'    @staticmethod')
+        lines.append(f'    def static{c}(x: float) -> float:')
+        lines.append('        return x')
+        lines.append('')
+    lines.append('')
+    lines.append(f'def function{index}(path: str, count: int = 0) -> List[str]:')
+    lines += docstring(f'function{index}', params['doc_lines'], '    ')
+    lines.append('    return [path] * count')
+    return '\n'.join(lines) + '\n'
+
+
+def get_package_dirs(root: str, depth: int) -> list:
+    '''
+    Returns the package directories: `root` and a chain of `depth` sub-packages
+    with two branches at each level.
+    '''
+    dirs, level = [root], [root]
+    for d in range(depth):
+        level = [os.path.join(p, f'sub{d}_{b}') for p in level for b in range(2)]
+        dirs += level
+    return dirs
+
+
+def generate_package(directory: str, name: str = 'synthetic', **params) -> str:
+    '''
+    Writes the synthetic package in the directory and returns its path.
+    The modules are distributed evenly over the package directories.
+    '''
+    params = dict(DEFAULTS, **params)
+    root = os.path.join(directory, name)
+    dirs = get_package_dirs(root, params['depth'])
+    for d in dirs:
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, '__init__.py'), 'w') as f:
+            f.write('\n'.join(docstring(os.path.basename(d), params['doc_lines'])) + '\n')
+    counts = [0] * len(dirs)
+    for i in range(params['modules']):
+        counts[i % len(dirs)] += 1
+    for d, count in zip(dirs, counts):
+        for i in range(count):
+            with open(os.path.join(d, f'module{i}.py'), 'w') as f:
+                f.write(generate_module(i, params))
+    return root
+
+
+def add_arguments(parser: ArgumentParser):
+    for key, value in DEFAULTS.items():
+        parser.add_argument(f'--{key}', type=int, default=value)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument('directory')
+    parser.add_argument('--name', default='synthetic')
+    add_arguments(parser)
+    args = parser.parse_args()
+    params = {k: getattr(args, k) for k in DEFAULTS}
+    print(generate_package(args.directory, args.name, **params))
+
+
+if __name__ == "__main__":
+    main()
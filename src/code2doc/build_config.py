@@ -6,7 +6,7 @@ build command.
 See Also: [Configuration](configurer.md#Configuration), [ConfigOption](configurer.md#ConfigOption)
 '''
 
-from .constants import PROGRAM_NAME
+from .constants import PROGRAM_NAME, SEARCH_INDEX_FILENAME
 from .configurer import Configuration, ConfigOption
 
 
@@ -16,6 +16,7 @@ class Options:
     '''
     MODULES = 'modules'
     OUTPUT_DIRECTORY = 'output_directory'
+    OUTPUT_ARCHIVE = 'output_archive'
     IGNORE_NON_DOCUMENTED = 'ignore_non_documented'
     GENERATE_ROOT_DIRECTORIES = 'generate_root_directories'
     SHOW_RELATIVE_IMPORTS = 'show_relative_imports'
@@ -38,11 +39,19 @@ class Options:
     REINDENT_DOCS = 'reindent_docs'
     ADD_COMPONENT_LINEBREAKS = 'add_component_linebreaks'
     MODULE_NAME_HEADING = 'module_name_heading'
+    GENERATE_SEARCH_INDEX = 'generate_search_index'
+    EXTRACTOR = 'extractor'
+    BUILD_CACHE = 'build_cache'
+    JOBS = 'jobs'
+    IMPORT_TIMEOUT = 'import_timeout'
+    IMPORT_MEMORY_LIMIT = 'import_memory_limit'
+    WORKER_MAX_MODULES = 'worker_max_modules'
 
 
 BUILD_CONFIG = Configuration(PROGRAM_NAME).add(
     ConfigOption(Options.MODULES, [], 'A list of files/directories to generate documentation')).add(
     ConfigOption(Options.OUTPUT_DIRECTORY, './docs', 'Output directory where markdowns will be generated')).add(
+    ConfigOption(Options.OUTPUT_ARCHIVE, '', 'Write the markdowns into this .zip, .tar or .tar.gz archive instead (- streams a tar to stdout), the output directory keeps the build state')).add(
     ConfigOption(Options.IGNORE_NON_DOCUMENTED, False, 'Ignore files that contains no top level documentation')).add(
     ConfigOption(Options.GENERATE_ROOT_DIRECTORIES, True, 'Generate directory for each file/module in the output directory')).add(
     ConfigOption(Options.SHOW_RELATIVE_IMPORTS, True, 'Show all the relative imports in a file')).add(
@@ -64,4 +73,11 @@ BUILD_CONFIG = Configuration(PROGRAM_NAME).add(
     ConfigOption(Options.BUILD_VERSION, True, 'Write build utility version at the end of markdown')).add(
     ConfigOption(Options.REINDENT_DOCS, True, 'Reindent the docs to avoid top level markdown blocks')).add(
     ConfigOption(Options.ADD_COMPONENT_LINEBREAKS, True, 'Add linebreaks after every doc component')).add(
-    ConfigOption(Options.MODULE_NAME_HEADING, True, 'Adds the relative module path as heading in docs.'))
+    ConfigOption(Options.MODULE_NAME_HEADING, True, 'Adds the relative module path as heading in docs.')).add(
+    ConfigOption(Options.GENERATE_SEARCH_INDEX, False, f'Write a search index of the symbols ({SEARCH_INDEX_FILENAME}) in the output directory')).add(
+    ConfigOption(Options.EXTRACTOR, 'inspect', 'Extraction backend: inspect (imports the modules), isolated (imports them in worker processes) or static (reads only the source)')).add(
+    ConfigOption(Options.BUILD_CACHE, True, 'Skip the modules that are unchanged since the last build')).add(
+    ConfigOption(Options.JOBS, 1, 'Number of processes for the extraction and threads for the rendering (0 uses all the cpus)')).add(
+    ConfigOption(Options.IMPORT_TIMEOUT, 60.0, 'Isolated extractor: seconds after which the import of a module is killed (0 for no limit)')).add(
+    ConfigOption(Options.IMPORT_MEMORY_LIMIT, 0, 'Isolated extractor: memory limit of the worker processes in MiB (0 for no limit)')).add(
+    ConfigOption(Options.WORKER_MAX_MODULES, 100, 'Isolated extractor: number of modules after which a worker process is replaced (0 for never)'))
@@ -5,18 +5,160 @@ Responsible for Extracting functions and classes from the source.
 '''
 
 import os
-from glob import glob
-from .doc_types import DocModule
+import sys
+import time
+import heapq
+import logging
+import traceback
+from fnmatch import fnmatch
+from typing import Dict, List, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from .doc_types import DocModule, FrozenModule
+from .static_types import StaticDocModule
+from .source import SourceIndex, ImportResolver
+from .cache import BuildCache
+from .changes import get_importers, get_module_key
+from .isolation import IsolatedPool
 from .build_config import Options, Configuration
-from .constants import README, OUTPUT_EXT
+from .constants import README, OUTPUT_EXT, PRUNED_DIRECTORIES
+
+logger = logging.getLogger(__name__)
+
+
+# Import resolutions shared by the extraction tasks of a worker process
+WORKER_RESOLVER = ImportResolver()
+
+
+def extract_module(path: str, package: str, name: list, static: bool, sources: SourceIndex = None,
+                   fields: Set[str] = None) -> FrozenModule:
+    '''
+    Extracts the documentation of the module `name` of the package. Only the `fields`
+    (all if None) are evaluated. The time spent importing (or parsing) the module and
+    extracting the fields is recorded in its `timings`.
+
+    Only the frozen documentation is kept: the parsed source is dropped from the
+    `sources` (nothing else needs it) along with the live module.
+    '''
+    import_string = '.' + '.'.join(name)
+    module_type = StaticDocModule if static else DocModule
+    start = time.perf_counter()
+    live = module_type.from_path(path, package, import_string, sources)
+    loaded = time.perf_counter()
+    module = live.freeze(fields)
+    source = live.__dict__.get('_source')
+    if sources is not None and source is not None:
+        sources.release(source.path)
+    module.timings['import'] = loaded - start
+    module.timings['extract'] = time.perf_counter() - loaded
+    return module
+
+
+def get_required_fields(config: Configuration) -> Set[str]:
+    '''
+    Returns the lazy fields of the modules (and `class.` fields of the classes) that
+    are rendered with the configuration. Nothing else is ever evaluated.
+    '''
+    fields = set()
+    if config[Options.SHOW_RELATIVE_IMPORTS] or config[Options.LINK_TYPES]:
+        fields.add('imports')
+    if config[Options.SHOW_MODULE_VARIABLES]:
+        fields.add('globals')
+    if config[Options.SHOW_MODULE_FUNCTIONS]:
+        fields.add('functions')
+        if config[Options.KEEP_MODULE_FUNCTION_ORDER]:
+            fields.add('function_order')
+    if config[Options.SHOW_MODULE_CLASSES]:
+        fields.add('classes')
+        if config[Options.KEEP_MODULE_CLASS_ORDER]:
+            fields.add('class_order')
+        if config[Options.SHOW_CLASS_VARIABLES]:
+            fields.add('class.variables')
+        if config[Options.SHOW_CLASS_METHODS]:
+            fields.add('class.methods')
+    return fields
+
+
+def extract_record(path: str, package: str, name: list, static: bool,
+                   fields: Set[str] = None) -> Tuple[FrozenModule, str]:
+    '''
+    Process pool task. Returns the picklable (frozen) module and the error (if any).
+    '''
+    try:
+        sources = SourceIndex(WORKER_RESOLVER)
+        return extract_module(path, package, name, static, sources, fields), ''
+    except (Exception, SystemExit):
+        return None, traceback.format_exc()
+
+
+def get_jobs(config: Configuration) -> int:
+    jobs = int(config[Options.JOBS])
+    return jobs if jobs > 0 else os.cpu_count()
+
+
+def extract_nodes(pending: list, sources: SourceIndex, fields: Set[str], config: Configuration) -> List[tuple]:
+    '''
+    Extracts the nodes, in a process pool when multiple jobs are configured (always
+    in isolated workers with the isolated extractor). Returns the failed nodes with
+    their errors.
+    '''
+    if not pending:
+        return []
+    failures = []
+    jobs = min(get_jobs(config), len(pending))
+    if config[Options.EXTRACTOR] == 'isolated':
+        pool = IsolatedPool(
+            jobs, float(config[Options.IMPORT_TIMEOUT]), int(config[Options.IMPORT_MEMORY_LIMIT]),
+            int(config[Options.WORKER_MAX_MODULES]))
+        results = pool.map(extract_record, [((n.path, n.package, n.name, False, fields), n.package) for n in pending])
+    elif jobs > 1:
+        with ProcessPoolExecutor(jobs) as executor:
+            results = list(executor.map(
+                extract_record,
+                [n.path for n in pending], [n.package for n in pending],
+                [n.name for n in pending], [n.static for n in pending],
+                [fields] * len(pending)))
+    else:
+        for node in pending:
+            try:
+                node.extract(sources, fields)
+            except (Exception, SystemExit):
+                failures.append((node, traceback.format_exc()))
+        return failures
+    for node, (module, error) in zip(pending, results):
+        node.module = module
+        if error:
+            failures.append((node, error))
+    return failures
+
+
+def get_shards(nodes: list, count: int) -> List[int]:
+    '''
+    Partitions the nodes into `count` shards balanced by the size of their sources:
+    the largest first, each into the lightest shard so far. The ties are broken by
+    the target and the shard index, so every machine building the same checkout
+    computes the same partition. Returns the shard index of every node.
+    '''
+    sizes = [os.path.getsize(n.source) if n.source else 0 for n in nodes]
+    loads = [(0, i) for i in range(count)]
+    shards = [0] * len(nodes)
+    for i in sorted(range(len(nodes)), key=lambda i: (-sizes[i], nodes[i].target)):
+        load, shard = heapq.heappop(loads)
+        shards[i] = shard
+        heapq.heappush(loads, (load + sizes[i], shard))
+    return shards
 
 
 class DocNode:
-    def __init__(self, path: str, name: list, is_file: bool, package: str, config: Configuration):
+    def __init__(self, path: str, name: list, is_file: bool, package: str, config: Configuration,
+                 source: str = '', root: str = ''):
+        self.path = path
         self.name = name
         self.package = package
-        import_string = '.' + '.'.join(name)
-        self.module = DocModule.from_path(path, package, import_string)
+        self.source = source
+        self.root = root
+        self.static = config[Options.EXTRACTOR] == 'static'
+        self.module = None
+        self.cached = False
         self.is_file = is_file
         self.target = package if config[Options.GENERATE_ROOT_DIRECTORIES] else ''
         if ''.join(name):
@@ -26,6 +168,24 @@ class DocNode:
         self.target += OUTPUT_EXT
         self.children = []
 
+    def extract(self, sources: SourceIndex = None, fields: Set[str] = None):
+        '''
+        Extracts the documentation of the module (or package) of this node.
+        Only the `fields` (all if None) are evaluated.
+        '''
+        self.module = extract_module(self.path, self.package, self.name, self.static, sources, fields)
+
+    def get_realpath(self) -> str:
+        '''
+        Returns the real path of the source (of the directory for a package without an `__init__` file).
+        '''
+        if self.source:
+            return os.path.realpath(self.source)
+        return os.path.realpath(os.path.join(self.root, *self.name))
+
+    def get_module_name(self) -> str:
+        return '.'.join([self.package] + [n for n in self.name if n])
+
     def add(self, node):
         if node:
             self.children.append(node)
@@ -39,41 +199,365 @@ class DocNode:
 
 
 class DocBuilder:
-    ''' Document Extractor class '''
-    def __init__(self, module_path: str, config: Configuration):
-        ''' constructor '''
+    '''
+    Discovers the tree of a root (nothing is imported). The nodes are extracted and
+    rendered by the `DocProject` of all the roots.
+    '''
+    def __init__(self, module_path: str, config: Configuration, cache: BuildCache = None,
+                 sources: SourceIndex = None):
+        '''
+        constructor. The `sources` (parsed files and import resolutions) are shared
+        with the builders of the other roots.
+        '''
         self.path = module_path
         self.config = config
         self.abspath = os.path.abspath(self.path)
         self.basedir = os.path.dirname(self.abspath)
         self.package, _ = os.path.splitext(os.path.basename(self.abspath))
-        print(self.abspath, self.basedir, self.package)
+        logger.debug('root: %s (package %s)', self.abspath, self.package)
+        self.sources = sources or SourceIndex()
+        self.cache = cache
+        self.errors = []
         self.tree = self.build_tree(self.abspath)
+        logger.debug('tree:\n%s', self.tree)
 
-    def filter(self, name: str) -> bool:
-        filename = name.split(os.path.sep)[-1]
+    def filter(self, relpath: str) -> bool:
+        '''
+        Returns False for the files (or directories) that should be ignored.
+        `ignore_files` are glob patterns matched against the relative path or the name.
+        '''
+        filename = os.path.basename(relpath)
         if self.config[Options.IGNORE_DOT_FILES] and filename.startswith('.'):
             return False
         if self.config[Options.IGNORE_UNDERSCORE_FILES] and filename.startswith('_'):
             return False
+        posix_path = relpath.replace(os.path.sep, '/')
+        for pattern in self.config[Options.IGNORE_FILES]:
+            if fnmatch(posix_path, pattern) or fnmatch(filename, pattern):
+                return False
         return True
 
+    def is_pruned(self, entry: os.DirEntry) -> bool:
+        '''
+        Directories that are never walked (vcs, caches and virtual environments).
+        '''
+        if entry.name in PRUNED_DIRECTORIES:
+            return True
+        return os.path.isfile(os.path.join(entry.path, 'pyvenv.cfg'))
+
+    def create_node(self, parts: List[str], is_file: bool, source: str) -> DocNode:
+        return DocNode(
+            path=self.basedir, name=parts or [''], is_file=is_file,
+            package=self.package, config=self.config, source=source, root=self.abspath)
+
     def build_tree(self, path: str) -> DocNode:
+        '''
+        Discovers the files in a single walk. Nothing is imported here.
+        '''
         if os.path.isfile(path):
-            base, ext = os.path.splitext(path)
-            if ext == '.py':
-                name = base[len(self.abspath) + 1:]
-                if self.filter(name):
-                    return DocNode(
-                        path=self.basedir, name=name.split(os.path.sep),
-                        is_file=True, package=self.package, config=self.config)
+            if path.endswith('.py'):
+                return self.create_node([], True, path)
         elif os.path.isdir(path):
-            if glob(os.path.join(path, "**", "*.py"), recursive=True):
-                name = path[len(self.abspath) + 1:].split(os.path.sep)
-                root = DocNode(
-                    path=self.basedir, name=name,
-                    is_file=False, package=self.package, config=self.config)
-                for filename in os.listdir(path):
-                    filepath = os.path.join(path, filename)
-                    root.add(self.build_tree(filepath))
-                return root
+            tree, _ = self.scan(path, [])
+            return tree
+
+    def scan(self, path: str, parts: List[str]) -> Tuple[DocNode, bool]:
+        '''
+        Walks a directory. Returns its node (None if it contains no python file)
+        and if any python file was found in its sub-tree.
+        '''
+        children, has_python, init = [], False, ''
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            relpath = os.path.join(*parts, entry.name)
+            if entry.is_dir():
+                if not self.is_pruned(entry) and self.filter(relpath):
+                    child, found = self.scan(entry.path, parts + [entry.name])
+                    if found:
+                        children.append(child)
+                        has_python = True
+            elif entry.name.endswith('.py') and entry.is_file():
+                has_python = True
+                if entry.name == '__init__.py':
+                    init = entry.path
+                if self.filter(relpath):
+                    children.append(self.create_node(parts + [entry.name[:-3]], True, entry.path))
+        if not has_python:
+            return None, False
+        node = self.create_node(parts, False, init)
+        node.children = children
+        return node, True
+
+    def get_target(self, path: str, is_file: bool) -> str:
+        '''
+        Returns the target of a python file (or directory) under the root, which may
+        not exist anymore.
+        '''
+        relpath = os.path.relpath(path, os.path.realpath(self.abspath))
+        parts = [] if relpath == os.curdir else relpath.split(os.path.sep)
+        if is_file and parts:
+            parts[-1] = parts[-1][:-3]
+        return self.create_node(parts, is_file, '').target
+
+    def get_nodes(self, node: DocNode) -> List[DocNode]:
+        '''
+        Returns all the nodes of the tree in pre-order.
+        '''
+        nodes = [node]
+        for child in node.children:
+            nodes += self.get_nodes(child)
+        return nodes
+
+    def get_parents(self, tree: DocNode) -> Dict[str, str]:
+        '''
+        Maps the target of every node to the target of its parent.
+        '''
+        parents = {}
+        for node in self.get_nodes(tree) if tree else []:
+            for child in node.children:
+                parents[child.target] = node.target
+        return parents
+
+    def rebuild(self, changed: Set[str]) -> Tuple[List[DocNode], List[str]]:
+        '''
+        Re-discovers the tree after the `changed` source files were modified. The nodes
+        which did not change keep their extracted modules.
+
+        Returns the nodes to render (changed ones and their parents, the ones to extract
+        again without their modules) and the removed targets.
+        '''
+        old_nodes = {n.target: n for n in self.get_nodes(self.tree)} if self.tree else {}
+        old_parents = self.get_parents(self.tree)
+        for path in changed:
+            self.sources.forget(path)
+        self.errors = []
+        self.tree = self.build_tree(self.abspath)
+        nodes = self.get_nodes(self.tree) if self.tree else []
+        parents = self.get_parents(self.tree)
+        dirty = set()
+        for node in nodes:
+            old = old_nodes.get(node.target)
+            if old is None or node.source in changed:
+                sys.modules.pop(node.get_module_name(), None)
+                dirty.update([node.target, parents.get(node.target)])
+            else:
+                node.module, node.cached = old.module, old.cached
+        targets = set([n.target for n in nodes])
+        removed = [t for t in old_nodes if t not in targets]
+        dirty.update([old_parents.get(t) for t in removed])
+        render = [n for n in nodes if n.target in dirty]
+        for node in render:
+            node.cached = False
+        return render, removed
+
+    def fail(self, node: DocNode, error: str):
+        '''
+        Records the extraction failure of a node. The build continues without it.
+        '''
+        logger.error('failed to extract `%s`\n%s', node.target, error)
+        self.errors.append((node.target, error))
+        if self.cache:
+            self.cache.invalidate(node)
+
+
+class DocProject:
+    '''
+    The work graph of all the configured roots. The roots are discovered up front
+    (a root listed twice, e.g. through a symlink, only once) and their nodes are
+    extracted and rendered together, sharing the parsed sources, the import
+    resolutions and the worker processes.
+    '''
+    def __init__(self, config: Configuration, cache: BuildCache = None, extract: bool = True):
+        ''' constructor '''
+        self.config = config
+        self.cache = cache
+        self.sources = SourceIndex()
+        self.fields = get_required_fields(config)
+        self.builders = []
+        self.timings = {}
+        start = time.perf_counter()
+        roots = set()
+        for module_path in config[Options.MODULES]:
+            root = os.path.realpath(module_path)
+            if root in roots:
+                logger.warning('`%s` is already documented, skipping it', module_path)
+                continue
+            roots.add(root)
+            self.builders.append(DocBuilder(module_path, config, cache, self.sources))
+        self.nodes = self.collect()
+        self.timings['discovery'] = time.perf_counter() - start
+        if extract:
+            start = time.perf_counter()
+            self.extract()
+            self.timings['extraction'] = time.perf_counter() - start
+
+    @property
+    def errors(self) -> List[Tuple[str, str]]:
+        return [e for builder in self.builders for e in builder.errors]
+
+    def get_depth(self, builder: DocBuilder) -> int:
+        '''
+        Returns the number of the other roots enclosing the root of the builder.
+        '''
+        root = os.path.realpath(builder.abspath)
+        return len([b for b in self.builders if root.startswith(os.path.realpath(b.abspath) + os.path.sep)])
+
+    def collect(self) -> List[DocNode]:
+        '''
+        Returns the nodes of all the trees. A source file under several roots (a root
+        inside another one) is extracted once, from the outermost root (where its
+        relative imports resolve), whatever the order of the roots. A page produced by
+        several unrelated roots is built from the first one. The other copies are
+        skipped with a warning.
+        '''
+        nodes, self.owners, sources = [], {}, {}
+        for builder in sorted(self.builders, key=self.get_depth):
+            for node in builder.get_nodes(builder.tree) if builder.tree else []:
+                realpath = node.get_realpath()
+                if realpath in sources:
+                    logger.warning('`%s` is already documented in `%s`, skipping `%s`',
+                                   realpath, sources[realpath].target, node.target)
+                    continue
+                if node.target in self.owners:
+                    logger.warning('`%s` is already built from `%s`, skipping the one of `%s`',
+                                   node.target, self.owners[node.target].path, builder.path)
+                    continue
+                sources[realpath] = node
+                self.owners[node.target] = builder
+                nodes.append(node)
+        return nodes
+
+    def get_nodes(self) -> List[DocNode]:
+        return self.nodes
+
+    def get_jobs(self) -> int:
+        return get_jobs(self.config)
+
+    def extract(self):
+        '''
+        Extracts all the nodes, skipping the ones unchanged since the last build.
+        '''
+        pending = []
+        for node in self.nodes:
+            if self.cache and self.cache.is_fresh(node, node.root):
+                node.cached = True
+            else:
+                pending.append(node)
+        self.extract_nodes(pending)
+
+    def extract_nodes(self, pending: List[DocNode]):
+        for node, error in extract_nodes(pending, self.sources, self.fields, self.config):
+            self.owners[node.target].fail(node, error)
+
+    def get_outputs(self, sink) -> List[str]:
+        '''
+        Returns the targets which exist as files in the output directory.
+        '''
+        return sink.get_outputs([n.target for n in self.nodes])
+
+    def load_cached(self) -> List[DocNode]:
+        '''
+        Extracts the nodes that were skipped as unchanged, so their pages are rendered again.
+        '''
+        nodes = [n for n in self.nodes if n.cached]
+        for node in nodes:
+            node.cached = False
+        self.extract_nodes(nodes)
+        return [n for n in nodes if n.module]
+
+    def get_builder(self, path: str) -> DocBuilder:
+        '''
+        Returns the builder of the root containing the (real) path, None if there is none.
+        '''
+        for builder in self.builders:
+            root = os.path.realpath(builder.abspath)
+            if path == root or path.startswith(root + os.path.sep):
+                return builder
+
+    def select(self, changed: Set[str], sink) -> List[str]:
+        '''
+        Extracts only the nodes affected by the `changed` files (real paths, existing or
+        removed): their modules, the modules importing them and the directory pages above
+        them (up to the first existing one in the `sink` for the added or removed
+        directories). The other nodes are marked as cached, their pages are left untouched.
+
+        Returns the targets of the removed modules and directories.
+        '''
+        start = time.perf_counter()
+        sources, parents = {}, {}
+        for node in self.nodes:
+            if node.source:
+                sources.setdefault(os.path.realpath(node.source), []).append(node)
+        for builder in self.builders:
+            parents.update(builder.get_parents(builder.tree))
+        importers = get_importers(self.nodes, self.sources) if changed else {}
+        dirty, removed = set(), []
+        for path in changed:
+            dirty.update(importers.get(get_module_key(path), []))
+            for node in sources.get(path, []):
+                dirty.add(node.target)
+                parent = parents.get(node.target)
+                dirty.add(parent)
+                while parent in parents and not sink.exists(parent):
+                    parent = parents[parent]
+                    dirty.add(parent)
+            builder = self.get_builder(path)
+            if builder is None or os.path.exists(path):
+                continue
+            root = os.path.realpath(builder.abspath)
+            target, dirpath = builder.get_target(path, True), path
+            while target not in self.owners:
+                removed.append(target)
+                if dirpath == root:
+                    break
+                dirpath = os.path.dirname(dirpath)
+                target = builder.get_target(dirpath, False)
+            else:
+                dirty.add(target)
+        pending = []
+        for node in self.nodes:
+            if node.target in dirty:
+                pending.append(node)
+                if self.cache:
+                    self.cache.record(node, node.root)
+            else:
+                node.cached = True
+                if self.cache:
+                    self.cache.keep(node)
+                if node.source:
+                    self.sources.release(node.source)
+        self.extract_nodes(pending)
+        self.timings['extraction'] = time.perf_counter() - start
+        return sorted(set(removed))
+
+    def shard(self, index: int, count: int) -> List[DocNode]:
+        '''
+        Extracts only the nodes of the shard `index` of `count` (see `get_shards`) and returns them.
+        '''
+        start = time.perf_counter()
+        shards = get_shards(self.nodes, count)
+        nodes = [n for n, s in zip(self.nodes, shards) if s == index]
+        self.extract_nodes(nodes)
+        self.timings['extraction'] = time.perf_counter() - start
+        return nodes
+
+    def rebuild(self, changed: Set[str]) -> Tuple[List[DocNode], List[str]]:
+        '''
+        Re-discovers the roots containing the `changed` files (see `DocBuilder.rebuild`)
+        and extracts the affected nodes of all of them together.
+        '''
+        render, removed = [], []
+        for builder in self.builders:
+            prefix = builder.abspath + os.path.sep
+            files = set([p for p in changed if p == builder.abspath or p.startswith(prefix)])
+            if files:
+                nodes, gone = builder.rebuild(files)
+                render += nodes
+                removed += gone
+        self.nodes = self.collect()
+        kept = set([id(n) for n in self.nodes])
+        render = [n for n in render if id(n) in kept]
+        self.extract_nodes([n for n in render if n.module is None])
+        removed = [t for t in removed if t not in self.owners]
+        return [n for n in render if n.module], removed
@@ -0,0 +1,198 @@
+'''
+## Cache module
+
+Persistent incremental build cache. The manifest is stored in the output directory
+and records, for every generated markdown, the state of its source (mtime, size and
+hash) and the children of the directory pages. Together with the fingerprint of the
+effective configuration it allows skipping the modules that are unchanged.
+
+The manifest also lists every file and directory generated by the builds, so they
+can be cleaned without looking at the source.
+'''
+
+import os
+import json
+import hashlib
+from typing import List, Tuple
+from .build_config import Configuration, Options
+from .constants import get_version, MANIFEST_FILENAME, SYMBOLS_FILENAME, FRAGMENTS_FILENAME
+from .constants import SEARCH_INDEX_FILENAME, SHARD_TREE_FILENAME
+from .sinks import get_sink
+from .utils import read_file
+
+
+# Options that does not change the generated markdowns
+IGNORED_OPTIONS = [
+    Options.MODULES, Options.OUTPUT_ARCHIVE, Options.BUILD_CACHE, Options.JOBS,
+    Options.IMPORT_TIMEOUT, Options.IMPORT_MEMORY_LIMIT, Options.WORKER_MAX_MODULES]
+
+
+def read_manifest(out_dir: str) -> dict:
+    '''
+    Returns the manifest of the output directory (None if it is missing or invalid).
+    '''
+    path = os.path.join(out_dir, MANIFEST_FILENAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return None
+
+
+def get_directories(files: List[str]) -> List[str]:
+    '''
+    Returns all the (relative) parent directories of the files.
+    '''
+    dirs = set()
+    for target in files:
+        dirpath = os.path.dirname(target)
+        while dirpath and dirpath not in dirs:
+            dirs.add(dirpath)
+            dirpath = os.path.dirname(dirpath)
+    return sorted(dirs)
+
+
+def remove_outputs(out_dir: str, manifest: dict) -> Tuple[int, int]:
+    '''
+    Removes the generated files listed in the manifest (and the manifest, symbols,
+    fragments, search index and shard tree files, and the archive of the pages if
+    they were bundled) and then the listed directories which became empty (deepest first).
+    Returns the number of removed files and directories.
+    '''
+    files = 0
+    paths = [os.path.join(out_dir, t) for t in manifest.get('files', []) + [
+        MANIFEST_FILENAME, SYMBOLS_FILENAME, FRAGMENTS_FILENAME, SEARCH_INDEX_FILENAME, SHARD_TREE_FILENAME]]
+    for path in paths + [manifest.get('archive') or '']:
+        if os.path.isfile(path):
+            os.remove(path)
+            files += 1
+    dirs = 0
+    for target in sorted(manifest.get('directories', []), key=lambda d: d.count(os.path.sep), reverse=True):
+        path = os.path.join(out_dir, target)
+        if os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+            dirs += 1
+    return files, dirs
+
+
+def get_file_hash(path: str) -> str:
+    '''
+    Returns the sha1 hex digest of the file content.
+    '''
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+class BuildCache:
+    ''' Build manifest stored in the output directory '''
+    def __init__(self, config: Configuration, sink=None):
+        '''
+        constructor. The `sink` (of the configuration by default) holds the pages.
+        '''
+        self.out_dir = config[Options.OUTPUT_DIRECTORY]
+        self.sink = sink or get_sink(config)
+        self.path = os.path.join(self.out_dir, MANIFEST_FILENAME)
+        self.fingerprint = BuildCache.get_fingerprint(config)
+        self.previous = {}
+        self.valid = False
+        self.nodes = {}
+        self.files = []
+        manifest = read_manifest(self.out_dir)
+        if manifest is not None:
+            self.previous = manifest.get('nodes', {})
+            self.valid = manifest.get('fingerprint') == self.fingerprint
+            self.files = manifest.get('files', [])
+
+    @staticmethod
+    def get_fingerprint(config: Configuration) -> str:
+        '''
+        Hash of all the options (and header/footer contents) that affects the output.
+        '''
+        items = [get_version()]
+        for option in config.options:
+            if option.full not in IGNORED_OPTIONS:
+                items.append(f'{option.full}={repr(option.value)}')
+        items.append(read_file(config[Options.HEADER_FILE]))
+        items.append(read_file(config[Options.FOOTER_FILE]))
+        return hashlib.sha1('\n'.join(items).encode()).hexdigest()
+
+    @staticmethod
+    def get_state(node, root: str) -> dict:
+        '''
+        Returns the state of the node as stored in the manifest (without the hash).
+        '''
+        state = {'root': root, 'source': node.source, 'mtime': 0, 'size': 0}
+        if node.source:
+            stat = os.stat(node.source)
+            state['mtime'], state['size'] = stat.st_mtime, stat.st_size
+        if not node.is_file:
+            state['children'] = sorted([[c.name[-1], c.is_file] for c in node.children])
+        return state
+
+    def is_fresh(self, node, root: str) -> bool:
+        '''
+        Checks if the output of the node is up to date. Records the new state of the node.
+        '''
+        state, old = self.record(node, root)
+        if old is None:
+            return False
+        for key in set(state) | set(old):
+            if key != 'mtime' and state.get(key) != old.get(key):
+                return False
+        return self.sink.exists(node.target)
+
+    def record(self, node, root: str) -> Tuple[dict, dict]:
+        '''
+        Records the current state of the node. Returns it with the previous one.
+        '''
+        state = BuildCache.get_state(node, root)
+        old = self.previous.get(node.target) if self.valid else None
+        self.nodes[node.target] = state
+        if old and old.get('hash') and (state['mtime'], state['size']) == (old['mtime'], old['size']):
+            state['hash'] = old['hash']
+        elif node.source:
+            state['hash'] = get_file_hash(node.source)
+        return state, old
+
+    def keep(self, node):
+        '''
+        Keeps the previous state of a node whose output was left untouched.
+        '''
+        self.nodes[node.target] = self.previous.get(node.target, {}) if self.valid else {}
+
+    def invalidate(self, node):
+        '''
+        Forces the node to be rebuilt next time while keeping its previous output.
+        '''
+        self.nodes[node.target] = {}
+
+    def get_stale(self) -> List[str]:
+        '''
+        Returns the targets of the previous build that are not generated anymore.
+        '''
+        return sorted([t for t in self.previous if t not in self.nodes])
+
+    def remove_stale(self) -> List[str]:
+        '''
+        Removes the stale outputs (and the directories which became empty).
+        '''
+        return [t for t in self.get_stale() if self.sink.remove(t)]
+
+    def save(self, outputs: List[str] = ()):
+        '''
+        Writes the manifest. The recorded states become the previous build.
+        The generated `outputs` are added to the files of the previous builds
+        which still exist, the archive is recorded when the pages are bundled.
+        '''
+        os.makedirs(self.out_dir, exist_ok=True)
+        files = set(outputs)
+        files.update([t for t in self.files if os.path.isfile(os.path.join(self.out_dir, t))])
+        self.files = sorted(files)
+        manifest = {
+            'version': get_version(), 'fingerprint': self.fingerprint, 'nodes': self.nodes,
+            'files': self.files, 'directories': get_directories(self.files), 'archive': self.sink.archive}
+        with open(self.path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        self.previous, self.nodes, self.valid = self.nodes, {}, True
@@ -0,0 +1,83 @@
+'''
+## Changes module
+
+Finds the modules affected by the changes since a git revision, for the builds
+that only regenerate the docs of a change (`build --since <rev>`). The changed
+files are listed by git and the modules importing them are found with a reverse
+graph of the package imports, resolved statically from the parsed sources like
+`DocModule.get_imports` does (nothing is imported).
+'''
+
+import os
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Set
+from .source import ImportResolver, SourceIndex
+
+
+def run_git(directory: str, args: List[str]) -> str:
+    '''
+    Runs a git command in the directory and returns its output.
+    Raises ValueError if it fails (e.g. outside of a repository or for an unknown revision).
+    '''
+    result = subprocess.run(
+        ['git', '-C', directory] + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    if result.returncode:
+        raise ValueError(f'`git {" ".join(args)}` failed: {result.stderr.strip()}')
+    return result.stdout
+
+
+def get_changed_files(rev: str, roots: List[str]) -> Set[str]:
+    '''
+    Returns the real paths of the python files under the roots which were modified,
+    added (also the untracked ones) or removed since the revision.
+    '''
+    repos = defaultdict(list)
+    for root in roots:
+        root = os.path.realpath(root)
+        directory = root if os.path.isdir(root) else os.path.dirname(root)
+        toplevel = os.path.realpath(run_git(directory, ['rev-parse', '--show-toplevel']).strip())
+        repos[toplevel].append(os.path.relpath(root, toplevel))
+    changed = set()
+    for toplevel, paths in repos.items():
+        output = run_git(toplevel, ['diff', '--name-only', '--no-renames', '-z', rev, '--'] + paths)
+        output += run_git(toplevel, ['ls-files', '--others', '--exclude-standard', '-z', '--'] + paths)
+        for name in output.split('\0'):
+            if name.endswith('.py'):
+                changed.add(os.path.realpath(os.path.join(toplevel, name)))
+    return changed
+
+
+def get_module_key(path: str) -> str:
+    '''
+    Returns the path of a module file without the extension (the package directory
+    for an `__init__.py`), as the imports are resolved.
+    '''
+    base, _ = os.path.splitext(path)
+    return os.path.dirname(base) if os.path.basename(base) == '__init__' else base
+
+
+def get_importers(nodes: list, sources: SourceIndex) -> Dict[str, Set[str]]:
+    '''
+    Maps the module keys (see `get_module_key`) to the targets of the nodes importing
+    them. An import depends on every location tried while resolving it up to the
+    file found, so adding or removing a module also reaches the importers which now
+    resolve to another file. The sources which can not be parsed are skipped.
+    '''
+    importers = defaultdict(set)
+    resolver = sources.resolver
+    for node in nodes:
+        if not node.source:
+            continue
+        try:
+            source = sources.get(node.source)
+        except (SyntaxError, ValueError, OSError):
+            continue
+        basedir = ImportResolver.get_basedir(source.path, node.get_module_name())
+        for name, module, level in source.imports:
+            for path in ImportResolver.get_candidates(source.path, basedir, node.package, name, module, level):
+                importers[os.path.realpath(path)].add(node.target)
+                if resolver.find(path):
+                    break
+    return importers
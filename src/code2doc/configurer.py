@@ -2,8 +2,10 @@
 '''
 import os
 import sys
+import logging
 import configparser
-from typing import List
+
+logger = logging.getLogger(__name__)
 
 
 class ConfigOption:
@@ -32,7 +34,7 @@ class ConfigOption:
         elif isinstance(self.value, list):
             parser.add_argument(short, full, action='append', help=self.doc)
         else:
-            parser.add_argument(short, full, default=self.value, help=self.doc)
+            parser.add_argument(short, full, default=self.value, type=type(self.value), help=self.doc)
 
 
 class Configuration:
@@ -44,7 +46,7 @@ class Configuration:
 
     def add(self, option: ConfigOption):
         if option.short in self.shorts:
-            print(f'WARNING! option {option.full} already exists in config ({option.short}). Overriding!')
+            logger.warning('option %s already exists in config (%s), overriding it', option.full, option.short)
         self.shorts[option.short] = option
         self.options.append(option)
         return self
@@ -75,7 +77,7 @@ class Configuration:
 
     def load(self, fname):
         if not os.path.isfile(fname):
-            print(f'WARNING! file `{fname}` does not exist')
+            logger.warning('file `%s` does not exist', fname)
             return
         config = configparser.ConfigParser()
         config.read(fname)
@@ -86,13 +88,14 @@ class Configuration:
                     if option.value:
                         option.value = eval(option.value)
         else:
-            print(f'WARNING! section `{self.name}` does not found in `{fname}`')
+            logger.warning('section `%s` does not found in `%s`', self.name, fname)
 
     def parse(self, args):
         for option in self.options:
+            short, full = f'-{option.short}', f'--{option.full}'
             specified = False
             for arg in sys.argv[1:]:
-                if f'-{option.short}' in arg or f'--{option.full}' in arg:
+                if arg == short or arg == full or arg.startswith(full + '='):
                     specified = True
                     break
             if specified and hasattr(args, option.full):
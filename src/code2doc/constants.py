@@ -2,11 +2,27 @@
 Contains all the important constants (mainly string constants) used in the module. 
 '''
 import os
+from functools import lru_cache
 
 PROGRAM_NAME = 'code2doc'
 THIS_DIR = os.path.dirname(__file__)
-VERSION = open(os.path.join(THIS_DIR, '__version__.py')).readline()
 README = 'ReadMe'
 OUTPUT_EXT = '.md'
 CONFIG_EXT = '.ini'
-DEFAULT_CONFIG_FILENAME = PROGRAM_NAME + CONFIG_EXT
\ No newline at end of file
+DEFAULT_CONFIG_FILENAME = PROGRAM_NAME + CONFIG_EXT
+MANIFEST_FILENAME = '.' + PROGRAM_NAME + '.json'
+SYMBOLS_FILENAME = '.' + PROGRAM_NAME + '.symbols.json'
+FRAGMENTS_FILENAME = '.' + PROGRAM_NAME + '.fragments.json'
+DOC_TREE_FILENAME = PROGRAM_NAME + '.tree.jsonl'
+SEARCH_INDEX_FILENAME = PROGRAM_NAME + '.search.json'
+SHARD_TREE_FILENAME = '.' + PROGRAM_NAME + '.shard.jsonl'
+PRUNED_DIRECTORIES = ['__pycache__', '.git', '.hg', '.svn', '.tox', '.nox', '.venv', 'venv', 'node_modules', 'site-packages']
+
+
+@lru_cache(maxsize=None)
+def get_version() -> str:
+    '''
+    Returns the version of the package. The version file is read on the first call only.
+    '''
+    with open(os.path.join(THIS_DIR, '__version__.py')) as f:
+        return f.readline()
@@ -0,0 +1,139 @@
+'''
+## Doc tree module
+
+The extracted doc tree serialized between the `extract` and the `render` commands,
+so the documentation can be extracted once (where the dependencies are installed)
+and rendered anywhere, with any render options.
+
+The file is in JSON lines: a header with the format version, then one line per
+node (in pre-order) with the index of its parent, its location and the frozen
+documentation of its module (or the extraction error).
+
+The sharded builds (`build --shard i/N`) write the same file with all the nodes,
+but only the modules of their shard, and the `merge` command combines them.
+'''
+
+import json
+import time
+from typing import Dict, List
+from .build_config import Configuration
+from .builder import DocNode, get_jobs
+from .constants import get_version
+from .doc_types import FrozenModule
+
+# Incremented whenever the encoding of the nodes or of the modules changes
+FORMAT_VERSION = 1
+
+
+def save_tree(path: str, project, shard: Dict = None):
+    '''
+    Writes the nodes of the project (a `DocProject`) to the doc tree file.
+    The `shard` (index, count and if its pages were rendered) is added to the header.
+    '''
+    nodes = project.get_nodes()
+    index = dict([(id(n), i) for i, n in enumerate(nodes)])
+    parents = {}
+    for node in nodes:
+        for child in node.children:
+            parents[id(child)] = index[id(node)]
+    errors = dict(project.errors)
+    header = dict(shard or {}, version=get_version(), format=FORMAT_VERSION)
+    with open(path, 'w') as f:
+        f.write(json.dumps(header) + '\n')
+        for node in nodes:
+            record = {
+                'parent': parents.get(id(node), -1), 'path': node.path, 'package': node.package,
+                'name': node.name, 'is_file': node.is_file, 'source': node.source, 'root': node.root}
+            if node.module:
+                record['module'] = node.module.encode()
+            elif node.target in errors:
+                record['error'] = errors[node.target]
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+
+class DocTree:
+    '''
+    Doc tree loaded from a file. It is rendered like a `DocProject`, the targets
+    follow the render options.
+    '''
+    def __init__(self, path: str, config: Configuration):
+        ''' constructor. Raises ValueError if the file is not a doc tree of this format. '''
+        self.path = path
+        self.config = config
+        self.header = {}
+        self.cache = None
+        self.builders = []
+        self.nodes = []
+        self.errors = []
+        start = time.perf_counter()
+        self.load(path)
+        self.timings = {'loading': time.perf_counter() - start}
+
+    def load(self, path: str):
+        with open(path) as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                header = {}
+            if not isinstance(header, dict) or header.get('format') != FORMAT_VERSION:
+                raise ValueError(f'`{path}` is not a doc tree of this version, extract it again')
+            self.header = header
+            for line in f:
+                record = json.loads(line)
+                node = DocNode(
+                    record['path'], record['name'], record['is_file'], record['package'],
+                    self.config, record['source'], record['root'])
+                if 'module' in record:
+                    node.module = FrozenModule.decode(record['module'])
+                elif 'error' in record:
+                    self.errors.append((node.target, record['error']))
+                if record['parent'] >= 0:
+                    self.nodes[record['parent']].children.append(node)
+                self.nodes.append(node)
+
+    def get_nodes(self) -> List[DocNode]:
+        return self.nodes
+
+    def get_jobs(self) -> int:
+        return get_jobs(self.config)
+
+    def load_cached(self) -> List[DocNode]:
+        return []
+
+    def get_outputs(self, sink) -> List[str]:
+        '''
+        Returns the targets which exist as files in the output directory.
+        '''
+        return sink.get_outputs([n.target for n in self.nodes])
+
+
+def merge_shards(trees: List[DocTree]) -> List[DocTree]:
+    '''
+    Merges the trees of the shards of a build into the first one: every node gets
+    the module (or the error) of the shard which extracted it. Returns the shard tree
+    of every node. Raises ValueError if a shard is missing or from another build.
+    '''
+    for tree in trees:
+        if 'shards' not in tree.header:
+            raise ValueError(f'`{tree.path}` is not the tree of a shard')
+    count = trees[0].header['shards']
+    indexes = sorted([t.header['shard'] for t in trees])
+    if any(t.header['shards'] != count for t in trees) or indexes != list(range(count)):
+        raise ValueError(f'expected the {count} shards once each, got {", ".join([str(i + 1) for i in indexes])}')
+    merged = trees[0]
+    targets = [n.target for n in merged.nodes]
+    owners = [None] * len(targets)
+    for tree in trees:
+        if [n.target for n in tree.nodes] != targets:
+            raise ValueError(f'`{tree.path}` is a shard of another source tree')
+        failed = set([target for target, _ in tree.errors])
+        for i, node in enumerate(tree.nodes):
+            if node.module or node.target in failed:
+                owners[i] = tree
+                merged.nodes[i].module = node.module
+        if tree is not merged:
+            merged.errors += tree.errors
+    missing = [t for t, owner in zip(targets, owners) if owner is None]
+    if missing:
+        raise ValueError(f'{len(missing)} module(s) are in no shard (e.g. `{missing[0]}`)')
+    return owners
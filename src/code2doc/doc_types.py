@@ -2,28 +2,184 @@
 Hi these are different doc types
 '''
 import os
+import logging
 import sys
-import ast
-from typing import Dict, List, Tuple
+import time
+import types
+from typing import Dict, List, Set, Tuple
 from collections import defaultdict
 from collections.abc import Callable
-from inspect import signature, getmembers, getfile, getmodule, isfunction, isclass, ismethod
-from importlib import import_module, types
+from inspect import signature, getmembers, isfunction, isclass, ismethod
+from importlib import import_module
+from .source import SourceFile, SourceIndex, ImportResolver
+from .utils import lazy_property
+
+logger = logging.getLogger(__name__)
+
+
+def select(doc: object, fields: dict, selected: Set[str], field: str):
+    '''
+    Returns the lazy `field` of a doc object if it is selected (all are if None),
+    else its empty value. The fields that are not selected are never evaluated.
+    '''
+    if selected is None or field in selected:
+        return getattr(doc, field)
+    return fields[field]()
+
+
+class FrozenFunction:
+    '''
+    Extracted documentation of a function. It holds only strings, so it is small
+    and picklable (unlike the live function or the parsed tree it comes from).
+    '''
+    __slots__ = ('name', 'type', 'doc', 'signature')
+
+    def __init__(self, name: str, ftype: str, doc: str, signature: str):
+        self.name = name
+        self.type = ftype
+        self.doc = doc
+        self.signature = signature
+
+    def __getstate__(self):
+        return (self.name, self.type, self.doc, self.signature)
+
+    def __setstate__(self, state: tuple):
+        self.name, self.type, self.doc, self.signature = state
+
+    def __eq__(self, other) -> bool:
+        return type(other) is FrozenFunction and self.__getstate__() == other.__getstate__()
+
+    def encode(self) -> list:
+        '''
+        Returns the JSON serializable form (see `decode`).
+        '''
+        return [self.name, self.type, self.doc, self.signature]
+
+    @staticmethod
+    def decode(data: list) -> 'FrozenFunction':
+        return FrozenFunction(*data)
+
+
+class FrozenClass:
+    '''
+    Extracted documentation of a class. The methods are `(type, functions)` pairs,
+    the statics and the variables `(names, text)` pairs.
+    '''
+    __slots__ = ('name', 'doc', 'base', 'signature', 'methods', 'statics', 'variables')
+
+    def __init__(self, name: str, doc: str, base: str, signature: str, methods: tuple,
+                 statics: tuple, variables: tuple):
+        self.name = name
+        self.doc = doc
+        self.base = base
+        self.signature = signature
+        self.methods = methods
+        self.statics = statics
+        self.variables = variables
+
+    def __getstate__(self):
+        return tuple([getattr(self, k) for k in FrozenClass.__slots__])
+
+    def __setstate__(self, state: tuple):
+        for key, value in zip(FrozenClass.__slots__, state):
+            setattr(self, key, value)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is FrozenClass and self.__getstate__() == other.__getstate__()
+
+    def encode(self) -> list:
+        '''
+        Returns the JSON serializable form (see `decode`).
+        '''
+        methods = [[t, [f.encode() for f in functions]] for t, functions in self.methods]
+        return [self.name, self.doc, self.base, self.signature, methods, self.statics, self.variables]
+
+    @staticmethod
+    def decode(data: list) -> 'FrozenClass':
+        name, doc, base, signature, methods, statics, variables = data
+        return FrozenClass(
+            name, doc, base, signature,
+            tuple([(t, tuple([FrozenFunction.decode(f) for f in functions])) for t, functions in methods]),
+            tuple([tuple(s) for s in statics]), tuple([(tuple(n), text) for n, text in variables]))
+
+
+class FrozenModule:
+    '''
+    Extracted documentation of a module, as rendered. The imports map the names to
+    their `(from_module, file)` and the timings of the extraction are kept along.
+    '''
+    __slots__ = (
+        'name', 'doc', 'imports', 'functions', 'classes',
+        'function_order', 'class_order', 'globals', 'timings')
+
+    def __init__(self, name: str, doc: str, imports: dict, functions: tuple, classes: tuple,
+                 function_order: tuple, class_order: tuple, globals: tuple, timings: dict):
+        self.name = name
+        self.doc = doc
+        self.imports = imports
+        self.functions = functions
+        self.classes = classes
+        self.function_order = function_order
+        self.class_order = class_order
+        self.globals = globals
+        self.timings = timings
+
+    def __getstate__(self):
+        return tuple([getattr(self, k) for k in FrozenModule.__slots__])
+
+    def __setstate__(self, state: tuple):
+        for key, value in zip(FrozenModule.__slots__, state):
+            setattr(self, key, value)
+
+    def __eq__(self, other) -> bool:
+        return type(other) is FrozenModule and self.__getstate__() == other.__getstate__()
+
+    def encode(self) -> list:
+        '''
+        Returns the JSON serializable form (see `decode`).
+        '''
+        return [
+            self.name, self.doc, self.imports, [f.encode() for f in self.functions],
+            [c.encode() for c in self.classes], self.function_order, self.class_order,
+            self.globals, self.timings]
+
+    @staticmethod
+    def decode(data: list) -> 'FrozenModule':
+        name, doc, imports, functions, classes, function_order, class_order, globals, timings = data
+        return FrozenModule(
+            name, doc, {k: tuple(v) for k, v in imports.items()},
+            tuple([FrozenFunction.decode(f) for f in functions]),
+            tuple([FrozenClass.decode(c) for c in classes]), tuple(function_order),
+            tuple([(n, tuple(functions)) for n, functions in class_order]),
+            tuple([(tuple(n), text) for n, text in globals]), timings)
+
 
 class DocFunction:
+    FIELDS = {'signature': str}
+
     def __init__(self, obj: Callable, ftype='function'):
+        self._obj = obj
         self.name = obj.__name__
         self.type = ftype
         self.doc = obj.__doc__
-        self.signature = signature(obj)
         # self.spec = getfullargspec(obj)
 
+    @lazy_property
+    def signature(self):
+        return signature(self._obj)
+
     def __str__(self) -> str:
         if self.type == 'function':
             return f'{self.name}{self.signature}'
         else:
             return f'@{self.type}\n\t{self.name}{self.signature}'
 
+    def freeze(self) -> FrozenFunction:
+        '''
+        Returns the compact (picklable) form. Nothing of the live function is kept.
+        '''
+        return FrozenFunction(self.name, self.type, self.doc, str(self.signature))
+
     @classmethod
     def extract_from_module(cls, module: types.ModuleType) -> List['DocFunction']:
         '''
@@ -34,16 +190,8 @@ class DocFunction:
                 yield cls(obj)
 
     @staticmethod
-    def get_order(module: types.ModuleType) -> List[str]:
-        order = []
-        if module.__file__ is None:
-            return order
-        with open(module.__file__) as fh:
-            root = ast.parse(fh.read(), module.__file__)
-            for node in ast.iter_child_nodes(root):
-                if isinstance(node, ast.FunctionDef):
-                    order.append(node.name)
-        return order
+    def get_order(source: SourceFile) -> List[str]:
+        return list(source.function_order) if source else []
 
     @classmethod
     def extract_from_class(cls, obj: object) -> Dict[str, 'DocFunction']:
@@ -59,18 +207,39 @@ class DocFunction:
 
 
 class DocClass:
-    def __init__(self, obj: object, module: types.ModuleType):
+    FIELDS = {'methods': dict, 'statics': list, 'signature': str, 'variables': list}
+
+    def __init__(self, obj: object, source: SourceFile):
+        self._obj = obj
+        self._source = source
         self.name = obj.__name__
         self.doc = obj.__doc__
         self.base = obj.__base__ if str(obj.__base__) != str(object) else None
-        self.methods = DocFunction.extract_from_class(obj)
-        self.statics, classmethods = self.get_static_members(obj)
-        if classmethods:
-            self.methods['classmethod'] = classmethods
-        self.signature = signature(obj)
-        self.variables = DocClass.get_variables(obj, module)
         # self.spec = getfullargspec(obj)
 
+    @lazy_property
+    def methods(self):
+        methods = DocFunction.extract_from_class(self._obj)
+        if self._members[1]:
+            methods['classmethod'] = self._members[1]
+        return methods
+
+    @lazy_property
+    def statics(self):
+        return self._members[0]
+
+    @lazy_property
+    def _members(self):
+        return self.get_static_members(self._obj)
+
+    @lazy_property
+    def signature(self):
+        return signature(self._obj)
+
+    @lazy_property
+    def variables(self):
+        return DocClass.get_variables(self._obj, self._source)
+
     @staticmethod
     def get_static_members(obj: object) -> Tuple[list, list]:
         base_members = set([n for n, _ in getmembers(obj.__base__)])
@@ -83,6 +252,19 @@ class DocClass:
                     statics.append((name, mem))
         return sorted(statics), classmethods
 
+    def freeze(self, fields: Set[str] = None) -> FrozenClass:
+        '''
+        Returns the compact (picklable) form. Only the `fields` (all if None) are
+        evaluated, the others are left empty.
+        '''
+        def get(field):
+            return select(self, DocClass.FIELDS, fields, field)
+        methods = tuple([(t, tuple([m.freeze() for m in ms])) for t, ms in get('methods').items()])
+        return FrozenClass(
+            self.name, self.doc, getattr(self.base, '__name__', self.base), str(get('signature')),
+            methods, tuple([(k, str(v)) for k, v in get('statics')]),
+            tuple([(tuple(n), text) for n, text in get('variables')]))
+
     def __str__(self) -> str:
         items = [f'{self.name}{self.signature}']
         statics = '\n'.join([f'\t{k} = {v}' for k, v in self.statics])
@@ -93,56 +275,84 @@ class DocClass:
         return '\n'.join(items)
 
     @classmethod
-    def extract_from_module(cls, module: types.ModuleType) -> List['DocClass']:
+    def extract_from_module(cls, module: types.ModuleType, source: SourceFile) -> List['DocClass']:
         for _, obj in getmembers(module, isclass):
             if obj.__module__ == module.__name__:
-                yield cls(obj, module)
+                yield cls(obj, source)
 
     @staticmethod
-    def get_order(module: types.ModuleType) -> List[str]:
-        order = []
-        if module.__file__ is None:
-            return order
-        with open(module.__file__) as fh:
-            root = ast.parse(fh.read(), module.__file__)
-            for node in ast.iter_child_nodes(root):
-                if isinstance(node, ast.ClassDef):
-                    functions = []
-                    for cld in ast.iter_child_nodes(node):
-                        if isinstance(cld, ast.FunctionDef):
-                            functions.append(cld.name)
-                    order.append((node.name, functions))
-        return order
+    def get_order(source: SourceFile) -> List[str]:
+        return list(source.class_order) if source else []
 
     @staticmethod
-    def get_variables(obj: object, module: types.ModuleType) -> List[str]:
-        order = []
-        if module.__file__ is None:
-            return order
-        with open(module.__file__) as fh:
-            content = fh.read()
-            lines = content.splitlines(True)
-            root = ast.parse(content, module.__file__)
-            for node in ast.iter_child_nodes(root):
-                if isinstance(node, ast.ClassDef) and node.name == obj.__name__:
-                    for cnode in ast.iter_child_nodes(node):
-                        if isinstance(cnode, ast.Assign):
-                            start, end = DocModule.get_node_range(cnode)
-                            names = [x.id for x in cnode.targets]
-                            order.append((names, ''.join(lines[start - 1: end])))
-        return order
+    def get_variables(obj: object, source: SourceFile) -> List[str]:
+        return list(source.class_variables.get(obj.__name__, [])) if source else []
 
 
 class DocModule:
-    def __init__(self, obj: types.ModuleType):
+    '''
+    Documentation of a module. Except the name and the doc, the fields are evaluated
+    lazily on the first access, so the sections that are not rendered cost nothing.
+    '''
+    FIELDS = {
+        'imports': dict, 'functions': list, 'classes': list,
+        'function_order': list, 'class_order': list, 'globals': list}
+
+    def __init__(self, obj: types.ModuleType, sources: SourceIndex = None):
+        self._obj = obj
+        self._sources = SourceIndex() if sources is None else sources
         self.name = obj.__name__
         self.doc = obj.__doc__
-        self.imports = DocModule.get_imports(obj)
-        self.functions = list(DocFunction.extract_from_module(obj))
-        self.classes = list(DocClass.extract_from_module(obj))
-        self.function_order = DocFunction.get_order(obj)
-        self.class_order = DocClass.get_order(obj)
-        self.globals = DocModule.get_globals(obj)
+        self.timings = {}
+
+    @lazy_property
+    def _source(self):
+        return self._sources.get(self._obj.__file__) if self._obj.__file__ else None
+
+    @lazy_property
+    def imports(self):
+        start = time.perf_counter()
+        imports = DocModule.get_imports(self._obj, self._source, self._sources)
+        self.timings['imports'] = time.perf_counter() - start
+        return imports
+
+    @lazy_property
+    def functions(self):
+        return list(DocFunction.extract_from_module(self._obj))
+
+    @lazy_property
+    def classes(self):
+        return list(DocClass.extract_from_module(self._obj, self._source))
+
+    @lazy_property
+    def function_order(self):
+        return DocFunction.get_order(self._source)
+
+    @lazy_property
+    def class_order(self):
+        return DocClass.get_order(self._source)
+
+    @lazy_property
+    def globals(self):
+        return DocModule.get_globals(self._source)
+
+    def freeze(self, fields: Set[str] = None) -> FrozenModule:
+        '''
+        Returns the compact (picklable) form, without any reference to the live module
+        or the parsed source. Only the `fields` (all if None) are evaluated, the others
+        are left empty. The fields of the classes are selected with a `class.` prefix.
+        '''
+        def get(field):
+            return select(self, DocModule.FIELDS, fields, field)
+        class_fields = None if fields is None else set([f[6:] for f in fields if f.startswith('class.')])
+        return FrozenModule(
+            self.name, self.doc, get('imports'),
+            tuple([f.freeze() for f in get('functions')]),
+            tuple([c.freeze(class_fields) for c in get('classes')]),
+            tuple(get('function_order')),
+            tuple([(name, tuple(functions)) for name, functions in get('class_order')]),
+            tuple([(tuple(n), text) for n, text in get('globals')]),
+            dict(self.timings))
 
     def __str__(self):
         s = f'Module [{self.name}]\n'
@@ -162,65 +372,35 @@ class DocModule:
         return s
 
     @staticmethod
-    def get_imports(module: types.ModuleType) -> dict:
+    def get_imports(module: types.ModuleType, source: SourceFile, sources: SourceIndex = None) -> dict:
+        '''
+        Maps the imported names to their (from_module, file). The files are resolved
+        statically from the package layout, only the imports of the package are found
+        (see `SourceIndex.resolve`: the imported constants have no file).
+        '''
         names = {}
-        if module.__file__ is None:
-            print(f'Info: Module "{module.__name__}" doesn\'t have an __init__ file. '
-                'Module level documentation can be added in the __init__ file.')
+        if source is None:
+            logger.debug('module "%s" doesn\'t have an __init__ file, module level documentation '
+                         'can be added in the __init__ file', module.__name__)
             return names
-        members = {k:v for k, v in getmembers(module)}
-        with open(module.__file__) as fh:
-            root = ast.parse(fh.read(), module.__file__)
-            for node in ast.iter_child_nodes(root):
-                if isinstance(node, ast.Import):
-                    for n in node.names:
-                        filepath = ''
-                        try:
-                            filepath = getfile(members[n.name])
-                        except:
-                            pass
-                        names[n.name] = ('', filepath)
-                elif isinstance(node, ast.ImportFrom):
-                    for n in node.names:
-                        filepath = ''
-                        try:
-                            filepath = getfile(getmodule(members[n.name]))
-                        except:
-                            pass
-                        names[n.name] = (node.module, filepath)
+        if sources is None:
+            sources = SourceIndex()
+        package = module.__name__.split('.')[0]
+        basedir = ImportResolver.get_basedir(source.path, module.__name__)
+        for name, from_module, level in source.imports:
+            names[name] = (from_module, sources.resolve(source.path, basedir, package, name, from_module, level))
         return names
 
-    # Todo: Does not required for modern versions of python
-    @staticmethod
-    def get_node_range(root: ast.stmt) -> Tuple[int]:
-        if not hasattr(root, 'lineno'):
-            return -1, -1
-        start = end = root.lineno
-        for node in ast.iter_child_nodes(root):
-            _, lineno = DocModule.get_node_range(node)
-            end = max(end, lineno)
-        return start, end
-
     @staticmethod
-    def get_globals(module: types.ModuleType) -> List[str]:
-        order = []
-        if module.__file__ is None:
-            return order
-        with open(module.__file__) as fh:
-            content = fh.read()
-            lines = content.splitlines(True)
-            root = ast.parse(content, module.__file__)
-            for node in ast.iter_child_nodes(root):
-                if isinstance(node, ast.Assign):
-                    start, end = DocModule.get_node_range(node)
-                    names = [x.id for x in node.targets]
-                    order.append((names, ''.join(lines[start - 1: end])))
-        return order
+    def get_globals(source: SourceFile) -> List[str]:
+        return list(source.globals) if source else []
 
     @classmethod
-    def from_path(cls, path: str, package: str, name: str = ''):
+    def from_path(cls, path: str, package: str, name: str = '', sources: SourceIndex = None):
         old_path = sys.path[0]
         sys.path[0] = os.path.abspath(path)
-        module = import_module(name, package) if name else import_module(package)
-        sys.path[0] = old_path
-        return cls(module)
+        try:
+            module = import_module(name, package) if name else import_module(package)
+        finally:
+            sys.path[0] = old_path
+        return cls(module, sources)
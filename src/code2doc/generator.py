@@ -5,30 +5,72 @@ Responsible for generating the documents.
 '''
 
 import os
+import logging
+import traceback
+from typing import List
+from threading import BoundedSemaphore
+from concurrent.futures import ThreadPoolExecutor
 
-from .build_config import Configuration, Options
-from .builder import DocBuilder, DocNode
+from .build_config import Configuration
+from .builder import DocProject, DocNode
 from .renderer.renderer import MdRenderer
 
+logger = logging.getLogger(__name__)
+
 
 class Generator:
     ''' Document Generator class '''
-    def __init__(self, builder: DocBuilder, renderer: MdRenderer, config: Configuration):
+    def __init__(self, project: DocProject, renderer: MdRenderer, config: Configuration):
         ''' constructor '''
         self.config = config
-        self.builder = builder
+        self.project = project
         self.renderer = renderer
+        self.errors = []
 
-    def generate(self):
-        self._generate(self.builder.tree)
+    def generate(self, nodes: List[DocNode] = None):
+        '''
+        Renders and writes the pages (by default of all the roots) in a thread pool.
+        The sink prepares the pages up front and the failures are collected in `errors`.
+        '''
+        if nodes is None:
+            nodes = self.project.get_nodes()
+        pending = []
+        for node in nodes:
+            if node.cached:
+                self.renderer.stats['unchanged'] += 1
+            elif node.module:
+                pending.append(node)
+        nodes = pending
+        self.renderer.sink.prepare([n.target for n in nodes])
+        jobs = self.project.get_jobs()
+        slots = BoundedSemaphore(2 * jobs)
+        with ThreadPoolExecutor(jobs) as executor:
+            futures = []
+            for node in nodes:
+                slots.acquire()
+                future = executor.submit(self.renderer.render, node)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append((node, future))
+            for node, future in futures:
+                try:
+                    written = future.result()
+                    self.renderer.stats['written' if written else 'unchanged'] += 1
+                except Exception:
+                    self.fail(node, traceback.format_exc())
 
-    def _generate(self, node: DocNode):
-        self.renderer.render(node)
-        for child in node.children:
-            self._generate(child)
+    def fail(self, node: DocNode, error: str):
+        '''
+        Records the rendering failure of a node.
+        '''
+        logger.error('failed to render `%s`\n%s', node.target, error)
+        self.errors.append((node.target, error))
+        if self.project.cache:
+            self.project.cache.invalidate(node)
 
     def remove(self):
-        self._remove(self.builder.tree)
+        for builder in self.project.builders:
+            if builder.tree:
+                self._remove(builder.tree)
 
     def _remove(self, node: DocNode):
         filepath = os.path.join(self.renderer.out_dir, node.target)
@@ -0,0 +1,169 @@
+'''
+## Isolation module
+
+Runs the extraction tasks in worker subprocesses that can not take the build
+down: a task running longer than the timeout is killed, the address space of the
+workers is capped (where `resource` is available) and the workers are replaced
+after a number of tasks to cap their growth. The modules of the documented
+package imported by a task are evicted from `sys.modules` after it. A killed or
+crashed task is reported as failed and the others go on.
+'''
+
+import sys
+import time
+import logging
+import traceback
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Callable, List, Tuple
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def set_memory_limit(megabytes: int):
+    '''
+    Caps the address space of the process, allocating above raises `MemoryError`.
+    '''
+    limit = megabytes * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def evict(package: str, loaded: set):
+    '''
+    Removes the modules of the package imported since `loaded` from `sys.modules`.
+    '''
+    for name in [n for n in sys.modules if n not in loaded]:
+        if name == package or name.startswith(package + '.'):
+            del sys.modules[name]
+
+
+def run_worker(conn, func: Callable, memory_limit: int, max_tasks: int):
+    '''
+    Worker loop. Receives `(args, package)` tasks and sends back `func(*args)`.
+    Exits after `max_tasks` tasks (0 for no limit) or on a None task.
+    '''
+    if memory_limit and resource:
+        set_memory_limit(memory_limit)
+    done = 0
+    while not max_tasks or done < max_tasks:
+        task = conn.recv()
+        if task is None:
+            break
+        args, package = task
+        loaded = set(sys.modules)
+        try:
+            result = func(*args)
+        except (Exception, SystemExit):
+            result = None, traceback.format_exc()
+        evict(package, loaded)
+        try:
+            conn.send(result)
+        except Exception:
+            conn.send((None, traceback.format_exc()))
+        done += 1
+    conn.close()
+
+
+class Worker:
+    ''' A worker subprocess and the task it is running '''
+    def __init__(self, context, func: Callable, memory_limit: int, max_tasks: int):
+        ''' constructor '''
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=run_worker, args=(child, func, memory_limit, max_tasks))
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+        self.index = None
+        self.deadline = None
+        self.done = 0
+
+    def submit(self, index: int, task: tuple, timeout: float):
+        self.index = index
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send(task)
+
+    def stop(self):
+        '''
+        Asks the idle worker to exit (or kills the busy one).
+        '''
+        if self.index is None and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+class IsolatedPool:
+    '''
+    Pool of isolated workers. `map` returns the `(result, error)` of every task,
+    the tasks returning `(result, error)` themselves (like `extract_record`).
+    '''
+    def __init__(self, jobs: int, timeout: float = 0, memory_limit: int = 0, max_tasks: int = 0):
+        ''' constructor '''
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_tasks = max_tasks
+        self.context = multiprocessing.get_context()
+        if memory_limit and resource is None:
+            logger.warning('the memory limit is not supported on this platform')
+
+    def map(self, func: Callable, tasks: List[Tuple[tuple, str]]) -> List[Tuple[object, str]]:
+        '''
+        Runs `func(*args)` for the `(args, package)` tasks.
+        '''
+        results = [None] * len(tasks)
+        queue = deque(enumerate(tasks))
+        idle, busy = [], []
+        try:
+            while queue or busy:
+                while queue and len(idle) + len(busy) < self.jobs:
+                    idle.append(Worker(self.context, func, self.memory_limit, self.max_tasks))
+                while queue and idle:
+                    worker = idle.pop()
+                    index, task = queue.popleft()
+                    worker.submit(index, task, self.timeout)
+                    busy.append(worker)
+                deadlines = [w.deadline for w in busy if w.deadline is not None]
+                timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                ready = wait([w.conn for w in busy], timeout)
+                for worker in list(busy):
+                    if worker.conn in ready:
+                        try:
+                            results[worker.index] = worker.conn.recv()
+                            worker.done += 1
+                        except (EOFError, OSError):
+                            worker.process.join()
+                            results[worker.index] = None, f'worker died (exit code {worker.process.exitcode})'
+                        worker.index = None
+                        self.release(worker, idle)
+                    elif worker.deadline is not None and time.monotonic() >= worker.deadline:
+                        results[worker.index] = None, f'timed out after {self.timeout} seconds'
+                        worker.stop()
+                    else:
+                        continue
+                    busy.remove(worker)
+        finally:
+            for worker in idle + busy:
+                worker.stop()
+        return results
+
+    def release(self, worker: Worker, idle: List[Worker]):
+        '''
+        Returns a finished worker to the idle ones, unless it died, was killed or is used up.
+        '''
+        if worker.process.is_alive() and (not self.max_tasks or worker.done < self.max_tasks):
+            idle.append(worker)
+        else:
+            worker.stop()
@@ -4,40 +4,56 @@
 Responsible for Rendering the class docs in markdown file.
 '''
 
+from io import StringIO
+from typing import TextIO
 from ..build_config import Configuration, Options
-from ..doc_types import DocClass
+from ..doc_types import FrozenClass, FrozenModule
+from ..symbols import SymbolIndex
 from ..utils import reindent
 
 
 class ClassRenderer:
     ''' Class renderer class '''
-    def __init__(self, config: Configuration):
+    def __init__(self, config: Configuration, symbols: SymbolIndex = None):
         ''' constructor '''
         self.config = config
+        self.symbols = symbols
 
-    def link(self, cls: DocClass) -> str:
+    def link(self, cls: FrozenClass) -> str:
         base = ' ({cls.base.__name__})' if cls.base else ''
         return f'[{cls.name}{base}](#{cls.name})'
 
-    def render(self, cls: DocClass) -> str:
+    def render(self, cls: FrozenClass, module: FrozenModule = None, page: str = '') -> str:
+        f = StringIO()
+        self.write(cls, f, module, page)
+        return f.getvalue()
+
+    def write(self, cls: FrozenClass, f: TextIO, module: FrozenModule = None, page: str = ''):
+        '''
+        Writes the class docs. The `module` and the `page` it is rendered in are
+        needed for linking the types.
+        '''
         base = ' ({cls.base.__name__})' if cls.base else ''
-        s = '\n'
-        s += f'## {cls.name} {base} \n'
+        f.write('\n')
+        f.write(f'## {cls.name} {base} \n')
         if cls.doc:
-            s += f'{cls.doc} \n'
+            f.write(f'{cls.doc} \n')
         if self.config[Options.SHOW_CLASS_VARIABLES] and cls.variables:
-            s += f'\n Static variables: \n'
+            f.write(f'\n Static variables: \n')
             for _, expr in cls.variables:
-                s += f'*   ```py\n{reindent(expr, 4)}\n    ``` \n'
+                f.write(f'*   ```py\n{reindent(expr, 4)}\n    ``` \n')
         if self.config[Options.SHOW_CLASS_METHODS]:
-            for method_type, methods in cls.methods.items():
+            for method_type, methods in cls.methods:
                 postfix = 's' if len(methods) > 1 else ''
-                s += f'\n{method_type}{postfix}: \n'
+                f.write(f'\n{method_type}{postfix}: \n')
                 for obj in methods:
                     name = obj.name.replace("_", "\\_")
-                    s += f'* **{name}** \n'
-                    s += f'`{obj.signature}`\n\n'
+                    f.write(f'* **{name}** \n')
+                    f.write(f'`{obj.signature}`\n\n')
+                    if self.symbols and module:
+                        links = self.symbols.link_types(obj.signature, module, page)
+                        if links:
+                            f.write(f'Types: {", ".join(links)} \n\n')
                     if obj.doc:
                         doc = reindent(obj.doc, 4) if self.config[Options.REINDENT_DOCS] else obj.doc
-                        s += f'{doc} \n'
-        return s
+                        f.write(f'{doc} \n')
@@ -0,0 +1,144 @@
+'''
+## Fragments module
+
+Memoization of the rendered functions and classes (with the build cache). A
+fragment is keyed by the digest of the extracted documentation of the symbol
+(everything its source contributes to the page) and, when the types are linked,
+of the link context of the page. So an edited method only re-renders its class,
+the rest of the page is copied from the previous page. Only the position and the
+checksum of the fragments in the pages are kept between the builds (for the
+options they were rendered with), the text itself is read back from the pages.
+'''
+
+import os
+import json
+import zlib
+import hashlib
+import threading
+from typing import BinaryIO, Callable, List, TextIO
+from ..build_config import Configuration, Options
+from ..cache import BuildCache
+from ..constants import get_version, FRAGMENTS_FILENAME
+
+
+class PageFragments:
+    '''
+    Fragments of a page being rendered. The unchanged ones are copied from the
+    previous page (`source`), the position of every fragment in the new page is
+    recorded for the next build.
+    '''
+    def __init__(self, cache: 'FragmentCache', target: str, previous: dict, source: BinaryIO):
+        ''' constructor '''
+        self.cache = cache
+        self.target = target
+        self.previous = previous
+        self.source = source
+        self.positions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.source is not None:
+            self.source.close()
+        if exc_type is None:
+            self.cache.used[self.target] = self.positions
+
+    def read(self, key: str) -> bytes:
+        '''
+        Returns the fragment from the previous page (None if missing or changed).
+        '''
+        if self.source is None or key not in self.previous:
+            return None
+        offset, length, checksum = self.previous[key]
+        self.source.seek(offset)
+        data = self.source.read(length)
+        if len(data) != length or zlib.crc32(data) != checksum:
+            return None
+        return data
+
+    def write(self, key: str, f: TextIO, render: Callable[[], str]):
+        '''
+        Writes the fragment into the page `f`, rendering it only if it is not in
+        the previous page.
+        '''
+        data = self.read(key)
+        text = render() if data is None else data.decode('utf-8')
+        offset = f.tell()
+        f.write(text)
+        length = f.tell() - offset
+        checksum = zlib.crc32(data if data is not None else text.encode('utf-8'))
+        self.positions[key] = [offset, length, checksum]
+
+
+class FragmentCache:
+    ''' Positions of the rendered fragments in the pages '''
+    def __init__(self, config: Configuration):
+        ''' constructor '''
+        self.out_dir = config[Options.OUTPUT_DIRECTORY]
+        self.path = os.path.join(self.out_dir, FRAGMENTS_FILENAME)
+        self.persistent = config[Options.BUILD_CACHE]
+        self.fingerprint = BuildCache.get_fingerprint(config) if self.persistent else ''
+        self.lock = threading.Lock()
+        self.pages = None
+        self.used = {}
+
+    @staticmethod
+    def get_key(obj, context: str = '') -> str:
+        '''
+        Returns the key of the fragment of a frozen function or class.
+        '''
+        return hashlib.sha1((context + repr(obj.encode())).encode()).hexdigest()
+
+    def load(self):
+        '''
+        Reads the fragments of the previous build (on the first page).
+        '''
+        with self.lock:
+            if self.pages is not None:
+                return
+            pages = {}
+            if os.path.isfile(self.path):
+                with open(self.path) as f:
+                    try:
+                        data = json.load(f)
+                    except ValueError:
+                        data = {}
+                if data.get('version') == get_version() and data.get('fingerprint') == self.fingerprint:
+                    pages = data.get('pages', {})
+            self.pages = pages
+
+    def open(self, target: str, sink) -> PageFragments:
+        '''
+        Returns the fragments of a page which is rendered into the `sink`. None
+        without the build cache: the fragments are then written straight to the page.
+        '''
+        if not self.persistent:
+            return None
+        if self.pages is None:
+            self.load()
+        previous = self.pages.get(target)
+        return PageFragments(self, target, previous or {}, sink.open_previous(target) if previous else None)
+
+    def save(self, targets: List[str]):
+        '''
+        Keeps the fragments of the rendered pages and the previous fragments of the
+        other pages (of the `targets`). Nothing is written if nothing changed.
+        '''
+        if not self.used:
+            return
+        if self.pages is None:
+            self.load()
+        pages = {}
+        for target in targets:
+            if target in self.used:
+                pages[target] = self.used[target]
+            elif target in self.pages:
+                pages[target] = self.pages[target]
+        changed = pages != self.pages or not os.path.isfile(self.path)
+        self.pages, self.used = pages, {}
+        if changed:
+            os.makedirs(self.out_dir, exist_ok=True)
+            data = {'version': get_version(), 'fingerprint': self.fingerprint, 'pages': pages}
+            with open(self.path, 'w') as f:
+                f.write(json.dumps(data, separators=(',', ':')))
@@ -4,25 +4,41 @@
 Responsible for Rendering the function docs in markdown file.
 '''
 
+from io import StringIO
+from typing import TextIO
 from ..build_config import Configuration, Options
-from ..doc_types import DocFunction
+from ..doc_types import FrozenFunction, FrozenModule
+from ..symbols import SymbolIndex
 from ..utils import reindent
 
 
 class FunctionRenderer:
     ''' Function renderer class '''
-    def __init__(self, config: Configuration):
+    def __init__(self, config: Configuration, symbols: SymbolIndex = None):
         ''' constructor '''
         self.config = config
+        self.symbols = symbols
 
-    def link(self, func: DocFunction) -> str:
+    def link(self, func: FrozenFunction) -> str:
         return f'[{func.name}](#{func.name})'
 
-    def render(self, func: DocFunction) -> str:
-        s = '\n'
-        s += f'## {func.name} \n'
-        s += f'`{func.name} {func.signature}`\n\n'
+    def render(self, func: FrozenFunction, module: FrozenModule = None, page: str = '') -> str:
+        f = StringIO()
+        self.write(func, f, module, page)
+        return f.getvalue()
+
+    def write(self, func: FrozenFunction, f: TextIO, module: FrozenModule = None, page: str = ''):
+        '''
+        Writes the function docs. The `module` and the `page` it is rendered in are
+        needed for linking the types.
+        '''
+        f.write('\n')
+        f.write(f'## {func.name} \n')
+        f.write(f'`{func.name} {func.signature}`\n\n')
+        if self.symbols and module:
+            links = self.symbols.link_types(func.signature, module, page)
+            if links:
+                f.write(f'Types: {", ".join(links)} \n\n')
         if func.doc:
             doc = reindent(func.doc) if self.config[Options.REINDENT_DOCS] else func.doc
-            s += f'{doc} \n'
-        return s
+            f.write(f'{doc} \n')
@@ -5,48 +5,97 @@ Responsible for Rendering the markdown files.
 '''
 
 import os
-from typing import Tuple, List
-from ..constants import README, OUTPUT_EXT
+import time
+import logging
+from io import StringIO
+from collections import Counter
+from typing import Tuple, List, TextIO
+from ..constants import README, OUTPUT_EXT, SEARCH_INDEX_FILENAME
 from ..builder import DocNode
 from ..build_config import Configuration, Options
-from ..doc_types import DocClass, DocFunction, DocModule
+from ..doc_types import FrozenClass, FrozenFunction, FrozenModule
+from ..search import SearchIndex
+from ..sinks import get_sink
+from ..symbols import SymbolIndex
 from ..utils import read_file, reindent
 from .class_renderer import ClassRenderer
 from .function_renderer import FunctionRenderer
+from .fragments import FragmentCache, PageFragments
+
+logger = logging.getLogger(__name__)
 
 
 class MdRenderer:
     ''' Markdown renderer class '''
-    def __init__(self, config: Configuration, rootpath: str):
+    def __init__(self, config: Configuration, symbols: SymbolIndex = None, sink=None):
         '''
-        constructor
+        constructor. The `symbols` are required for the `link_*` options.
+        The renderer is shared by all the roots (each node knows its root).
+        The pages are written to the `sink` (of the configuration by default).
         '''
         self.config = config
-        self.rootpath = rootpath
+        self.realroots = {}
+        self.symbols = symbols if config[Options.LINK_RELATIVE_IMPORTS] else None
         self.header = read_file(config[Options.HEADER_FILE])
         self.footer = read_file(config[Options.FOOTER_FILE])
         self.out_dir = config[Options.OUTPUT_DIRECTORY]
-        self.class_renderer = ClassRenderer(config)
-        self.function_renderer = FunctionRenderer(config)
-
-    def render(self, node: DocNode):
-        path = os.path.join(self.out_dir, node.target)
-        dir_name = os.path.dirname(path)
-        os.makedirs(dir_name, exist_ok=True)
-        print('rendering', path)
-        with open(path, 'w') as f:
-            f.write(self.header)
-            if self.config[Options.MODULE_NAME_HEADING]:
-                name = ".".join(node.name)
-                if not name:
-                    name = node.package
-                f.write(f'# {name} \n')
-            if node.module.doc:
-                f.write(node.module.doc)
-                f.write('\n---\n')
-            f.write(self.get_substructure(node))
-            f.write(self.get_module_elements(node))
-            f.write(self.footer)
+        self.sink = sink or get_sink(config)
+        type_symbols = symbols if config[Options.LINK_TYPES] else None
+        self.class_renderer = ClassRenderer(config, type_symbols)
+        self.function_renderer = FunctionRenderer(config, type_symbols)
+        self.fragments = FragmentCache(config)
+        self.search = SearchIndex(config, self.sink) if config[Options.GENERATE_SEARCH_INDEX] else None
+        self.stats = Counter()
+        self.timings = {}
+
+    def render(self, node: DocNode) -> bool:
+        '''
+        Renders the page of the node into the sink (prepared for it).
+        Returns True if the page was written.
+        '''
+        start = time.perf_counter()
+        with self.sink.open(node.target) as f:
+            fragments = self.fragments.open(node.target, self.sink)
+            if fragments is None:
+                self.write_page(node, f)
+            else:
+                with fragments:
+                    self.write_page(node, f, fragments)
+        elapsed = time.perf_counter() - start
+        self.timings[node.target] = {'render': elapsed - f.elapsed, 'write': f.elapsed}
+        if f.written:
+            logger.debug('rendering %s', os.path.join(self.out_dir, node.target))
+        return f.written
+
+    def save(self, targets: List[str]):
+        '''
+        Saves the fragments and the search index of the pages of the build and
+        finishes the sink.
+        '''
+        self.fragments.save(targets)
+        if self.search:
+            self.search.save(targets)
+            targets = targets + [SEARCH_INDEX_FILENAME]
+        self.sink.close(targets)
+
+    def get_page(self, node: DocNode) -> str:
+        f = StringIO()
+        self.write_page(node, f)
+        return f.getvalue()
+
+    def write_page(self, node: DocNode, f: TextIO, fragments: PageFragments = None):
+        f.write(self.header)
+        if self.config[Options.MODULE_NAME_HEADING]:
+            name = ".".join(node.name)
+            if not name:
+                name = node.package
+            f.write(f'# {name} \n')
+        if node.module.doc:
+            f.write(node.module.doc)
+            f.write('\n---\n')
+        self.write_substructure(node, f)
+        self.write_module_elements(node, f, fragments)
+        f.write(self.footer)
 
     def get_files_and_folders(self, node: DocNode) -> Tuple[List, List]:
         files, folders = [], []
@@ -64,18 +113,30 @@ class MdRenderer:
         else:
             return f'[{name}]({name}/{README}{OUTPUT_EXT})'
 
-    def get_substructure(self, node: DocNode) -> str:
+    def write_substructure(self, node: DocNode, f: TextIO):
         files, folders = self.get_files_and_folders(node)
-        s = ''
         if folders:
-            rows = '\n'.join(['* ' + self.get_link(x[1]) for x in folders])
-            s += f'\nFolders: \n{rows}\n'
+            f.write('\nFolders: \n')
+            f.write('\n'.join(['* ' + self.get_link(x[1]) for x in folders]))
+            f.write('\n')
         if files:
-            rows = '\n'.join(['* ' + self.get_link(x[1]) for x in files])
-            s += f'\nFiles: \n{rows}\n'
-        return s
+            f.write('\nFiles: \n')
+            f.write('\n'.join(['* ' + self.get_link(x[1]) for x in files]))
+            f.write('\n')
+
+    def is_internal(self, filepath: str, root: str) -> bool:
+        '''
+        Checks if the (resolved) file of an import is inside the documented root.
+        '''
+        if not filepath or not root:
+            return False
+        if root not in self.realroots:
+            self.realroots[root] = os.path.realpath(root)
+        realroot = self.realroots[root]
+        filepath = os.path.realpath(filepath)
+        return filepath == realroot or filepath.startswith(realroot + os.path.sep)
 
-    def get_import_group(self, all_imports: dict) -> dict:
+    def get_import_group(self, all_imports: dict, root: str) -> dict:
         imports = {}
         for k, (v, f) in all_imports.items():
             if v in imports:
@@ -86,88 +147,122 @@ class MdRenderer:
         for h, i in imports.items():
             relative, items = False, []
             for o, f in i:
-                if self.rootpath in f:
+                if self.is_internal(f, root):
                     relative = True
                 items.append(o)
             if relative:
                 filtered[h] = items
         return filtered
 
-    def get_module_import_list(self, module: DocModule) -> str:
-        imports = self.get_import_group(module.imports).items()
-        if not imports or not self.config[Options.SHOW_RELATIVE_IMPORTS]:
-            return ''
-        s = '\nDependencies: \n'
+    def write_module_import_list(self, node: DocNode, f: TextIO):
+        if not self.config[Options.SHOW_RELATIVE_IMPORTS]:
+            return
+        module = node.module
+        imports = self.get_import_group(module.imports, node.root).items()
+        if not imports:
+            return
+        f.write('\nDependencies: \n')
         for k, v in imports:
+            if self.symbols:
+                v = [self.symbols.link_import(i, module, node.target) for i in v]
             if not k:
                 for i in v:
-                    s += f'* import {i} \n'
+                    f.write(f'* import {i} \n')
             else:
-                s += f'* from {k} import {", ".join(v)} \n'
-        return s
+                f.write(f'* from {k} import {", ".join(v)} \n')
 
-    def get_module_global_list(self, module: DocModule) -> str:
-        variables = module.globals
-        if not variables or not self.config[Options.SHOW_MODULE_VARIABLES]:
-            return ''
-        s = '\nGlobals:  \n'
-        for _, expr in variables:
-            s += f'*   ```py\n{reindent(expr, 4)}\n    ``` \n'
-        return s
+    def write_module_global_list(self, module: FrozenModule, f: TextIO):
+        if not self.config[Options.SHOW_MODULE_VARIABLES] or not module.globals:
+            return
+        f.write('\nGlobals:  \n')
+        for _, expr in module.globals:
+            f.write(f'*   ```py\n{reindent(expr, 4)}\n    ``` \n')
 
-    def get_module_function_list(self, module: DocModule) -> List[DocFunction]:
-        if not module.functions or not self.config[Options.SHOW_MODULE_FUNCTIONS]:
+    def get_module_function_list(self, module: FrozenModule) -> List[FrozenFunction]:
+        if not self.config[Options.SHOW_MODULE_FUNCTIONS] or not module.functions:
             return []
-        order = dict(zip(module.function_order, range(len(module.function_order))))
         if self.config[Options.KEEP_MODULE_FUNCTION_ORDER]:
+            order = dict(zip(module.function_order, range(len(module.function_order))))
             return sorted(module.functions, key=lambda x: order[x.name])
         else:
             return sorted(module.functions, key=lambda x: x.name)
 
-    def render_module_functions(self, functions: List[DocFunction], preview: bool=False) -> str:
-        s = '\nFunctions: \n' if preview and functions else ''
+    def get_fragment_context(self, node: DocNode) -> str:
+        '''
+        Everything (besides the symbol itself) the fragments of the page depend on:
+        nothing, unless the types are linked.
+        '''
+        symbols = self.function_renderer.symbols
+        if not symbols:
+            return ''
+        imports = repr(sorted(node.module.imports.items()))
+        return f'{node.target}\n{node.module.name}\n{imports}\n{symbols.digest}\n'
+
+    def write_fragment(self, renderer, obj, node: DocNode, f: TextIO, fragments: PageFragments, context: str):
+        '''
+        Writes the rendered function or class, from the previous page if it is unchanged.
+        '''
+        if fragments is None:
+            renderer.write(obj, f, node.module, node.target)
+        else:
+            key = FragmentCache.get_key(obj, context)
+            fragments.write(key, f, lambda: renderer.render(obj, node.module, node.target))
+
+    def write_module_functions(self, node: DocNode, functions: List[FrozenFunction], f: TextIO,
+                               preview: bool=False, fragments: PageFragments = None, context: str = ''):
+        if preview and functions:
+            f.write('\nFunctions: \n')
         for func in functions:
             if preview:
-                s += f'* {self.function_renderer.link(func)} \n'
+                f.write(f'* {self.function_renderer.link(func)} \n')
             else:
-                s += self.function_renderer.render(func)
-                s += self.br()
-        return s
+                self.write_fragment(self.function_renderer, func, node, f, fragments, context)
+                f.write(self.br())
 
-    def get_module_class_list(self, module: DocModule) -> List[DocClass]:
-        if not module.classes or not self.config[Options.SHOW_MODULE_CLASSES]:
+    def get_module_class_list(self, module: FrozenModule) -> List[FrozenClass]:
+        if not self.config[Options.SHOW_MODULE_CLASSES] or not module.classes:
             return []
-        classes = [x[0] for x in module.class_order]
-        order = dict(zip(classes, range(len(classes))))
         if self.config[Options.KEEP_MODULE_CLASS_ORDER]:
+            classes = [x[0] for x in module.class_order]
+            order = dict(zip(classes, range(len(classes))))
             return sorted(module.classes, key=lambda x: order[x.name])
         else:
             return sorted(module.classes, key=lambda x: x.name)
 
-    def render_module_classes(self, classes: DocClass, preview: bool=False) -> str:
-        s = '\nClasses: \n' if preview and classes else ''
+    def write_module_classes(self, node: DocNode, classes: List[FrozenClass], f: TextIO,
+                             preview: bool=False, fragments: PageFragments = None, context: str = ''):
+        if preview and classes:
+            f.write('\nClasses: \n')
         for cls in classes:
             if preview:
-                s += f'* {self.class_renderer.link(cls)} \n'
+                f.write(f'* {self.class_renderer.link(cls)} \n')
             else:
-                s += self.class_renderer.render(cls)
-                s += self.br()
-        return s
+                self.write_fragment(self.class_renderer, cls, node, f, fragments, context)
+                f.write(self.br())
 
     def br(self) -> str:
         if self.config[Options.ADD_COMPONENT_LINEBREAKS]:
             return '\n---\n'
         return ''
 
-    def get_module_elements(self, node: DocNode) -> str:
+    def write_module_elements(self, node: DocNode, f: TextIO, fragments: PageFragments = None):
         functions = self.get_module_function_list(node.module)
         classes = self.get_module_class_list(node.module)
-        s = ''
-        s += self.get_module_import_list(node.module)
-        s += self.get_module_global_list(node.module)
-        s += self.render_module_functions(functions, preview=True)
-        s += self.render_module_classes(classes, preview=True)
-        s += self.br()
-        s += self.render_module_functions(functions, preview=False)
-        s += self.render_module_classes(classes, preview=False)
-        return s
+        self.write_module_import_list(node, f)
+        self.write_module_global_list(node.module, f)
+        self.write_module_functions(node, functions, f, preview=True)
+        self.write_module_classes(node, classes, f, preview=True)
+        f.write(self.br())
+        context = self.get_fragment_context(node) if fragments is not None and (functions or classes) else ''
+        self.write_module_functions(node, functions, f, preview=False, fragments=fragments, context=context)
+        self.write_module_classes(node, classes, f, preview=False, fragments=fragments, context=context)
+        if self.search:
+            self.search.add(node, functions, classes)
+
+    def index(self, node: DocNode):
+        '''
+        Records the search entries of a page which is not rendered here (e.g. merged from a shard).
+        '''
+        if self.search:
+            module = node.module
+            self.search.add(node, self.get_module_function_list(module), self.get_module_class_list(module))
@@ -1,14 +1,45 @@
 '''
-This is the entry point for the commands. Currently, it supports three sub-commands: init, build, and clean.
+This is the entry point for the commands. Currently, it supports seven sub-commands: init, build, merge, extract, render, watch, and clean.
 '''
 
 import os
-from .constants import PROGRAM_NAME, VERSION, DEFAULT_CONFIG_FILENAME
+import sys
+import logging
+from .constants import PROGRAM_NAME, DEFAULT_CONFIG_FILENAME, DOC_TREE_FILENAME, get_version
 from .build_config import BUILD_CONFIG, Options
-from .builder import DocBuilder
-from .renderer.renderer import MdRenderer
-from .generator import Generator
-from argparse import ArgumentParser, RawTextHelpFormatter
+from argparse import Action, ArgumentParser, ArgumentTypeError, RawTextHelpFormatter, SUPPRESS
+
+# The implementations of the commands are imported when they are run, so the
+# startup (e.g. of `code2doc -h`) only pays for the argument parsing.
+
+logger = logging.getLogger(PROGRAM_NAME)
+
+
+class VersionAction(Action):
+    ''' Prints the version (read only when asked for) and exits '''
+    def __init__(self, option_strings, dest=SUPPRESS, default=SUPPRESS, help=None):
+        super().__init__(option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.exit(message=f'{PROGRAM_NAME} {get_version()}\n')
+
+
+def parse_shard(value: str) -> tuple:
+    '''
+    Parses the `i/N` value of --shard (1 <= i <= N) into the (0 based) shard index and the count.
+    '''
+    try:
+        index, count = [int(x) for x in value.split('/')]
+    except ValueError:
+        index = count = 0
+    if not 1 <= index <= count:
+        raise ArgumentTypeError(f'expected i/N with 1 <= i <= N, got `{value}`')
+    return index - 1, count
+
+
+def add_logging_arguments(parser):
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every generated file (debug messages)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='log only the warnings and errors')
 
 
 def main():
@@ -17,9 +48,10 @@ def main():
     '''
     parser = ArgumentParser(
         PROGRAM_NAME,
-        description=f'Version {VERSION}\n' + __doc__,
+        description=__doc__,
         formatter_class=RawTextHelpFormatter,
         epilog='Check out individual command\'s help using code2doc <command> -h\n')
+    parser.add_argument('-V', '--version', action=VersionAction, help='show the version and exit')
 
     subparser = parser.add_subparsers(
         title='commands',
@@ -31,6 +63,7 @@ def main():
         formatter_class=RawTextHelpFormatter,
         help=f'create or override the default config file ({DEFAULT_CONFIG_FILENAME})')
     BUILD_CONFIG.add_arguments(init_parser)
+    add_logging_arguments(init_parser)
     init_parser.set_defaults(func=init)
 
     build_parser = subparser.add_parser(
@@ -39,20 +72,84 @@ def main():
         formatter_class=RawTextHelpFormatter,
         help='builds the markdown documentation')
     BUILD_CONFIG.add_arguments(build_parser)
+    add_logging_arguments(build_parser)
+    build_parser.add_argument(
+        '--timings', nargs='?', type=int, const=10, default=0, metavar='N',
+        help='report the time of the build phases and of the N slowest modules (default 10)')
+    build_parser.add_argument('--report', default='', metavar='PATH', help='write a JSON build report')
+    build_parser.add_argument(
+        '--since', default='', metavar='REV',
+        help='only rebuild the pages affected by the files changed since the git revision')
+    build_parser.add_argument('--profile', default='', metavar='PATH', help='dump the cProfile stats of the build')
+    build_parser.add_argument(
+        '--shard', type=parse_shard, default=None, metavar='i/N',
+        help='only build the shard i of N of the modules (combine the shards with merge)')
     build_parser.set_defaults(func=build)
 
+    merge_parser = subparser.add_parser(
+        'merge',
+        description=merge.__doc__,
+        formatter_class=RawTextHelpFormatter,
+        help='merges the outputs of the sharded builds')
+    BUILD_CONFIG.add_arguments(merge_parser)
+    add_logging_arguments(merge_parser)
+    merge_parser.add_argument('shards', nargs='+', metavar='SHARD_DIR', help='output directories of the shards')
+    merge_parser.set_defaults(func=merge)
+
+    extract_parser = subparser.add_parser(
+        'extract',
+        description=extract.__doc__,
+        formatter_class=RawTextHelpFormatter,
+        help='extracts the documentation into a doc tree file (without rendering it)')
+    BUILD_CONFIG.add_arguments(extract_parser)
+    add_logging_arguments(extract_parser)
+    extract_parser.add_argument(
+        'tree', nargs='?', default=DOC_TREE_FILENAME, help=f'doc tree file to write (default {DOC_TREE_FILENAME})')
+    extract_parser.set_defaults(func=extract)
+
+    render_parser = subparser.add_parser(
+        'render',
+        description=render.__doc__,
+        formatter_class=RawTextHelpFormatter,
+        help='renders the markdown documentation from a doc tree file')
+    BUILD_CONFIG.add_arguments(render_parser)
+    add_logging_arguments(render_parser)
+    render_parser.add_argument(
+        'tree', nargs='?', default=DOC_TREE_FILENAME, help=f'doc tree file to read (default {DOC_TREE_FILENAME})')
+    render_parser.set_defaults(func=render)
+
+    watch_parser = subparser.add_parser(
+        'watch',
+        description=watch.__doc__,
+        formatter_class=RawTextHelpFormatter,
+        help='builds the docs and rebuilds them whenever the source changes')
+    BUILD_CONFIG.add_arguments(watch_parser)
+    add_logging_arguments(watch_parser)
+    watch_parser.add_argument('--poll', action='store_true', help='poll the files instead of using inotify')
+    watch_parser.set_defaults(func=watch)
+
     clean_parser = subparser.add_parser(
         'clean',
         description=clean.__doc__,
         formatter_class=RawTextHelpFormatter,
         help='removes the generated markdowns in the output directory')
+    add_logging_arguments(clean_parser)
     clean_parser.set_defaults(func=clean)
 
     args = parser.parse_args()
-    if hasattr(args, 'func'):
-        return args.func(args)
-    else:
+    if not hasattr(args, 'func'):
         parser.print_help()
+        return
+    level = logging.DEBUG if args.verbose else logging.WARNING if args.quiet else logging.INFO
+    logging.basicConfig(format='%(levelname)s: %(message)s', level=level)
+    if getattr(args, 'profile', ''):
+        import cProfile
+        profiler = cProfile.Profile()
+        result = profiler.runcall(args.func, args)
+        profiler.dump_stats(args.profile)
+        logger.info('profile written to %s', args.profile)
+        return result
+    return args.func(args)
 
 
 def get_config_path():
@@ -74,18 +171,28 @@ def init(args):
 
 def clean(args):
     '''
-    Removes all the doc file(s) created by the config file. It also remove
-    all the empty folders in its sub-directories.
+    Removes all the doc file(s) created by the builds, as recorded in the manifest
+    of the output directory. It also remove all the folders which became empty.
+    Without a manifest, the modules of the config file are walked (not imported)
+    to find the docs (and the configured archive is removed).
     '''
+    from .builder import DocProject
+    from .cache import read_manifest, remove_outputs
+    from .generator import Generator
+    from .renderer.renderer import MdRenderer
     config = BUILD_CONFIG
     config.load(get_config_path())
-    print(config[Options.OUTPUT_DIRECTORY])
-    for module_path in config[Options.MODULES]:
-        builder = DocBuilder(module_path, config)
-        print(builder.tree)
-        renderer = MdRenderer(config, builder.abspath)
-        print(renderer)
-        Generator(builder, renderer, config).remove()
+    out_dir = config[Options.OUTPUT_DIRECTORY]
+    manifest = read_manifest(out_dir)
+    if manifest is not None:
+        files, dirs = remove_outputs(out_dir, manifest)
+        logger.info('removed: %d file(s), %d folder(s)', files, dirs)
+        return
+    logger.warning('no manifest in `%s`, looking for the docs of the modules', out_dir)
+    project = DocProject(config, extract=False)
+    Generator(project, MdRenderer(config), config).remove()
+    archive = config[Options.OUTPUT_ARCHIVE]
+    remove_outputs(out_dir, {'archive': archive if archive != '-' else ''})
 
 
 def build(args):
@@ -95,17 +202,264 @@ def build(args):
 
     Preference is:  
     command-line args > code2doc.ini > default command-line args
+
+    With --since <rev> only the pages of the modules changed since the git revision,
+    of the modules importing them and of their directories are rebuilt.
+
+    With --shard i/N only the shard i of N of the modules (balanced by source size) is
+    built, on its own machine, into its output directory. The merge command combines
+    the outputs of the N shards.
+    '''
+    from .builder import DocProject
+    from .cache import BuildCache
+    from .changes import get_changed_files
+    from .generator import Generator
+    from .renderer.renderer import MdRenderer
+    from .symbols import build_symbols
+    from .timings import BuildTimings
+    config = BUILD_CONFIG
+    config.load(get_config_path())
+    config.parse(args)
+    sink = open_sink(config)
+    if sink is None:
+        return 1
+    if args.since and sink.stream:
+        logger.error('--since can not be used with a stream, it would only contain the rebuilt pages')
+        return 1
+    if args.shard:
+        return build_shard(args, config, sink)
+    timings = BuildTimings()
+    manifest = BuildCache(config, sink)
+    cache = manifest if config[Options.BUILD_CACHE] else None
+    project = DocProject(config, cache, extract=not args.since)
+    removed = None
+    if args.since:
+        try:
+            changed = get_changed_files(args.since, [b.abspath for b in project.builders])
+        except (OSError, ValueError) as e:
+            logger.error('cannot list the changes since `%s`: %s', args.since, e)
+            return 1
+        logger.info('changed since %s: %d file(s)', args.since, len(changed))
+        removed = project.select(changed, sink)
+    timings.phases.update(project.timings)
+    with timings.phase('symbols'):
+        symbols = build_symbols(config, project)
+    renderer = MdRenderer(config, symbols, sink)
+    generator = Generator(project, renderer, config)
+    with timings.phase('rendering'):
+        generator.generate()
+    timings.add(project, renderer)
+    stats = renderer.stats
+    errors = project.errors + generator.errors
+    with timings.phase('finishing'):
+        if removed is not None:
+            removed = [t for t in removed if sink.remove(t)]
+        elif cache:
+            removed = cache.remove_stale()
+        for target in removed or []:
+            logger.debug('removed %s', target)
+            stats['removed'] += 1
+        if cache:
+            if symbols:
+                symbols.save()
+        renderer.save([n.target for n in project.get_nodes()])
+        manifest.save(project.get_outputs(sink))
+    logger.info('written: %d, unchanged: %d, removed: %d', stats['written'], stats['unchanged'], stats['removed'])
+    if args.timings:
+        timings.report(args.timings)
+    if args.report:
+        timings.save(args.report, stats, [target for target, _ in errors])
+    return report_errors(errors)
+
+
+def build_shard(args, config, sink) -> int:
+    '''
+    Builds a shard: extracts its modules and renders their pages into the output
+    directory, with the shard tree read by the merge command. The directory pages
+    (and, with the `link_*` options, all the pages) need the whole project, so they
+    are rendered by the merge. The modules are always extracted (the tree needs them).
+    '''
+    from .builder import DocProject
+    from .cache import BuildCache
+    from .constants import SHARD_TREE_FILENAME
+    from .doc_tree import save_tree
+    from .generator import Generator
+    from .renderer.renderer import MdRenderer
+    if args.since:
+        logger.error('--since can not be used with --shard')
+        return 1
+    if sink.archive:
+        logger.error('a shard is built into an output directory (merge the shards into the archive)')
+        return 1
+    index, count = args.shard
+    project = DocProject(config, extract=False)
+    nodes = project.shard(index, count)
+    pages = not config[Options.LINK_TYPES] and not config[Options.LINK_RELATIVE_IMPORTS]
+    renderer = MdRenderer(config, None, sink)
+    generator = Generator(project, renderer, config)
+    if pages:
+        generator.generate([n for n in nodes if n.is_file])
+    out_dir = config[Options.OUTPUT_DIRECTORY]
+    os.makedirs(out_dir, exist_ok=True)
+    save_tree(os.path.join(out_dir, SHARD_TREE_FILENAME), project, {'shard': index, 'shards': count, 'pages': pages})
+    BuildCache(config, sink).save(sink.get_outputs([n.target for n in nodes]))
+    stats = renderer.stats
+    logger.info('shard %d/%d: %d module(s), written: %d, unchanged: %d',
+                index + 1, count, len(nodes), stats['written'], stats['unchanged'])
+    return report_errors(project.errors + generator.errors)
+
+
+def open_sink(config):
+    '''
+    Returns the sink of the pages for the configuration (None, logging the error, if invalid).
+    '''
+    from .sinks import get_sink
+    try:
+        return get_sink(config)
+    except ValueError as e:
+        logger.error('%s', e)
+
+
+def report_errors(errors: list, action: str = 'build') -> int:
+    '''
+    Logs the modules that failed. Returns the exit code.
+    '''
+    if errors:
+        targets = '\n'.join(['  ' + target for target, _ in errors])
+        logger.error('failed to %s %d module(s):\n%s', action, len(errors), targets)
+        return 1
+
+
+def merge(args):
+    '''
+    Merges the output directories of the N shards of a build (build --shard i/N) into
+    the output of the configuration, as a single build would have written it: the
+    pages of the shards are copied and the directory pages (and the search index) are
+    rendered from the shard trees. Nothing is imported or parsed.
+    '''
+    from .cache import BuildCache
+    from .constants import SHARD_TREE_FILENAME
+    from .doc_tree import DocTree, merge_shards
+    from .generator import Generator
+    from .renderer.renderer import MdRenderer
+    from .symbols import build_symbols
+    config = BUILD_CONFIG
+    config.load(get_config_path())
+    config.parse(args)
+    sink = open_sink(config)
+    if sink is None:
+        return 1
+    try:
+        trees = [DocTree(os.path.join(d, SHARD_TREE_FILENAME), config) for d in args.shards]
+        owners = merge_shards(trees)
+    except (OSError, ValueError) as e:
+        logger.error('cannot merge the shards: %s', e)
+        return 1
+    tree, shards = trees[0], dict(zip([id(t) for t in trees], args.shards))
+    symbols = build_symbols(config, tree)
+    renderer = MdRenderer(config, symbols, sink)
+    stats = renderer.stats
+    render, copy = [], []
+    for node, owner in zip(tree.get_nodes(), owners):
+        if not node.module:
+            continue
+        if not node.is_file or not owner.header['pages'] or symbols:
+            render.append(node)
+        elif os.path.isfile(os.path.join(shards[id(owner)], node.target)):
+            copy.append((node, os.path.join(shards[id(owner)], node.target)))
+    sink.prepare([node.target for node, _ in copy])
+    for node, path in copy:
+        with open(path, encoding='utf-8') as page, sink.open(node.target) as f:
+            f.write(page.read())
+        stats['written' if f.written else 'unchanged'] += 1
+        renderer.index(node)
+    generator = Generator(tree, renderer, config)
+    generator.generate(render)
+    if symbols:
+        symbols.save()
+    renderer.save([n.target for n in tree.get_nodes()])
+    BuildCache(config, sink).save(tree.get_outputs(sink))
+    if tree.errors:
+        logger.warning('%d module(s) of the shards failed to extract', len(tree.errors))
+    logger.info('merged %d shard(s), written: %d, unchanged: %d', len(trees), stats['written'], stats['unchanged'])
+    return report_errors(generator.errors, 'merge')
+
+
+def extract(args):
+    '''
+    Extracts the documentation of the modules into a doc tree file, without
+    rendering it. All the documentation is extracted (whatever the render options
+    are), so the tree can be rendered with any options by the render command.
+    Only the options selecting and extracting the modules are used.
+    '''
+    from .builder import DocProject
+    from .doc_tree import save_tree
+    config = BUILD_CONFIG
+    config.load(get_config_path())
+    config.parse(args)
+    project = DocProject(config, extract=False)
+    project.fields = None
+    project.extract()
+    save_tree(args.tree, project)
+    modules = len([n for n in project.get_nodes() if n.module])
+    logger.info('extracted: %d module(s) into `%s`', modules, args.tree)
+    return report_errors(project.errors, 'extract')
+
+
+def render(args):
+    '''
+    Renders the markdown documentation from a doc tree file written by the extract
+    command. Nothing is imported or parsed, only the render options are used.
+    '''
+    from .cache import BuildCache
+    from .doc_tree import DocTree
+    from .generator import Generator
+    from .renderer.renderer import MdRenderer
+    from .symbols import build_symbols
+    config = BUILD_CONFIG
+    config.load(get_config_path())
+    config.parse(args)
+    sink = open_sink(config)
+    if sink is None:
+        return 1
+    try:
+        tree = DocTree(args.tree, config)
+    except (OSError, ValueError) as e:
+        logger.error('cannot read the doc tree: %s', e)
+        return 1
+    if tree.errors:
+        logger.warning('%d module(s) of the doc tree failed to extract', len(tree.errors))
+    symbols = build_symbols(config, tree)
+    renderer = MdRenderer(config, symbols, sink)
+    generator = Generator(tree, renderer, config)
+    generator.generate()
+    if symbols:
+        symbols.save()
+    renderer.save([n.target for n in tree.get_nodes()])
+    BuildCache(config, sink).save(tree.get_outputs(sink))
+    stats = renderer.stats
+    logger.info('written: %d, unchanged: %d, removed: %d', stats['written'], stats['unchanged'], stats['removed'])
+    return report_errors(generator.errors, 'render')
+
+
+def watch(args):
+    '''
+    Builds the docs and keeps watching the modules. Whenever a file is saved only
+    the changed modules (and their parent directory pages) are rebuilt. Options
+    are the same as for the build command.
     '''
+    from .watch import DocWatcher
     config = BUILD_CONFIG
     config.load(get_config_path())
     config.parse(args)
-    for module_path in config[Options.MODULES]:
-        builder = DocBuilder(module_path, config)
-        print(builder.tree)
-        renderer = MdRenderer(config, builder.abspath)
-        print(renderer)
-        Generator(builder, renderer, config).generate()
+    sink = open_sink(config)
+    if sink is None:
+        return 1
+    if sink.stream:
+        logger.error('the docs can not be watched into a stream')
+        return 1
+    DocWatcher(config, sink, poll=args.poll).run()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,122 @@
+'''
+## Search module
+
+Prebuilt search index of the generated docs, so a docs site can search the
+symbols without crawling the pages. It is a compact JSON inverted index: every
+documented module, class, function and method is a document (its page, anchor,
+kind, qualified name, signature and the first line of its docstring) and every
+term of the names, signatures and docstrings maps to the documents containing it.
+
+The entries are collected while the pages are rendered (from the same frozen
+documentation, the pages are never read back). The pages which are not rendered
+again keep their entries of the previous index, which is restored from the file.
+The index is written through the sink of the pages (into the archive if they are bundled).
+'''
+
+import re
+import json
+from typing import Dict, List
+from .build_config import Configuration, Options
+from .constants import get_version, SEARCH_INDEX_FILENAME
+
+FIELDS = ['page', 'anchor', 'kind', 'name', 'signature', 'summary']
+WORD = re.compile(r'[A-Za-z][A-Za-z0-9_]*')
+CAMEL_CASE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z0-9]+')
+
+
+def get_terms(text: str) -> List[str]:
+    '''
+    Returns the (lower case) terms of a text: the words and the parts of the
+    snake_case and CamelCase names. Single letters are skipped.
+    '''
+    terms = set()
+    for word in WORD.findall(text):
+        terms.add(word.lower())
+        for part in word.split('_'):
+            terms.update([p.lower() for p in CAMEL_CASE.findall(part)])
+    return sorted([t for t in terms if len(t) > 1])
+
+
+def get_summary(doc: str) -> str:
+    '''
+    Returns the first non empty line of a docstring.
+    '''
+    for line in (doc or '').splitlines():
+        if line.strip():
+            return line.strip()
+    return ''
+
+
+class SearchIndex:
+    ''' Search entries of the rendered pages '''
+    def __init__(self, config: Configuration, sink):
+        ''' constructor '''
+        self.sink = sink
+        self.show_methods = config[Options.SHOW_CLASS_METHODS]
+        self.pages = {}
+
+    @staticmethod
+    def get_entry(page: str, anchor: str, kind: str, name: str, signature: str, doc: str) -> tuple:
+        '''
+        Returns the document of a symbol with its terms.
+        '''
+        terms = get_terms(' '.join([name, signature, doc or '']))
+        return [page, anchor, kind, name, signature, get_summary(doc)], terms
+
+    def add(self, node, functions: list, classes: list):
+        '''
+        Records the entries of a rendered page: its module and the (rendered) functions and classes.
+        '''
+        module, page = node.module, node.target
+        entries = [SearchIndex.get_entry(page, '', 'module', module.name, '', module.doc)]
+        for func in functions:
+            name = f'{module.name}.{func.name}'
+            entries.append(SearchIndex.get_entry(page, func.name, 'function', name, func.signature, func.doc))
+        for cls in classes:
+            name = f'{module.name}.{cls.name}'
+            entries.append(SearchIndex.get_entry(page, cls.name, 'class', name, '', cls.doc))
+            for _, methods in cls.methods if self.show_methods else []:
+                for method in methods:
+                    entries.append(SearchIndex.get_entry(
+                        page, cls.name, 'method', f'{name}.{method.name}', method.signature, method.doc))
+        self.pages[page] = entries
+
+    def load(self) -> Dict[str, list]:
+        '''
+        Restores the entries of the pages from the previous index (empty if missing or outdated).
+        '''
+        try:
+            index = json.loads(self.sink.read(SEARCH_INDEX_FILENAME) or '{}')
+        except ValueError:
+            return {}
+        if index.get('version') != get_version() or index.get('fields') != FIELDS:
+            return {}
+        terms = [[] for _ in index['docs']]
+        for term, ids in sorted(index['terms'].items()):
+            for i in ids:
+                terms[i].append(term)
+        pages = {}
+        for doc, doc_terms in zip(index['docs'], terms):
+            pages.setdefault(doc[0], []).append((doc, doc_terms))
+        return pages
+
+    def save(self, targets: List[str]):
+        '''
+        Writes the index of the `targets` pages: the rendered ones with their new
+        entries, the others with their previous ones. Nothing is written if nothing
+        was rendered.
+        '''
+        if not self.pages:
+            return
+        previous = self.load() if any(t not in self.pages for t in targets) else {}
+        docs, terms = [], {}
+        for target in sorted(targets):
+            for doc, doc_terms in self.pages.get(target, previous.get(target, [])):
+                for term in doc_terms:
+                    terms.setdefault(term, []).append(len(docs))
+                docs.append(doc)
+        self.pages = {}
+        index = {'version': get_version(), 'fields': FIELDS, 'docs': docs, 'terms': terms}
+        self.sink.prepare([SEARCH_INDEX_FILENAME])
+        with self.sink.open(SEARCH_INDEX_FILENAME) as f:
+            f.write(json.dumps(index, separators=(',', ':'), sort_keys=True))
@@ -0,0 +1,284 @@
+'''
+## Sinks module
+
+Destinations of the generated pages. The renderer writes every page through a
+sink: `FileSink` writes them as files in the output directory and `ArchiveSink`
+appends them to a single zip or tar archive (or streams a tar to the standard
+output) with sequential writes, so a build does not create a file and directory
+per page (which dominates the builds on network or object store filesystems).
+The build cache asks the sink which pages already exist.
+'''
+
+import io
+import os
+import sys
+import time
+import zlib
+import tarfile
+import zipfile
+import threading
+from typing import BinaryIO, Dict, List
+from .build_config import Configuration, Options
+from .utils import OutputFile, remove_output
+
+STREAM = '-'
+ARCHIVE_FORMATS = [('.tar.gz', 'gz'), ('.tgz', 'gz'), ('.tar', ''), ('.zip', 'zip')]
+
+
+def get_archive_format(path: str) -> str:
+    '''
+    Returns the format of an archive from its extension: 'zip', '' (tar) or 'gz' (gzipped tar).
+    '''
+    for ext, fmt in ARCHIVE_FORMATS:
+        if path.lower().endswith(ext):
+            return fmt
+    raise ValueError(f'unsupported archive `{path}` (use .zip, .tar, .tar.gz or - for a tar stream)')
+
+
+def get_sink(config: Configuration):
+    '''
+    Returns the sink of the configured output (the output directory unless an archive is set).
+    '''
+    archive = config[Options.OUTPUT_ARCHIVE]
+    if archive:
+        return ArchiveSink(archive)
+    return FileSink(config[Options.OUTPUT_DIRECTORY])
+
+
+class FileSink:
+    ''' Writes the pages as files in the output directory '''
+    archive = ''
+    stream = False
+
+    def __init__(self, out_dir: str):
+        ''' constructor '''
+        self.out_dir = out_dir
+
+    def get_path(self, target: str) -> str:
+        return os.path.join(self.out_dir, target)
+
+    def prepare(self, targets: List[str]):
+        '''
+        Creates the directories of the pages up front.
+        '''
+        for dir_name in sorted(set([os.path.dirname(self.get_path(t)) for t in targets])):
+            os.makedirs(dir_name, exist_ok=True)
+
+    def open(self, target: str) -> OutputFile:
+        return OutputFile(self.get_path(target))
+
+    def exists(self, target: str) -> bool:
+        return os.path.isfile(self.get_path(target))
+
+    def read(self, target: str) -> str:
+        '''
+        Returns the content of a page (None if it does not exist).
+        '''
+        if not self.exists(target):
+            return None
+        with open(self.get_path(target)) as f:
+            return f.read()
+
+    def open_previous(self, target: str) -> BinaryIO:
+        '''
+        Opens the current content of a page in binary mode (None if it does not exist).
+        '''
+        return open(self.get_path(target), 'rb') if self.exists(target) else None
+
+    def remove(self, target: str) -> bool:
+        return remove_output(self.out_dir, target)
+
+    def get_outputs(self, targets: List[str]) -> List[str]:
+        '''
+        Returns the targets which exist as files in the output directory.
+        '''
+        return [t for t in targets if self.exists(t)]
+
+    def close(self, targets: List[str]):
+        pass
+
+
+class ArchiveMember:
+    '''
+    Page rendered in memory and added to the archive when closed. Like
+    `OutputFile`, `written` tells if it changed, `elapsed` is the time spent
+    writing it and `tell` returns the position in bytes.
+    '''
+    def __init__(self, sink: 'ArchiveSink', target: str):
+        ''' constructor '''
+        self.sink = sink
+        self.target = target
+        self.buffer = []
+        self.size = 0
+        self.written = False
+        self.elapsed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            start = time.perf_counter()
+            self.written = self.sink.add(self.target, b''.join(self.buffer))
+            self.elapsed = time.perf_counter() - start
+        self.buffer = []
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        self.buffer.append(data)
+        self.size += len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+
+class ArchiveSink:
+    '''
+    Writes the pages into a zip or tar archive, or streams a tar to the standard
+    output (`-`). The pages are appended to a temporary archive as they are
+    rendered; on `close` the unchanged pages are copied from the previous archive
+    in one sequential pass and the archive is replaced. A stream has no previous
+    archive, so every page is rendered.
+    '''
+    def __init__(self, path: str):
+        ''' constructor '''
+        self.stream = path == STREAM
+        self.archive = '' if self.stream else os.path.abspath(path)
+        self.format = '' if self.stream else get_archive_format(path)
+        self.tmp = '' if self.stream else os.path.join(
+            os.path.dirname(self.archive), f'.{os.path.basename(self.archive)}.{os.getpid()}.tmp')
+        self.lock = threading.Lock()
+        self.members = None
+        self.added = {}
+        self.out = None
+
+    def load(self) -> Dict[str, int]:
+        '''
+        Returns the checksums (crc32) of the members of the previous archive.
+        '''
+        if self.stream or not os.path.isfile(self.archive):
+            return {}
+        try:
+            if self.format == 'zip':
+                with zipfile.ZipFile(self.archive) as zf:
+                    return {i.filename: i.CRC for i in zf.infolist()}
+            members = {}
+            with tarfile.open(self.archive) as tf:
+                for info in tf:
+                    if info.isfile():
+                        members[info.name] = zlib.crc32(tf.extractfile(info).read())
+            return members
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError):
+            return {}
+
+    def get_members(self) -> Dict[str, int]:
+        if self.members is None:
+            self.members = self.load()
+        return self.members
+
+    def prepare(self, targets: List[str]):
+        pass
+
+    def open(self, target: str) -> ArchiveMember:
+        return ArchiveMember(self, target)
+
+    def exists(self, target: str) -> bool:
+        return target in self.get_members() or target in self.added
+
+    def read_bytes(self, target: str) -> bytes:
+        '''
+        Returns the content of a page of the previous archive (None if it does not exist).
+        '''
+        if target not in self.get_members():
+            return None
+        if self.format == 'zip':
+            with zipfile.ZipFile(self.archive) as zf:
+                return zf.read(target)
+        with tarfile.open(self.archive) as tf:
+            return tf.extractfile(target).read()
+
+    def read(self, target: str) -> str:
+        data = self.read_bytes(target)
+        return None if data is None else data.decode('utf-8')
+
+    def open_previous(self, target: str) -> BinaryIO:
+        data = self.read_bytes(target)
+        return None if data is None else io.BytesIO(data)
+
+    def remove(self, target: str) -> bool:
+        '''
+        Drops a page of the previous archive (it is not copied to the new one).
+        '''
+        return self.get_members().pop(target, None) is not None
+
+    def get_outputs(self, targets: List[str]) -> List[str]:
+        return []
+
+    def start(self):
+        '''
+        Opens the new archive (or the stream) for the sequential writes.
+        '''
+        if self.stream:
+            self.out = tarfile.open(fileobj=sys.stdout.buffer, mode='w|')
+        elif self.format == 'zip':
+            self.out = zipfile.ZipFile(self.tmp, 'w', zipfile.ZIP_DEFLATED)
+        else:
+            self.out = tarfile.open(self.tmp, 'w:' + self.format)
+
+    def write(self, target: str, data: bytes, info=None):
+        if self.format == 'zip':
+            info = info or zipfile.ZipInfo(target, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            self.out.writestr(info, data)
+        else:
+            info = info or tarfile.TarInfo(target)
+            info.size, info.mtime = len(data), info.mtime or int(time.time())
+            self.out.addfile(info, io.BytesIO(data))
+
+    def add(self, target: str, data: bytes) -> bool:
+        '''
+        Appends a page to the new archive. Returns True if it differs from the previous one.
+        '''
+        crc = zlib.crc32(data)
+        with self.lock:
+            if self.out is None:
+                self.start()
+            self.write(target, data)
+            self.added[target] = crc
+            return self.get_members().get(target) != crc
+
+    def close(self, targets: List[str]):
+        '''
+        Finishes the archive of the `targets`: the pages which were not rendered again
+        are copied from the previous archive. Nothing is rewritten if nothing changed.
+        '''
+        with self.lock:
+            members = self.get_members()
+            keep = set([t for t in targets if t in members and t not in self.added])
+            if not self.stream and not self.added and keep == set(members):
+                return
+            if self.out is None:
+                self.start()
+            try:
+                if keep and self.format == 'zip':
+                    with zipfile.ZipFile(self.archive) as zf:
+                        for info in zf.infolist():
+                            if info.filename in keep:
+                                self.write(info.filename, zf.read(info), info)
+                elif keep:
+                    with tarfile.open(self.archive) as tf:
+                        for info in tf:
+                            if info.name in keep:
+                                self.write(info.name, tf.extractfile(info).read(), info)
+                self.out.close()
+            except BaseException:
+                self.out.close()
+                if self.tmp and os.path.isfile(self.tmp):
+                    os.remove(self.tmp)
+                raise
+            finally:
+                self.out = None
+            if not self.stream:
+                os.replace(self.tmp, self.archive)
+            self.members = dict(self.added, **{t: members[t] for t in keep})
+            self.added = {}
@@ -0,0 +1,260 @@
+'''
+## Source module
+
+Reads and parses every source file once per build. All the static information
+(imports, globals, definition order and class variables) is collected from that
+single tree and shared by the extractors in `doc_types`.
+'''
+
+import io
+import os
+import ast
+import tokenize
+from typing import List, Set, Tuple
+
+MAX_DEPTH = 16  # of the re-exports followed to the definition of a name
+
+
+# Todo: Does not required for modern versions of python
+def get_node_range(root: ast.stmt) -> Tuple[int]:
+    '''
+    Returns the (start, end) line numbers spanned by the node.
+    '''
+    if not hasattr(root, 'lineno'):
+        return -1, -1
+    start = end = root.lineno
+    for node in ast.iter_child_nodes(root):
+        _, lineno = get_node_range(node)
+        end = max(end, lineno)
+    return start, end
+
+
+class SourceFile:
+    ''' Parsed source of a single python file '''
+    def __init__(self, path: str):
+        ''' constructor '''
+        self.path = path
+        with open(path) as fh:
+            self.content = fh.read()
+        self.lines = self.content.splitlines(True)
+        self.tree = ast.parse(self.content, path)
+        self.imports = []  # (name, module, level), module is '' for plain imports
+        self.bindings = {}  # bound name: (name, module, level) of its import
+        self.definitions = set()  # names of the functions and classes
+        self.globals = []
+        self.function_order = []
+        self.class_order = []
+        self.class_variables = {}
+        self.collect()
+
+    def get_assignment(self, node: ast.Assign) -> Tuple[list, str]:
+        '''
+        Returns the target names and the source text of an assignment.
+        '''
+        start, end = get_node_range(node)
+        names = [x.id for x in node.targets]
+        return names, ''.join(self.lines[start - 1: end])
+
+    def get_text(self, node: ast.AST) -> str:
+        '''
+        Returns the python expression for the node.
+        '''
+        if hasattr(ast, 'unparse'):
+            return ast.unparse(node)
+        if hasattr(ast, 'get_source_segment'):
+            return ast.get_source_segment(self.content, node)
+        return self.get_segment(node)
+
+    def get_segment(self, node: ast.AST) -> str:
+        '''
+        Returns the source of an expression on the interpreters without the end positions
+        of the nodes (before 3.8): the longest text from the start of the node, up to the
+        last line of its children and ending on a token, which parses back to the same node.
+        '''
+        start, end = get_node_range(node)
+        text = ''
+        if start > 0 and node.col_offset >= 0:
+            first = self.lines[start - 1]
+            offset = len(first.encode('utf-8')[:node.col_offset].decode('utf-8', 'ignore'))
+            text = first[offset:] + ''.join(self.lines[start: end])
+        lines = [0]
+        for line in text.splitlines(True):
+            lines.append(lines[-1] + len(line))
+        ends = []
+        try:
+            for token in tokenize.generate_tokens(io.StringIO(text).readline):
+                row, col = token.end
+                ends.append(lines[row - 1] + col)
+        except (tokenize.TokenError, IndentationError):
+            pass
+        expected = ast.dump(node)
+        for pos in sorted(set(ends), reverse=True):
+            segment = text[:pos].strip()
+            try:
+                if segment and ast.dump(ast.parse(f'({segment})', mode='eval').body) == expected:
+                    return segment
+            except SyntaxError:
+                continue
+        # e.g. the multi-line strings, which are positioned on their last line
+        return repr(ast.literal_eval(node))
+
+    def collect(self):
+        '''
+        Single walk over the top level nodes that fills all the indexes.
+        '''
+        for node in ast.iter_child_nodes(self.tree):
+            if isinstance(node, ast.Import):
+                for n in node.names:
+                    self.imports.append((n.name, '', 0))
+                    head = n.name.split('.')[0]
+                    self.bindings[n.asname or head] = (n.name if n.asname else head, '', 0)
+            elif isinstance(node, ast.ImportFrom):
+                for n in node.names:
+                    self.imports.append((n.name, node.module, node.level))
+                    self.bindings[n.asname or n.name] = (n.name, node.module or '', node.level)
+            elif isinstance(node, ast.Assign):
+                self.globals.append(self.get_assignment(node))
+            elif isinstance(node, ast.FunctionDef):
+                self.function_order.append(node.name)
+                self.definitions.add(node.name)
+            elif isinstance(node, ast.AsyncFunctionDef):
+                self.definitions.add(node.name)
+            elif isinstance(node, ast.ClassDef):
+                self.definitions.add(node.name)
+                functions, variables = [], self.class_variables.setdefault(node.name, [])
+                for cnode in ast.iter_child_nodes(node):
+                    if isinstance(cnode, ast.FunctionDef):
+                        functions.append(cnode.name)
+                    elif isinstance(cnode, ast.Assign):
+                        variables.append(self.get_assignment(cnode))
+                self.class_order.append((node.name, functions))
+
+
+class ImportResolver:
+    '''
+    Resolves the imported names to their source files using only the package layout
+    (nothing is imported). The lookups are cached for the whole build.
+    '''
+    def __init__(self):
+        ''' constructor '''
+        self.modules = {}
+
+    @staticmethod
+    def get_basedir(path: str, name: str) -> str:
+        '''
+        Returns the directory containing the top level package of the module `name`.
+        '''
+        depth = name.count('.') + (os.path.basename(path) == '__init__.py')
+        base = os.path.dirname(os.path.abspath(path))
+        for _ in range(depth):
+            base = os.path.dirname(base)
+        return base
+
+    def find(self, path: str) -> str:
+        '''
+        Returns the real path of the module file for a path (without extension) or ''.
+        '''
+        if path not in self.modules:
+            self.modules[path] = ''
+            for filepath in (os.path.join(path, '__init__.py'), path + '.py'):
+                if os.path.isfile(filepath):
+                    self.modules[path] = os.path.realpath(filepath)
+                    break
+        return self.modules[path]
+
+    @staticmethod
+    def get_candidates(path: str, basedir: str, package: str,
+                       name: str, module: str, level: int) -> List[str]:
+        '''
+        Returns the paths (without extension) where a name imported by the source file
+        `path` is looked for, in order: the submodule then the module (only the module
+        for plain imports). Relative imports are resolved from the location of the
+        source, absolute ones only inside the package (else there are none).
+        '''
+        if level:
+            base = os.path.dirname(os.path.abspath(path))
+            for _ in range(level - 1):
+                base = os.path.dirname(base)
+        elif module == '':
+            parts = name.split('.')
+            return [os.path.join(basedir, *parts)] if parts[0] == package else []
+        elif module.split('.')[0] == package:
+            base = basedir
+        else:
+            return []
+        path = os.path.join(base, *module.split('.')) if module else base
+        return [os.path.join(path, name), path]
+
+    def clear(self):
+        self.modules = {}
+
+
+class SourceIndex:
+    ''' Per-build cache of the parsed source files '''
+    def __init__(self, resolver: ImportResolver = None):
+        ''' constructor '''
+        self.files = {}
+        self.exports = {}  # kept after the release of the parsed sources
+        self.parse_count = 0
+        self.resolver = ImportResolver() if resolver is None else resolver
+
+    def get(self, path: str) -> SourceFile:
+        '''
+        Returns the parsed source for the path. Each file is parsed only once.
+        '''
+        key = os.path.realpath(path)
+        if key not in self.files:
+            source = self.files[key] = SourceFile(path)
+            self.exports[key] = (source.path, source.definitions, source.bindings)
+            self.parse_count += 1
+        return self.files[key]
+
+    def get_exports(self, path: str) -> Tuple[str, Set[str], dict]:
+        '''
+        Returns the path, the defined names and the imported names of a file. Only
+        the files never parsed before are parsed.
+        '''
+        key = os.path.realpath(path)
+        if key not in self.exports:
+            self.get(path)
+        return self.exports[key]
+
+    def resolve(self, path: str, basedir: str, package: str,
+                name: str, module: str, level: int, depth: int = 0) -> str:
+        '''
+        Finds the file of a name imported by the source file `path`, like `getfile(getmodule())`
+        on the imported object: the file of a module, or of the module where a function or
+        a class is defined (following the re-exports). The other names (e.g. the constants)
+        and the names outside the package resolve to ''.
+        '''
+        candidates = ImportResolver.get_candidates(path, basedir, package, name, module, level)
+        for i, candidate in enumerate(candidates):
+            filepath = self.resolver.find(candidate)
+            if not filepath:
+                continue
+            if i == 0 or len(candidates) == 1:
+                return filepath
+            try:
+                source_path, definitions, bindings = self.get_exports(filepath)
+            except (SyntaxError, ValueError, OSError):
+                return filepath
+            if name in definitions:
+                return filepath
+            if name in bindings and depth < MAX_DEPTH:
+                return self.resolve(source_path, basedir, package, *bindings[name], depth + 1)
+            return ''
+        return ''
+
+    def release(self, path: str):
+        '''
+        Drops the parsed source of a file that was extracted (the resolved imports are kept).
+        '''
+        self.files.pop(os.path.realpath(path), None)
+
+    def forget(self, path: str):
+        '''
+        Drops the parsed source of a modified file (and the resolved imports).
+        '''
+        self.files.pop(os.path.realpath(path), None)
+        self.exports.pop(os.path.realpath(path), None)
+        self.resolver.clear()
@@ -0,0 +1,409 @@
+'''
+## Static types module
+
+Import free extraction backend. Builds the same `DocModule`, `DocClass` and
+`DocFunction` data as `doc_types` purely from the source, so the documented
+code (and its dependencies) is never imported.
+
+The output matches the import backend where the source tells enough:
+
+* the classes of the package are qualified by their module in the annotations
+  (following the imports and the re-exports) and the literal default values are
+  shown by their repr,
+* a class without an own `__init__` gets the signature of the one it inherits
+  from its bases in the package,
+* the base of a class is shown by its name and the class variables it defines
+  are not listed again in the subclasses.
+
+It differs where only the runtime knows:
+
+* the annotations naming anything else (e.g. the classes of other packages) and
+  the default values which are not literals are shown as written,
+* a class which inherits its constructor from outside the package gets `()`,
+* a method with another decorator than `staticmethod`, `classmethod` or
+  `property` is listed as a method (the import backend lists it only if the
+  decorator returns a function),
+* only the assignments are listed as static variables (the import backend
+  also lists the properties and the other descriptors, by their repr).
+
+See Also: [doc_types](doc_types.md)
+'''
+
+import io
+import os
+import ast
+import time
+import keyword
+import logging
+import tokenize
+from typing import Dict, List, Set, Tuple
+from collections import defaultdict
+from .doc_types import DocFunction, DocClass, DocModule
+from .source import MAX_DEPTH, SourceFile, SourceIndex, ImportResolver
+from .utils import lazy_property
+
+logger = logging.getLogger(__name__)
+
+
+def get_signature(args: ast.arguments, returns: ast.expr, scope: 'StaticScope', bound: bool = False) -> str:
+    '''
+    Formats the function arguments in the same way as `inspect.Signature`.
+
+    * bound: bool
+        drops the first argument (like `self`/`cls` of a bound method).
+    '''
+    def param(arg: ast.arg, default: ast.expr = None, prefix: str = '') -> str:
+        s = prefix + arg.arg
+        if arg.annotation is not None:
+            s += ': ' + scope.get_annotation(arg.annotation)
+        if default is not None:
+            s += (' = ' if arg.annotation is not None else '=') + scope.get_value(default)
+        return s
+
+    positional = list(getattr(args, 'posonlyargs', [])) + list(args.args)
+    defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+    params = [param(a, d) for a, d in zip(positional, defaults)]
+    if getattr(args, 'posonlyargs', []):
+        params.insert(len(args.posonlyargs), '/')
+    if args.vararg:
+        params.append(param(args.vararg, prefix='*'))
+    elif args.kwonlyargs:
+        params.append('*')
+    params += [param(a, d) for a, d in zip(args.kwonlyargs, args.kw_defaults)]
+    if args.kwarg:
+        params.append(param(args.kwarg, prefix='**'))
+    if bound and positional:
+        params = params[2:] if params[1:2] == ['/'] else params[1:]
+    s = f'({", ".join(params)})'
+    if returns is not None:
+        s += ' -> ' + scope.get_annotation(returns)
+    return s
+
+
+def get_decorator_type(node: ast.FunctionDef) -> str:
+    '''
+    Returns `staticmethod`, `classmethod`, `property` or `function` for a method.
+    '''
+    for decorator in node.decorator_list:
+        if isinstance(decorator, ast.Name) and decorator.id in ('staticmethod', 'classmethod', 'property'):
+            return decorator.id
+        if isinstance(decorator, ast.Attribute) and decorator.attr in ('setter', 'getter', 'deleter'):
+            return 'property'
+    return 'function'
+
+
+def get_definitions(body: List[ast.stmt], kinds: tuple) -> list:
+    '''
+    Returns the last definition of every name (like the runtime) sorted by name.
+    '''
+    definitions = {}
+    for node in body:
+        if isinstance(node, kinds):
+            definitions[node.name] = node
+    return [definitions[name] for name in sorted(definitions)]
+
+
+def get_dotted_name(node: ast.expr) -> List[str]:
+    '''
+    Returns the parts of a dotted name (of a generic for a subscript), [] for the other expressions.
+    '''
+    if isinstance(node, ast.Subscript):
+        node = node.value
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    return [node.id] + parts[::-1] if isinstance(node, ast.Name) else []
+
+
+class StaticScope:
+    '''
+    Names of a parsed module. Finds the classes it defines or imports from the
+    package (following the re-exports, the other modules are parsed on demand),
+    so the annotations are qualified and the constructors are inherited like at
+    runtime.
+    '''
+    def __init__(self, name: str, source: SourceFile, basedir: str, package: str, sources: SourceIndex):
+        ''' constructor '''
+        self.name = name
+        self.source = source
+        self.basedir = os.path.realpath(basedir)
+        self.package = package
+        self.sources = sources
+
+    @lazy_property
+    def classes(self) -> Dict[str, ast.ClassDef]:
+        return {node.name: node for node in get_definitions(self.source.tree.body, (ast.ClassDef, ))}
+
+    def get_scope(self, filepath: str) -> 'StaticScope':
+        '''
+        Returns the scope of another module of the package.
+        '''
+        parts = os.path.splitext(os.path.relpath(filepath, self.basedir))[0].split(os.path.sep)
+        if parts[-1] == '__init__':
+            parts = parts[:-1]
+        return StaticScope('.'.join(parts), self.sources.get(filepath), self.basedir, self.package, self.sources)
+
+    def find_class(self, parts: List[str], depth: int = 0) -> Tuple['StaticScope', ast.ClassDef]:
+        '''
+        Returns the scope and the definition of the class of a dotted name, (None, None)
+        if it is not a class of the package.
+        '''
+        head = parts[0]
+        if len(parts) == 1 and head in self.classes:
+            return self, self.classes[head]
+        if head not in self.source.bindings or depth >= MAX_DEPTH:
+            return None, None
+        name, module, level = self.source.bindings[head]
+        resolver = self.sources.resolver
+        if not module and not level:
+            # `import package.module`: the rest of the name goes down the modules
+            modules, rest = name.split('.') + parts[1:-1], parts[-1:]
+            if len(parts) < 2 or modules[0] != self.package:
+                return None, None
+            filepath = resolver.find(os.path.join(self.basedir, *modules))
+        else:
+            # `from module import name`: the name is a module or a name of the module
+            filepath, rest = '', []
+            candidates = ImportResolver.get_candidates(self.source.path, self.basedir, self.package, name, module, level)
+            for i, path in enumerate(candidates):
+                filepath = resolver.find(path)
+                if filepath:
+                    rest = parts[1:] if i == 0 else [name] + parts[1:]
+                    break
+        if not filepath or not rest:
+            return None, None
+        return self.get_scope(filepath).find_class(rest, depth + 1)
+
+    def get_annotation(self, node: ast.expr) -> str:
+        '''
+        Returns an annotation like `inspect` shows it: the classes of the package are
+        qualified by their module, the other names are kept as written.
+        '''
+        try:
+            return repr(ast.literal_eval(node))
+        except (ValueError, TypeError, SyntaxError):
+            pass
+        text = self.source.get_text(node)
+        try:
+            tokens = list(tokenize.generate_tokens(io.StringIO(text).readline))
+        except (tokenize.TokenError, IndentationError):
+            return text
+        lines = [0]
+        for line in text.splitlines(True):
+            lines.append(lines[-1] + len(line))
+        replacements, i = [], 0
+        while i < len(tokens):
+            token, j = tokens[i], i
+            if token.type == tokenize.NAME and not keyword.iskeyword(token.string) and (
+                    i == 0 or tokens[i - 1].string != '.'):
+                parts = [token.string]
+                while j + 2 < len(tokens) and tokens[j + 1].string == '.' and tokens[j + 2].type == tokenize.NAME:
+                    j += 2
+                    parts.append(tokens[j].string)
+                scope, cls = self.find_class(parts)
+                if cls is not None:
+                    start = lines[token.start[0] - 1] + token.start[1]
+                    end = lines[tokens[j].end[0] - 1] + tokens[j].end[1]
+                    replacements.append((start, end, f'{scope.name}.{cls.name}'))
+            i = j + 1
+        for start, end, name in reversed(replacements):
+            text = text[:start] + name + text[end:]
+        return text
+
+    def get_value(self, node: ast.expr, format=repr) -> str:
+        '''
+        Returns a literal formatted like `inspect` shows it, the other expressions as written.
+        '''
+        try:
+            return format(ast.literal_eval(node))
+        except (ValueError, TypeError, SyntaxError):
+            return self.source.get_text(node)
+
+    def get_base(self, node: ast.ClassDef) -> str:
+        '''
+        Returns the name of the first base of a class (None for `object`).
+        '''
+        if not node.bases:
+            return None
+        parts = get_dotted_name(node.bases[0])
+        base = parts[-1] if parts else self.source.get_text(node.bases[0])
+        return base if base != 'object' else None
+
+    def get_members(self, node: ast.ClassDef, depth: int = 0) -> Set[str]:
+        '''
+        Returns the names defined in a class and in its bases in the package.
+        '''
+        names = set()
+        for cnode in node.body:
+            if isinstance(cnode, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(cnode.name)
+            elif isinstance(cnode, ast.Assign):
+                names.update([t.id for t in cnode.targets if isinstance(t, ast.Name)])
+            elif isinstance(cnode, ast.AnnAssign) and isinstance(cnode.target, ast.Name):
+                names.add(cnode.target.id)
+        for base in node.bases:
+            parts = get_dotted_name(base)
+            scope, cls = self.find_class(parts) if parts and depth < MAX_DEPTH else (None, None)
+            if cls is not None:
+                names |= scope.get_members(cls, depth + 1)
+        return names
+
+    def get_inherited(self, node: ast.ClassDef) -> Set[str]:
+        '''
+        Returns the names which a class inherits from its first base in the package.
+        '''
+        parts = get_dotted_name(node.bases[0]) if node.bases else []
+        scope, cls = self.find_class(parts) if parts else (None, None)
+        return scope.get_members(cls) if cls is not None else set()
+
+    def get_init(self, node: ast.ClassDef, depth: int = 0) -> Tuple['StaticScope', ast.FunctionDef]:
+        '''
+        Returns the `__init__` of a class, inherited from its bases in the package (depth
+        first, which is the method resolution order of the single inheritance).
+        '''
+        for fnode in get_definitions(node.body, (ast.FunctionDef, )):
+            if fnode.name == '__init__':
+                return self, fnode
+        for base in node.bases:
+            parts = get_dotted_name(base)
+            scope, cls = self.find_class(parts) if parts and depth < MAX_DEPTH else (None, None)
+            if cls is not None:
+                scope, init = scope.get_init(cls, depth + 1)
+                if init is not None:
+                    return scope, init
+        return None, None
+
+
+class StaticDocFunction(DocFunction):
+    def __init__(self, node: ast.FunctionDef, scope: StaticScope, ftype='function'):
+        self._node = node
+        self._scope = scope
+        self.name = node.name
+        self.type = ftype
+        self.doc = ast.get_docstring(node, clean=False)
+
+    @lazy_property
+    def signature(self):
+        node = self._node
+        return get_signature(node.args, node.returns, self._scope, bound=self.type == 'classmethod')
+
+    @classmethod
+    def extract_from_class(cls, node: ast.ClassDef, scope: StaticScope) -> Dict[str, 'DocFunction']:
+        '''
+        Extract all the functions form the class definition.
+        '''
+        functions, classmethods = defaultdict(list), []
+        for fnode in get_definitions(node.body, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            function_type = get_decorator_type(fnode)
+            if function_type == 'classmethod':
+                if not fnode.name.startswith('_'):
+                    classmethods.append(cls(fnode, scope, function_type))
+            elif function_type != 'property':
+                functions[function_type].append(cls(fnode, scope, function_type))
+        if classmethods:
+            functions['classmethod'] = classmethods
+        return functions
+
+
+class StaticDocClass(DocClass):
+    def __init__(self, node: ast.ClassDef, scope: StaticScope):
+        self._node = node
+        self._scope = scope
+        self.name = node.name
+        self.doc = ast.get_docstring(node, clean=False)
+        self.base = scope.get_base(node)
+
+    @lazy_property
+    def methods(self):
+        return StaticDocFunction.extract_from_class(self._node, self._scope)
+
+    @lazy_property
+    def statics(self):
+        return StaticDocClass.get_static_members(self._node, self._scope)
+
+    @lazy_property
+    def signature(self):
+        return StaticDocClass.get_class_signature(self._node, self._scope)
+
+    @lazy_property
+    def variables(self):
+        return list(self._scope.source.class_variables.get(self.name, []))
+
+    @staticmethod
+    def get_static_members(node: ast.ClassDef, scope: StaticScope) -> List[Tuple[str, str]]:
+        '''
+        Returns the class variables, except the ones of the base (like the import backend).
+        '''
+        statics, inherited = [], scope.get_inherited(node)
+        for cnode in node.body:
+            if isinstance(cnode, ast.Assign):
+                for target in cnode.targets:
+                    if isinstance(target, ast.Name) and not target.id.startswith('_') and target.id not in inherited:
+                        statics.append((target.id, scope.get_value(cnode.value, str)))
+            elif isinstance(cnode, ast.AnnAssign) and cnode.value is not None:
+                name = cnode.target.id if isinstance(cnode.target, ast.Name) else '_'
+                if not name.startswith('_') and name not in inherited:
+                    statics.append((name, scope.get_value(cnode.value, str)))
+        return sorted(statics)
+
+    @staticmethod
+    def get_class_signature(node: ast.ClassDef, scope: StaticScope) -> str:
+        scope, init = scope.get_init(node)
+        if init is not None:
+            return get_signature(init.args, None, scope, bound=True)
+        return '()'
+
+
+class StaticDocModule(DocModule):
+    def __init__(self, name: str, source: SourceFile, basedir: str, package: str,
+                 sources: SourceIndex = None):
+        self._source = source
+        self._sources = SourceIndex() if sources is None else sources
+        self._basedir = basedir
+        self._package = package
+        self._scope = StaticScope(name, source, basedir, package, self._sources) if source else None
+        self._body = source.tree.body if source else []
+        self.name = name
+        self.doc = ast.get_docstring(source.tree, clean=False) if source else None
+        self.timings = {}
+
+    @lazy_property
+    def imports(self):
+        start = time.perf_counter()
+        imports = StaticDocModule.get_imports(
+            self.name, self._source, self._basedir, self._package, self._sources)
+        self.timings['imports'] = time.perf_counter() - start
+        return imports
+
+    @lazy_property
+    def functions(self):
+        return [
+            StaticDocFunction(node, self._scope)
+            for node in get_definitions(self._body, (ast.FunctionDef, ast.AsyncFunctionDef))]
+
+    @lazy_property
+    def classes(self):
+        return [StaticDocClass(node, self._scope) for node in get_definitions(self._body, (ast.ClassDef, ))]
+
+    @staticmethod
+    def get_imports(name: str, source: SourceFile, basedir: str, package: str,
+                    sources: SourceIndex) -> dict:
+        names = {}
+        if source is None:
+            logger.debug('module "%s" doesn\'t have an __init__ file, module level documentation '
+                         'can be added in the __init__ file', name)
+            return names
+        for imported, from_module, level in source.imports:
+            filepath = sources.resolve(source.path, basedir, package, imported, from_module, level)
+            names[imported] = (from_module, filepath)
+        return names
+
+    @classmethod
+    def from_path(cls, path: str, package: str, name: str = '', sources: SourceIndex = None):
+        if sources is None:
+            sources = SourceIndex()
+        parts = [p for p in name.split('.') if p]
+        filepath = sources.resolver.find(os.path.join(os.path.abspath(path), package, *parts))
+        source = sources.get(filepath) if filepath else None
+        return cls('.'.join([package] + parts), source, os.path.abspath(path), package, sources)
@@ -0,0 +1,196 @@
+'''
+## Symbols module
+
+Project wide symbol table used by the `link_types` and `link_relative_imports`
+options. It is built once per build (after the extraction of all the roots) and
+maps the fully qualified name of every module, class and function to its page
+and anchor, so the renderers can emit the links with constant time lookups.
+
+The table is stored in the output directory and reused by the incremental builds
+for the modules which were not extracted again.
+'''
+
+import os
+import ast
+import json
+import hashlib
+from typing import List
+from .build_config import Configuration, Options
+from .constants import get_version, SYMBOLS_FILENAME
+
+
+def collect_names(node: ast.AST, names: List[str]):
+    '''
+    Collects the (dotted) names of an annotation, including the forward references.
+    '''
+    parts, value = [], node
+    while isinstance(value, ast.Attribute):
+        parts.append(value.attr)
+        value = value.value
+    if isinstance(value, ast.Name):
+        name = '.'.join([value.id] + parts[::-1])
+        if name not in names:
+            names.append(name)
+    elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+        try:
+            collect_names(ast.parse(node.value, mode='eval').body, names)
+        except SyntaxError:
+            pass
+    else:
+        for child in ast.iter_child_nodes(node):
+            collect_names(child, names)
+
+
+def get_annotation_names(signature: str) -> List[str]:
+    '''
+    Returns the (dotted) names used in the annotations of a signature string.
+    Signatures which are not valid python (e.g. with object reprs) have none.
+    '''
+    try:
+        func = ast.parse(f'def _{signature}: pass').body[0]
+    except SyntaxError:
+        return []
+    args = func.args
+    arguments = getattr(args, 'posonlyargs', []) + args.args + args.kwonlyargs
+    arguments += [a for a in (args.vararg, args.kwarg) if a is not None]
+    names = []
+    for annotation in [a.annotation for a in arguments] + [func.returns]:
+        if annotation is not None:
+            collect_names(annotation, names)
+    return names
+
+
+class SymbolIndex:
+    ''' Maps the fully qualified names to the generated pages '''
+    def __init__(self, config: Configuration):
+        ''' constructor '''
+        self.out_dir = config[Options.OUTPUT_DIRECTORY]
+        self.path = os.path.join(self.out_dir, SYMBOLS_FILENAME)
+        self.pages = {}
+        self.symbols = {}
+        self.files = {}
+        if config[Options.BUILD_CACHE] and os.path.isfile(self.path):
+            with open(self.path) as f:
+                try:
+                    index = json.load(f)
+                except ValueError:
+                    index = {}
+            if index.get('version') == get_version():
+                self.pages = index.get('pages', {})
+        self.index()
+
+    @staticmethod
+    def get_page(node) -> dict:
+        '''
+        Returns the symbols defined in the page of an extracted node.
+        '''
+        module = node.module
+        symbols = {module.name: ''}
+        for obj in module.functions + module.classes:
+            symbols[f'{module.name}.{obj.name}'] = obj.name
+        source = os.path.realpath(node.source) if node.source else ''
+        return {'module': module.name, 'source': source, 'symbols': symbols}
+
+    def index(self):
+        '''
+        Rebuilds the lookup tables (and the digest keying the linked fragments) from the pages.
+        '''
+        self.symbols, self.files = {}, {}
+        self.digest = hashlib.sha1(json.dumps(self.pages, sort_keys=True).encode()).hexdigest()
+        for target, page in self.pages.items():
+            for name, anchor in page['symbols'].items():
+                self.symbols[name] = (target, anchor)
+            if page['source']:
+                self.files[page['source']] = page['module']
+
+    def update(self, nodes: list) -> bool:
+        '''
+        Replaces the pages of the extracted nodes. Unchanged (cached) nodes keep their
+        previous entries and the removed ones are dropped. Returns True on any change.
+        '''
+        pages = {}
+        for node in nodes:
+            if node.module:
+                pages[node.target] = SymbolIndex.get_page(node)
+            elif node.target in self.pages:
+                pages[node.target] = self.pages[node.target]
+        changed = pages != self.pages
+        self.pages = pages
+        self.index()
+        return changed
+
+    def save(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({'version': get_version(), 'pages': self.pages}, f, indent=1, sort_keys=True)
+
+    def get_file_module(self, filepath: str) -> str:
+        return self.files.get(os.path.realpath(filepath), '') if filepath else ''
+
+    def resolve(self, name: str, module) -> str:
+        '''
+        Returns the fully qualified name of a (dotted) name used in the module,
+        or '' if it is not documented.
+        '''
+        if name in self.symbols:
+            return name
+        head, _, rest = name.partition('.')
+        local = f'{module.name}.{name}'
+        if local in self.symbols:
+            return local
+        if head in module.imports:
+            imported = self.get_file_module(module.imports[head][1])
+            candidates = [f'{imported}.{name}']
+            if imported.split('.')[-1] == head:
+                candidates.append(imported + ('.' + rest if rest else ''))
+            for candidate in candidates:
+                if imported and candidate in self.symbols:
+                    return candidate
+        return ''
+
+    def link(self, name: str, page: str) -> str:
+        '''
+        Returns the relative link from the page to the symbol.
+        '''
+        target, anchor = self.symbols[name]
+        if target == page and anchor:
+            return f'#{anchor}'
+        path = os.path.relpath(target, os.path.dirname(page) or os.curdir).replace(os.path.sep, '/')
+        return f'{path}#{anchor}' if anchor else path
+
+    def link_import(self, name: str, module, page: str) -> str:
+        '''
+        Returns the markdown link of an imported name (the name itself if unknown).
+        '''
+        imported = self.get_file_module(module.imports[name][1])
+        if not imported:
+            return name
+        symbol = f'{imported}.{name}'
+        if symbol not in self.symbols:
+            symbol = imported
+        return f'[{name}]({self.link(symbol, page)})'
+
+    def link_types(self, signature: str, module, page: str) -> List[str]:
+        '''
+        Returns the markdown links of the documented types in the signature.
+        '''
+        links = []
+        for name in get_annotation_names(signature):
+            symbol = self.resolve(name, module)
+            if symbol:
+                links.append(f'[{name}]({self.link(symbol, page)})')
+        return links
+
+
+def build_symbols(config: Configuration, project) -> SymbolIndex:
+    '''
+    Builds the symbol table of all the roots when any of the `link_*` options is on.
+    If the symbols changed, the unchanged modules are extracted again to update their links.
+    '''
+    if not config[Options.LINK_TYPES] and not config[Options.LINK_RELATIVE_IMPORTS]:
+        return None
+    symbols = SymbolIndex(config)
+    if symbols.update(project.get_nodes()):
+        project.load_cached()
+        symbols.update(project.get_nodes())
+    return symbols
@@ -0,0 +1,96 @@
+'''
+## Timings module
+
+Instrumentation of the builds. Collects the wall time of the build phases and,
+per module, the time spent importing (parsing for the static extractor),
+extracting (with the import resolution), rendering and writing. It is reported
+as a table of the slowest modules and as a JSON build report.
+'''
+
+import json
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from .constants import get_version
+
+logger = logging.getLogger(__name__)
+
+# Per module columns: import, extract (resolve is the part resolving the imports), render, write
+COLUMNS = ['import', 'extract', 'resolve', 'render', 'write']
+
+
+class BuildTimings:
+    ''' Wall times of a build '''
+    def __init__(self):
+        ''' constructor '''
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.modules = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        '''
+        Context manager adding the time spent in the block to the phase.
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def add(self, project, renderer):
+        '''
+        Collects the times of the modules extracted by the project and rendered by the renderer.
+        '''
+        for node in project.get_nodes():
+            times = {}
+            if node.module is not None:
+                times.update(node.module.timings)
+                if 'imports' in times:
+                    times['resolve'] = times.pop('imports')
+            times.update(renderer.timings.get(node.target, {}))
+            if times:
+                self.modules[node.target] = times
+
+    def get_slowest(self, count: int) -> List[Tuple[str, Dict[str, float]]]:
+        '''
+        Returns the `count` modules with the highest total time.
+        '''
+        def total(item):
+            return sum([v for k, v in item[1].items() if k != 'resolve'])
+        return sorted(self.modules.items(), key=total, reverse=True)[:count]
+
+    def report(self, count: int):
+        '''
+        Logs the time of the phases and the slowest modules.
+        '''
+        lines = ['timings (ms):']
+        for name, elapsed in self.phases.items():
+            lines.append(f'  {name:12} {elapsed * 1000:10.1f}')
+        lines.append(f'  {"total":12} {(time.perf_counter() - self.start) * 1000:10.1f}')
+        slowest = self.get_slowest(count)
+        if slowest:
+            lines.append(f'slowest {len(slowest)} module(s) (ms):')
+            lines.append('  ' + ''.join([f'{c:>10}' for c in COLUMNS]) + '  module')
+            for target, times in slowest:
+                cells = ''.join([f'{times[c] * 1000:10.1f}' if c in times else f'{"-":>10}' for c in COLUMNS])
+                lines.append(f'  {cells}  {target}')
+        logger.info('\n'.join(lines))
+
+    def to_dict(self, stats: dict, errors: List[str]) -> dict:
+        return {
+            'version': get_version(),
+            'total': time.perf_counter() - self.start,
+            'phases': self.phases,
+            'modules': self.modules,
+            'stats': dict(stats),
+            'errors': errors,
+        }
+
+    def save(self, path: str, stats: dict, errors: List[str]):
+        '''
+        Writes the JSON build report.
+        '''
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(stats, errors), f, indent=1, sort_keys=True)
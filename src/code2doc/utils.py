@@ -5,6 +5,7 @@ Contains different common helper functions.
 '''
 
 import os
+import time
 
 def read_file(path: str) -> str:
     '''
@@ -17,6 +18,153 @@ def read_file(path: str) -> str:
         return ''
 
 
+class lazy_property:
+    '''
+    Decorator for a property which is computed on the first access only.
+    The value is stored in the instance and replaces the property from then on.
+    '''
+    def __init__(self, func):
+        ''' constructor '''
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.func(instance)
+        return value
+
+
+class OutputFile:
+    '''
+    Streaming text writer that replaces the file only if the content changed.
+
+    The written text is compared with the existing file chunk by chunk, so the
+    whole page is never held in memory. On the first difference the matched
+    prefix is copied to a temporary file which then atomically replaces the
+    original. `written` tells if the file was replaced after closing and `elapsed`
+    is the time spent on the disk access. `tell` returns the position in bytes.
+    '''
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        ''' constructor '''
+        start = time.perf_counter()
+        self.path = path
+        dir_name, name = os.path.split(path)
+        self.tmp = os.path.join(dir_name, f'.{name}.{os.getpid()}.tmp')
+        self.old = open(path, 'rb') if os.path.isfile(path) else None
+        self.new = None
+        self.matched = 0
+        self.buffer, self.buffered = [], 0
+        self.size = 0
+        self.written = False
+        self.elapsed = time.perf_counter() - start
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        self.buffer.append(data)
+        self.buffered += len(data)
+        self.size += len(data)
+        if self.buffered >= OutputFile.BUFFER_SIZE:
+            self.flush()
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self):
+        start = time.perf_counter()
+        try:
+            self._flush()
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def _flush(self):
+        data = b''.join(self.buffer)
+        self.buffer, self.buffered = [], 0
+        if self.new is None and self.old is not None and self.old.read(len(data)) == data:
+            self.matched += len(data)
+            return
+        if self.new is None:
+            self.diverge()
+        self.new.write(data)
+
+    def diverge(self):
+        '''
+        Starts the temporary file with the part which matched the original.
+        '''
+        self.new = open(self.tmp, 'wb')
+        if self.old is not None:
+            self.old.seek(0)
+            self.new.write(self.old.read(self.matched))
+
+    def close(self):
+        '''
+        Finishes the file. Replaces the original only if the content differs.
+        '''
+        start = time.perf_counter()
+        try:
+            self._flush()
+            if self.new is None and (self.old is None or self.old.read(1)):
+                self.diverge()
+            if self.new is not None:
+                self.new.close()
+                if self.old is not None:
+                    self.old.close()
+                os.replace(self.tmp, self.path)
+                self.written = True
+        finally:
+            self.discard()
+            self.elapsed += time.perf_counter() - start
+
+    def discard(self):
+        '''
+        Drops the temporary file (if any) and leaves the original untouched.
+        '''
+        for f in (self.old, self.new):
+            if f is not None and not f.closed:
+                f.close()
+        if os.path.isfile(self.tmp):
+            os.remove(self.tmp)
+
+
+def write_file(path: str, content: str) -> bool:
+    '''
+    Writes the content to the file only if it differs from the existing one.
+    The file is replaced atomically. Returns True if the file was written.
+    '''
+    with OutputFile(path) as f:
+        f.write(content)
+    return f.written
+
+
+def remove_output(out_dir: str, target: str) -> bool:
+    '''
+    Removes a generated file and its parent directories which became empty
+    (up to the `out_dir`). Returns True if the file existed.
+    '''
+    path = os.path.join(out_dir, target)
+    if not os.path.isfile(path):
+        return False
+    os.remove(path)
+    dirpath = os.path.dirname(path)
+    while os.path.isdir(dirpath) and not os.listdir(dirpath) \
+            and os.path.abspath(dirpath) != os.path.abspath(out_dir):
+        os.rmdir(dirpath)
+        dirpath = os.path.dirname(dirpath)
+    return True
+
+
 def reindent(s: str, min_spaces: int = 0, trim_lines: bool = True) -> str:
     '''
     This reindents text by keeping only the minimum level of indentation.
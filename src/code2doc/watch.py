@@ -0,0 +1,222 @@
+'''
+## Watch module
+
+Keeps the docs up to date while the source is being edited. The source files are
+monitored with inotify (on linux) or by polling their modification times. Bursts
+of changes are debounced and only the modified modules (and the directory pages
+above them) are extracted and rendered again; the rest of the extracted tree stays
+in memory between the rebuilds.
+'''
+
+import os
+import sys
+import time
+import select
+import logging
+import struct
+import ctypes
+import ctypes.util
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+from .build_config import Configuration, Options
+from .builder import DocProject
+from .cache import BuildCache
+from .constants import PRUNED_DIRECTORIES
+from .generator import Generator
+from .renderer.renderer import MdRenderer
+from .symbols import build_symbols
+from .sinks import get_sink
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = 0.3
+POLL_INTERVAL_SECONDS = 1.0
+
+
+def walk_directories(roots: List[str]) -> List[str]:
+    '''
+    Returns all the (non pruned) directories under the roots.
+    '''
+    dirs = []
+    for root in roots:
+        if os.path.isfile(root):
+            root = os.path.dirname(root)
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in PRUNED_DIRECTORIES]
+            dirs.append(dirpath)
+    return dirs
+
+
+class PollingWatcher:
+    ''' Detects the changes by comparing the modification times of the python files '''
+    def __init__(self, roots: List[str]):
+        ''' constructor '''
+        self.roots = roots
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[float, int]]:
+        files = {}
+        for dirpath in walk_directories(self.roots):
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.name.endswith('.py') and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def wait(self, timeout: float) -> Set[str]:
+        '''
+        Returns the files changed (modified, added or removed) since the last call.
+        '''
+        time.sleep(min(timeout, POLL_INTERVAL_SECONDS))
+        snapshot = self.scan()
+        changed = set([p for p, s in snapshot.items() if self.snapshot.get(p) != s])
+        changed.update([p for p in self.snapshot if p not in snapshot])
+        self.snapshot = snapshot
+        return changed
+
+
+class InotifyWatcher:
+    ''' Detects the changes with the linux inotify api '''
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, roots: List[str]):
+        ''' constructor '''
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        self.dirs = {}
+        for dirpath in walk_directories(roots):
+            self.add_watch(dirpath)
+
+    @staticmethod
+    def is_available() -> bool:
+        return sys.platform.startswith('linux') and bool(ctypes.util.find_library('c'))
+
+    def add_watch(self, dirpath: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = dirpath
+
+    def wait(self, timeout: float) -> Set[str]:
+        '''
+        Returns the files changed within the timeout (empty if nothing happened).
+        '''
+        changed = set()
+        try:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+        except InterruptedError:
+            return changed
+        if not ready:
+            return changed
+        data, offset = os.read(self.fd, 64 * 1024), 0
+        while offset + self.EVENT.size <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = os.fsdecode(data[offset: offset + length].rstrip(b'\0'))
+            offset += length
+            if wd not in self.dirs:
+                continue
+            path = os.path.join(self.dirs[wd], name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and name not in PRUNED_DIRECTORIES:
+                    for dirpath in walk_directories([path]):
+                        self.add_watch(dirpath)
+                        changed.update([os.path.join(dirpath, f) for f in os.listdir(dirpath)])
+                else:
+                    changed.add(path)
+            elif name.endswith('.py'):
+                changed.add(path)
+        return set([p for p in changed if p.endswith('.py') or not os.path.exists(p)])
+
+
+class DocWatcher:
+    ''' Rebuilds the docs whenever the source files change '''
+    def __init__(self, config: Configuration, sink=None, poll: bool = False):
+        ''' constructor. The pages are written to the `sink` (of the configuration by default). '''
+        self.config = config
+        self.sink = sink or get_sink(config)
+        self.manifest = BuildCache(config, self.sink)
+        self.cache = self.manifest if config[Options.BUILD_CACHE] else None
+        self.project = DocProject(config, self.cache)
+        self.symbols = build_symbols(config, self.project)
+        self.renderer = MdRenderer(config, self.symbols, self.sink)
+        roots = [b.abspath for b in self.project.builders]
+        if not poll and InotifyWatcher.is_available():
+            self.watcher = InotifyWatcher(roots)
+        else:
+            self.watcher = PollingWatcher(roots)
+        failed = self.generate()
+        self.renderer.stats['removed'] += len(self.cache.remove_stale()) if self.cache else 0
+        self.finish(self.renderer.stats, failed)
+
+    def generate(self, nodes: List = None) -> Set[str]:
+        '''
+        Renders the nodes (all by default) and returns the failed targets.
+        '''
+        self.renderer.stats = Counter()
+        generator = Generator(self.project, self.renderer, self.config)
+        generator.generate(nodes)
+        return set([t for t, _ in generator.errors])
+
+    def finish(self, stats: Counter, failed: Set[str]):
+        '''
+        Saves the build cache (and the manifest) and logs the summary of the (re)build.
+        '''
+        if self.cache:
+            for node in self.project.get_nodes():
+                if (node.module or node.cached) and node.target not in failed:
+                    self.cache.record(node, node.root)
+                else:
+                    self.cache.invalidate(node)
+            if self.symbols:
+                self.symbols.save()
+        self.renderer.save([n.target for n in self.project.get_nodes()])
+        self.manifest.save(self.project.get_outputs(self.sink))
+        logger.info('written: %d, unchanged: %d, removed: %d', stats['written'], stats['unchanged'], stats['removed'])
+
+    def rebuild(self, changed: Set[str]):
+        '''
+        Extracts and renders again the modules affected by the changed files.
+        '''
+        nodes, removed = self.project.rebuild(changed)
+        if self.symbols and self.symbols.update(self.project.get_nodes()):
+            self.project.load_cached()
+            nodes = [n for n in self.project.get_nodes() if n.module]
+            self.symbols.update(self.project.get_nodes())
+        failed = self.generate(nodes)
+        stats = self.renderer.stats
+        for target in removed:
+            if self.sink.remove(target):
+                logger.debug('removed %s', target)
+                stats['removed'] += 1
+        self.finish(stats, failed)
+
+    def run(self):
+        '''
+        Watches until interrupted (Ctrl+C).
+        '''
+        logger.info('watching for changes... (press Ctrl+C to stop)')
+        try:
+            while True:
+                changed = self.watcher.wait(POLL_INTERVAL_SECONDS)
+                if not changed:
+                    continue
+                while True:
+                    more = self.watcher.wait(DEBOUNCE_SECONDS)
+                    if not more:
+                        break
+                    changed |= more
+                logger.info('changed: %s', ', '.join(sorted(changed)))
+                self.rebuild(changed)
+        except KeyboardInterrupt:
+            logger.info('stopped')
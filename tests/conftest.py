@@ -0,0 +1,81 @@
+'''
+Shared fixtures of the tests.
+
+The package is imported from `src` (like the benchmarks do) and the commands run
+in fresh interpreters, on a copy of the sample package of `fixtures`, so every run
+starts from the default configuration.
+'''
+
+import os
+import sys
+import shutil
+import subprocess
+from typing import Dict
+
+import pytest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(TESTS, '..', 'src')
+SAMPLE = os.path.join(TESTS, 'fixtures', 'sample')
+
+sys.path.insert(0, SRC)
+
+
+def get_env() -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([SRC] + [p for p in [env.get('PYTHONPATH')] if p])
+    return env
+
+
+class Project:
+    '''
+    Directory with a copy of the sample package (and an empty config file) where
+    the commands are run.
+    '''
+    def __init__(self, path: str):
+        ''' constructor '''
+        self.path = path
+        shutil.copytree(SAMPLE, os.path.join(path, 'sample'))
+        with open(os.path.join(path, 'code2doc.ini'), 'w') as f:
+            f.write('[code2doc]\n')
+
+    def run(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        '''
+        Runs a command of the command line. Fails the test if it fails (with `check`).
+        '''
+        result = subprocess.run(
+            [sys.executable, '-m', 'code2doc.run'] + list(args), cwd=self.path, env=get_env(),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if check:
+            assert result.returncode == 0, result.stderr
+        return result
+
+    def edit(self, path: str, old: str, new: str):
+        '''
+        Replaces a text in a file of the project.
+        '''
+        path = os.path.join(self.path, path)
+        with open(path, encoding='utf-8') as f:
+            content = f.read()
+        assert old in content
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content.replace(old, new))
+
+    def pages(self, out_dir: str) -> Dict[str, str]:
+        '''
+        Returns the generated files of an output directory (without the build state).
+        '''
+        pages = {}
+        root = os.path.join(self.path, out_dir)
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if not name.startswith('.code2doc'):
+                    path = os.path.join(dirpath, name)
+                    with open(path, encoding='utf-8') as f:
+                        pages[os.path.relpath(path, root)] = f.read()
+        return pages
+
+
+@pytest.fixture
+def project(tmp_path) -> Project:
+    return Project(str(tmp_path))
@@ -0,0 +1,6 @@
+'''
+Sample package documented by the tests.
+'''
+from .units import Length, to_meters
+
+VERSION = '1.0'
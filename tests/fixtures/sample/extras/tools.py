@@ -0,0 +1,11 @@
+'''
+Helpers in a directory without an __init__ file.
+'''
+from ..shapes import Circle
+
+
+def total_area(*shapes, precision: int = 2) -> float:
+    '''
+    Returns the sum of the areas.
+    '''
+    return round(sum(s.area() for s in shapes), precision)
@@ -0,0 +1,5 @@
+'''
+The shapes and their areas.
+'''
+from .base import Shape
+from .circle import Circle
@@ -0,0 +1,23 @@
+'''
+Base of the shapes.
+'''
+from ..units import Length
+
+
+class Shape:
+    '''
+    A shape. The subclasses compute the `area`.
+    '''
+    sides = 0
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def area(self) -> float:
+        '''
+        Returns the area in square meters.
+        '''
+        raise NotImplementedError
+
+    def describe(self, unit: str = 'm') -> str:
+        return f'{self.name}: {self.area()} {unit}2'
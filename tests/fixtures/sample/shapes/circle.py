@@ -0,0 +1,27 @@
+'''
+Circles.
+'''
+import math
+from .base import Shape
+from ..units import Length, to_meters
+
+PI = math.pi
+
+
+class Circle(Shape):
+    '''
+    A circle of a radius.
+    '''
+    def __init__(self, radius: Length):
+        super().__init__('circle')
+        self.radius = radius
+
+    def area(self) -> float:
+        return PI * self.radius.meters() ** 2
+
+
+def unit_circle() -> Circle:
+    '''
+    Returns the circle of radius 1m.
+    '''
+    return Circle(Length(1.0))
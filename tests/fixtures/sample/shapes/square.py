@@ -0,0 +1,24 @@
+'''
+Squares.
+'''
+from . import base
+from .circle import Circle
+from ..units import SCALES
+
+
+class Square(base.Shape):
+    '''
+    A square, named by the constructor of its base.
+    '''
+    sides = 4
+    label: str = "square"
+
+    def area(self) -> float:
+        return 1.0
+
+    def scale(self, unit: str = "mm", factor: float = 1e3) -> 'Square':
+        factor *= SCALES[unit]
+        return self
+
+    def inscribed(self) -> Circle:
+        return Circle(None)
@@ -0,0 +1,60 @@
+'''
+Units of the shapes.
+'''
+import math
+from typing import Dict, List
+
+SCALES = {
+    'mm': 0.001,
+    'm': 1.0,
+}
+
+
+def to_meters(value: float, unit: str = 'm') -> float:
+    '''
+    Converts a value to meters.
+    '''
+    return value * SCALES[unit]
+
+
+def parse(text: str, units: List[str] = None) -> Dict[str, float]:
+    '''
+    Parses `1.5m, 3mm` into the values of the units.
+    '''
+    return {}
+
+
+class Length:
+    '''
+    Length with its unit.
+    '''
+    precision = 3
+    default_unit: str = 'm'
+
+    def __init__(self, value: float, unit: str = 'm'):
+        ''' constructor '''
+        self.value = value
+        self.unit = unit
+
+    def meters(self) -> float:
+        ''' Returns the length in meters. '''
+        return to_meters(self.value, self.unit)
+
+    @staticmethod
+    def zero() -> 'Length':
+        return Length(0.0)
+
+    @classmethod
+    def parse(cls, text: str) -> 'Length':
+        '''
+        Parses `1.5m`.
+        '''
+        return cls(float(text[:-1]), text[-1])
+
+    @property
+    def rounded(self) -> float:
+        return round(self.value, self.precision)
+
+
+def hypot(a: Length, b: Length) -> float:
+    return math.hypot(a.meters(), b.meters())
@@ -0,0 +1,83 @@
+'''
+Tests of the bundled output: the archives (and the streamed tar) hold the same
+files as a build into the output directory, which only keeps the build state.
+'''
+
+import io
+import os
+import sys
+import tarfile
+import zipfile
+import subprocess
+
+import pytest
+
+from conftest import get_env
+
+OPTIONS = ['--generate_search_index']
+
+
+def read_archive(data: bytes) -> dict:
+    '''
+    Returns the text of the files of a zip or (compressed) tar archive by their name.
+    '''
+    if data[:2] == b'PK':
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return {name: archive.read(name).decode('utf-8') for name in archive.namelist()}
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        return {m.name: archive.extractfile(m).read().decode('utf-8') for m in archive.getmembers() if m.isfile()}
+
+
+def read_file(project, name: str) -> dict:
+    with open(os.path.join(project.path, name), 'rb') as f:
+        return read_archive(f.read())
+
+
+def get_state(project, out_dir: str) -> list:
+    return sorted(os.listdir(os.path.join(project.path, out_dir)))
+
+
+@pytest.mark.parametrize('name', ['docs.zip', 'docs.tar', 'docs.tar.gz'])
+def test_archive_matches_directory(project, name):
+    project.run('build', '-m', 'sample', '-od', 'built', *OPTIONS)
+    project.run('build', '-m', 'sample', '-od', 'state', '--output_archive', name, *OPTIONS)
+    built = project.pages('built')
+    assert built
+    assert read_file(project, name) == built
+    assert all(n.startswith('.code2doc') for n in get_state(project, 'state'))
+
+
+@pytest.mark.parametrize('name', ['docs.zip', 'docs.tar.gz'])
+def test_archive_rebuild(project, name):
+    project.run('build', '-m', 'sample', '-od', 'state', '--output_archive', name, *OPTIONS)
+    project.edit(os.path.join('sample', 'extras', 'tools.py'), 'Returns the sum of the areas.', 'Sums the areas.')
+    os.remove(os.path.join(project.path, 'sample', 'shapes', 'square.py'))
+    result = project.run('build', '-m', 'sample', '-od', 'state', '--output_archive', name, *OPTIONS)
+    assert 'removed: 1' in result.stderr
+    project.run('build', '-m', 'sample', '-od', 'built', *OPTIONS)
+    assert read_file(project, name) == project.pages('built')
+
+
+def test_stream_matches_directory(project):
+    project.run('build', '-m', 'sample', '-od', 'built', *OPTIONS)
+    result = subprocess.run(
+        [sys.executable, '-m', 'code2doc.run', 'build', '-m', 'sample', '-od', 'state', '--output_archive', '-']
+        + OPTIONS, cwd=project.path, env=get_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    assert read_archive(result.stdout) == project.pages('built')
+    assert all(n.startswith('.code2doc') for n in get_state(project, 'state'))
+
+
+def test_stream_rejects_since(project):
+    result = project.run('build', '-m', 'sample', '--output_archive', '-', '--since', 'HEAD', check=False)
+    assert result.returncode == 1
+    assert '--since can not be used with a stream' in result.stderr
+
+
+def test_clean_removes_archive(project):
+    with open(os.path.join(project.path, 'code2doc.ini'), 'w') as f:
+        f.write("[code2doc]\nmodules = ['sample']\noutput_directory = 'state'\noutput_archive = 'docs.zip'\n")
+    project.run('build')
+    assert os.path.isfile(os.path.join(project.path, 'docs.zip'))
+    project.run('clean')
+    assert not os.path.exists(os.path.join(project.path, 'docs.zip'))
+    assert get_state(project, 'state') == []
@@ -0,0 +1,66 @@
+'''
+Tests of the persistent build cache: the unchanged pages are not written again
+and a change of the source or of the options is picked up.
+'''
+
+import os
+
+from code2doc.constants import MANIFEST_FILENAME
+
+
+def reset_times(project, out_dir: str):
+    '''
+    Sets the modification time of the generated files to 0, so the rewritten ones stand out.
+    '''
+    for page in project.pages(out_dir):
+        os.utime(os.path.join(project.path, out_dir, page), (0, 0))
+
+
+def get_written(project, out_dir: str) -> list:
+    '''
+    Returns the generated files written since `reset_times`.
+    '''
+    pages = project.pages(out_dir)
+    return sorted([p for p in pages if os.path.getmtime(os.path.join(project.path, out_dir, p)) != 0])
+
+
+def test_unchanged_rebuild_writes_nothing(project):
+    project.run('build', '-m', 'sample', '-od', 'built')
+    assert os.path.isfile(os.path.join(project.path, 'built', MANIFEST_FILENAME))
+    pages = project.pages('built')
+    reset_times(project, 'built')
+    result = project.run('build', '-m', 'sample', '-od', 'built')
+    assert f'written: 0, unchanged: {len(pages)}, removed: 0' in result.stderr
+    assert get_written(project, 'built') == []
+    assert project.pages('built') == pages
+
+
+def test_edit_rewrites_only_its_page(project):
+    project.run('build', '-m', 'sample', '-od', 'built')
+    reset_times(project, 'built')
+    project.edit(os.path.join('sample', 'extras', 'tools.py'), 'Returns the sum of the areas.', 'Sums the areas.')
+    result = project.run('build', '-m', 'sample', '-od', 'built')
+    assert 'written: 1,' in result.stderr
+    assert get_written(project, 'built') == [os.path.join('sample', 'extras', 'tools.md')]
+    project.run('build', '-m', 'sample', '-od', 'fresh')
+    assert project.pages('built') == project.pages('fresh')
+
+
+def test_removed_module_removes_its_page(project):
+    project.run('build', '-m', 'sample', '-od', 'built')
+    os.remove(os.path.join(project.path, 'sample', 'shapes', 'square.py'))
+    result = project.run('build', '-m', 'sample', '-od', 'built')
+    assert 'removed: 1' in result.stderr
+    project.run('build', '-m', 'sample', '-od', 'fresh')
+    assert project.pages('built') == project.pages('fresh')
+
+
+def test_changed_options_rewrite_the_pages(project):
+    project.run('build', '-m', 'sample', '-od', 'built')
+    pages = project.pages('built')
+    reset_times(project, 'built')
+    project.run('build', '-m', 'sample', '-od', 'built', '--show_relative_imports')
+    assert get_written(project, 'built')
+    assert get_written(project, 'built') == sorted([p for p, c in project.pages('built').items() if c != pages[p]])
+    project.run('build', '-m', 'sample', '-od', 'fresh', '--show_relative_imports')
+    assert project.pages('built') == project.pages('fresh')
@@ -0,0 +1,42 @@
+'''
+Tests of the options given on the command line over the config file.
+'''
+
+import sys
+from argparse import ArgumentParser
+
+import pytest
+
+from code2doc.configurer import Configuration, ConfigOption
+
+
+def parse(monkeypatch, argv: list) -> Configuration:
+    config = Configuration('test').add(
+        ConfigOption('modules', [])).add(
+        ConfigOption('extractor', 'inspect')).add(
+        ConfigOption('jobs', 1)).add(
+        ConfigOption('build cache', True))
+    # the values of the config file
+    config.shorts['e'].value = 'static'
+    config.shorts['j'].value = 4
+    parser = ArgumentParser()
+    config.add_arguments(parser)
+    monkeypatch.setattr(sys, 'argv', ['code2doc'] + argv)
+    config.parse(parser.parse_args(argv))
+    return config
+
+
+def test_arguments_containing_a_short_form(monkeypatch):
+    config = parse(monkeypatch, ['-m', 'my-eval/', '-m', 'src-j'])
+    assert config['modules'] == ['my-eval/', 'src-j']
+    assert config['extractor'] == 'static'
+    assert config['jobs'] == 4
+    assert config['build cache'] is True
+
+
+@pytest.mark.parametrize('argv', [['-e', 'isolated'], ['--extractor', 'isolated'], ['--extractor=isolated']])
+def test_specified_option(monkeypatch, argv):
+    config = parse(monkeypatch, argv + ['-j', '2', '--build_cache'])
+    assert config['extractor'] == 'isolated'
+    assert config['jobs'] == 2
+    assert config['build cache'] is False
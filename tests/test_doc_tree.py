@@ -0,0 +1,95 @@
+'''
+Tests of the serialized doc tree: the frozen documentation survives the JSON
+encoding and the extract and render commands write the same pages as a build.
+'''
+
+import os
+import json
+
+import pytest
+
+from conftest import SAMPLE
+from code2doc.builder import extract_module
+from code2doc.doc_types import FrozenClass, FrozenFunction, FrozenModule
+
+OPTION_SETS = [
+    [],
+    ['--extractor', 'static'],
+    ['--keep_module_function_order', '--keep_module_class_order', '--show_types'],
+    ['--link_types', '--link_relative_imports', '--generate_search_index'],
+    ['--show_relative_imports', '--show_class_variables', '--show_class_methods', '--generate_root_directories'],
+]
+
+
+def round_trip(obj):
+    return type(obj).decode(json.loads(json.dumps(obj.encode())))
+
+
+def get_function(name: str = 'area') -> FrozenFunction:
+    return FrozenFunction(name, 'function', 'Returns the area.', '(self, unit: str = \'m\') -> float')
+
+
+def get_class() -> FrozenClass:
+    return FrozenClass(
+        'Circle', 'A circle.', 'Shape', '(radius: float)',
+        (('function', (get_function('area'), get_function('describe'))), ('staticmethod', (get_function('unit'),))),
+        (('sides', '0'), ('name', "'circle'")),
+        ((('radius', 'diameter'), 'radius = diameter = 1.0'),))
+
+
+def test_function_round_trip():
+    function = get_function()
+    assert round_trip(function) == function
+    assert round_trip(FrozenFunction('f', 'function', None, '()')) == FrozenFunction('f', 'function', None, '()')
+
+
+def test_class_round_trip():
+    cls = get_class()
+    decoded = round_trip(cls)
+    assert decoded == cls
+    assert decoded.methods == cls.methods
+    assert decoded.statics == cls.statics
+    assert decoded.variables == cls.variables
+
+
+def test_module_round_trip():
+    module = FrozenModule(
+        'sample.circle', 'Circles.', {'Shape': ('.base', '/src/sample/base.py'), 'math': ('', '')},
+        (get_function('unit_circle'),), (get_class(),), ('unit_circle',), (('Circle', ('area', 'describe')),),
+        ((('PI',), 'PI = math.pi'), (('A', 'B'), 'A = B = 1')), {'import': 0.5, 'extract': 0.25})
+    decoded = round_trip(module)
+    assert decoded == module
+    assert decoded.classes[0].methods == module.classes[0].methods
+    assert decoded.class_order == module.class_order
+    assert decoded.globals == module.globals
+    assert decoded.imports == module.imports
+
+
+@pytest.mark.parametrize('name', [[''], ['units'], ['shapes'], ['shapes', 'base'], ['shapes', 'circle']])
+def test_extracted_module_round_trip(name):
+    module = extract_module(os.path.dirname(SAMPLE), 'sample', name, True)
+    assert round_trip(module) == module
+
+
+def test_frozen_equality():
+    assert get_class() == get_class()
+    assert get_function('area') != get_function('describe')
+    assert get_function() != get_function().encode()
+
+
+@pytest.mark.parametrize('options', OPTION_SETS)
+def test_extract_render_matches_build(project, options):
+    project.run('build', '-m', 'sample', '-od', 'built', *options)
+    project.run('extract', '-m', 'sample', *options, 'tree.jsonl')
+    project.run('render', '-od', 'rendered', *options, 'tree.jsonl')
+    built = project.pages('built')
+    assert built
+    assert project.pages('rendered') == built
+
+
+def test_render_rejects_other_files(project):
+    with open(os.path.join(project.path, 'tree.jsonl'), 'w') as f:
+        f.write('{"format": 0}\n')
+    result = project.run('render', '-od', 'rendered', 'tree.jsonl', check=False)
+    assert result.returncode == 1
+    assert 'cannot read the doc tree' in result.stderr
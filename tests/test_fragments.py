@@ -0,0 +1,55 @@
+'''
+Tests of the memoized fragments: a page spliced from the fragments of the
+previous page is the same as a page rendered from scratch.
+'''
+
+import os
+import json
+
+import pytest
+
+from code2doc.constants import FRAGMENTS_FILENAME
+
+CIRCLE = os.path.join('sample', 'shapes', 'circle.py')
+CIRCLE_PAGE = os.path.join('docs', 'sample', 'shapes', 'circle.md')
+
+
+def get_fragments(project) -> dict:
+    with open(os.path.join(project.path, 'docs', FRAGMENTS_FILENAME)) as f:
+        return json.load(f)['pages']
+
+
+@pytest.mark.parametrize('options', [[], ['--link_types', '--show_class_methods']])
+def test_edited_page_matches_fresh_build(project, options):
+    project.run('build', '-m', 'sample', '-od', 'docs', *options)
+    project.edit(CIRCLE, 'A circle of a radius.', 'A circle of a radius (edited).')
+    project.run('build', '-m', 'sample', '-od', 'docs', *options)
+    project.run('build', '-m', 'sample', '-od', 'fresh', '--build_cache', *options)
+    assert project.pages('docs') == project.pages('fresh')
+
+
+def test_fragments_keep_no_text(project):
+    project.run('build', '-m', 'sample', '-od', 'docs')
+    fragments = get_fragments(project)
+    page = fragments[os.path.join('sample', 'shapes', 'circle.md')]
+    assert len(page) == 2
+    assert all(len(position) == 3 and all(isinstance(i, int) for i in position) for position in page.values())
+
+
+def test_changed_page_is_rendered(project):
+    project.run('build', '-m', 'sample', '-od', 'docs')
+    # the previous page no longer matches the recorded positions
+    with open(os.path.join(project.path, CIRCLE_PAGE), 'r+', encoding='utf-8') as f:
+        content = f.read()
+        f.seek(0)
+        f.write('Edited by hand.\n' + content.replace('Circle', 'Square'))
+    project.edit(CIRCLE, 'Returns the circle', 'Creates the circle')
+    project.run('build', '-m', 'sample', '-od', 'docs')
+    project.run('build', '-m', 'sample', '-od', 'fresh', '--build_cache')
+    assert project.pages('docs') == project.pages('fresh')
+
+
+def test_no_fragments_without_build_cache(project):
+    project.run('build', '-m', 'sample', '-od', 'docs', '--build_cache')
+    assert project.pages('docs')
+    assert not os.path.exists(os.path.join(project.path, 'docs', FRAGMENTS_FILENAME))
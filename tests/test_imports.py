@@ -0,0 +1,40 @@
+'''
+Tests of the static resolution of the imports: a name resolves to the file of the
+module defining it (following the re-exports) like `getfile(getmodule())` does,
+so the imported constants are not listed in the dependencies.
+'''
+
+import os
+
+import pytest
+
+from conftest import SAMPLE
+from code2doc.builder import extract_module
+
+
+def get_file(*parts: str) -> str:
+    return os.path.realpath(os.path.join(SAMPLE, *parts))
+
+
+@pytest.mark.parametrize('static', [False, True])
+@pytest.mark.parametrize('name, imports', [
+    ([''], {'Length': ('units', get_file('units.py')), 'to_meters': ('units', get_file('units.py'))}),
+    (['shapes', 'square'], {
+        'base': (None, get_file('shapes', 'base.py')),
+        'Circle': ('circle', get_file('shapes', 'circle.py')),
+        'SCALES': ('units', ''),
+    }),
+    (['extras', 'tools'], {'Circle': ('shapes', get_file('shapes', 'circle.py'))}),
+    (['units'], {'math': ('', ''), 'Dict': ('typing', ''), 'List': ('typing', '')}),
+])
+def test_imported_files(name, imports, static):
+    module = extract_module(os.path.dirname(SAMPLE), 'sample', name, static)
+    assert module.imports == imports
+
+
+@pytest.mark.parametrize('options', [[], ['--extractor', 'static']])
+def test_dependencies_skip_constants(project, options):
+    project.run('build', '-m', 'sample', '-od', 'built', *options)
+    page = project.pages('built')[os.path.join('sample', 'shapes', 'square.md')]
+    dependencies = page.split('Dependencies: \n')[1].split('\n\n')[0]
+    assert dependencies == '* import base \n* from circle import Circle '
@@ -0,0 +1,21 @@
+'''
+Tests of the work graph of several roots.
+'''
+
+import pytest
+
+
+@pytest.mark.parametrize('roots', [['sample', 'sample/shapes'], ['sample/shapes', 'sample']])
+def test_nested_roots(project, roots):
+    project.run('build', '-m', 'sample', '-od', 'single')
+    args = [a for root in roots for a in ['-m', root]]
+    result = project.run('build', *args, '-od', 'nested')
+    assert 'is already documented' in result.stderr
+    assert project.pages('nested') == project.pages('single')
+
+
+def test_root_listed_twice(project):
+    project.run('build', '-m', 'sample', '-od', 'single')
+    result = project.run('build', '-m', 'sample', '-m', 'sample/../sample', '-od', 'twice')
+    assert 'is already documented' in result.stderr
+    assert project.pages('twice') == project.pages('single')
@@ -0,0 +1,57 @@
+'''
+Tests of the search index: its terms and documents, and its incremental updates
+(the entries of the pages which are not rendered again are kept, the ones of the
+removed pages are dropped) against the index of a fresh build.
+'''
+
+import os
+import json
+
+from code2doc.constants import SEARCH_INDEX_FILENAME
+from code2doc.search import FIELDS, get_summary, get_terms
+
+
+def test_terms():
+    assert get_terms('parse_to_meters(HTTPServer) a Length') == [
+        'http', 'httpserver', 'length', 'meters', 'parse', 'parse_to_meters', 'server', 'to']
+    assert get_summary('\n  Returns the area.\n\n  In square meters.\n') == 'Returns the area.'
+    assert get_summary(None) == ''
+
+
+def build_index(project, out_dir: str = 'built') -> dict:
+    project.run('build', '-m', 'sample', '-od', out_dir, '--generate_search_index')
+    with open(os.path.join(project.path, out_dir, SEARCH_INDEX_FILENAME)) as f:
+        return json.load(f)
+
+
+def get_docs(index: dict, term: str) -> list:
+    return [dict(zip(FIELDS, index['docs'][i])) for i in index['terms'].get(term, [])]
+
+
+def test_index_documents(project):
+    index = build_index(project)
+    assert index['fields'] == FIELDS
+    pages = set([doc[0] for doc in index['docs']])
+    assert pages == set([p for p in project.pages('built') if p != SEARCH_INDEX_FILENAME])
+    assert all(0 <= i < len(index['docs']) for ids in index['terms'].values() for i in ids)
+    length = [d for d in get_docs(index, 'length') if d['name'] == 'sample.units.Length']
+    assert length == [{'page': 'sample/units.md', 'anchor': 'Length', 'kind': 'class', 'name': 'sample.units.Length',
+                       'signature': '', 'summary': 'Length with its unit.'}]
+    assert [d['name'] for d in get_docs(index, 'inscribed')] == ['sample.shapes.square.Square.inscribed']
+
+
+def test_index_keeps_unchanged_pages(project):
+    build_index(project)
+    project.edit(os.path.join('sample', 'extras', 'tools.py'), 'Returns the sum of the areas.', 'Sums the areas.')
+    index = build_index(project)
+    assert [d['name'] for d in get_docs(index, 'sums')] == ['sample.extras.tools.total_area']
+    assert index == build_index(project, 'fresh')
+
+
+def test_index_drops_removed_pages(project):
+    build_index(project)
+    os.remove(os.path.join(project.path, 'sample', 'shapes', 'square.py'))
+    index = build_index(project)
+    assert not [doc for doc in index['docs'] if doc[0].endswith('square.md')]
+    assert 'inscribed' not in index['terms']
+    assert index == build_index(project, 'fresh')
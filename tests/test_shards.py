@@ -0,0 +1,105 @@
+'''
+Tests of the sharded builds: the partition of the nodes, the checks of the merge
+and the merged output against a single build.
+'''
+
+import os
+import random
+
+import pytest
+
+from conftest import SAMPLE
+from code2doc.build_config import BUILD_CONFIG, Options
+from code2doc.builder import DocProject, get_shards
+from code2doc.configurer import ConfigOption
+from code2doc.constants import README, OUTPUT_EXT, SHARD_TREE_FILENAME
+from code2doc.doc_tree import DocTree, merge_shards
+
+
+@pytest.fixture
+def config(monkeypatch):
+    short, _ = ConfigOption.get_short_n_full_form(Options.MODULES)
+    monkeypatch.setattr(BUILD_CONFIG.shorts[short], 'value', [SAMPLE])
+    return BUILD_CONFIG
+
+
+def get_nodes(config) -> list:
+    return DocProject(config, extract=False).get_nodes()
+
+
+def get_size(node) -> int:
+    return os.path.getsize(node.source) if node.source else 0
+
+
+def test_same_partition(config):
+    nodes = get_nodes(config)
+    shards = dict(zip([n.target for n in nodes], get_shards(nodes, 3)))
+    assert shards == dict(zip([n.target for n in nodes], get_shards(get_nodes(config), 3)))
+    shuffled = list(nodes)
+    random.Random(0).shuffle(shuffled)
+    assert shards == dict(zip([n.target for n in shuffled], get_shards(shuffled, 3)))
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 5, 20])
+def test_every_node_in_one_shard(config, count):
+    nodes = get_nodes(config)
+    shards = get_shards(nodes, count)
+    assert len(shards) == len(nodes)
+    assert all(0 <= s < count for s in shards)
+    loads = [sum([get_size(n) for n, s in zip(nodes, shards) if s == i]) for i in range(count)]
+    assert max(loads) - min(loads) <= max([get_size(n) for n in nodes])
+
+
+def build_shards(project, count: int, *options: str):
+    for i in range(count):
+        project.run('build', '-m', 'sample', '-od', f'shard{i + 1}', '--shard', f'{i + 1}/{count}', *options)
+
+
+def load_tree(project, out_dir: str) -> DocTree:
+    return DocTree(os.path.join(project.path, out_dir, SHARD_TREE_FILENAME), BUILD_CONFIG)
+
+
+def test_merge_rejects_missing_shard(project):
+    build_shards(project, 2)
+    with pytest.raises(ValueError, match='expected the 2 shards'):
+        merge_shards([load_tree(project, 'shard1')])
+    result = project.run('merge', '-od', 'merged', 'shard2', check=False)
+    assert result.returncode == 1
+    assert 'cannot merge the shards' in result.stderr
+
+
+def test_merge_rejects_duplicate_shard(project):
+    build_shards(project, 2)
+    with pytest.raises(ValueError, match='expected the 2 shards'):
+        merge_shards([load_tree(project, 'shard1'), load_tree(project, 'shard1')])
+
+
+def test_merge_rejects_foreign_tree(project):
+    build_shards(project, 2)
+    with open(os.path.join(project.path, 'sample', 'added.py'), 'w') as f:
+        f.write("'''\nAdded module.\n'''\n")
+    project.run('build', '-m', 'sample', '-od', 'other', '--shard', '2/2')
+    with pytest.raises(ValueError, match='another source tree'):
+        merge_shards([load_tree(project, 'shard1'), load_tree(project, 'other')])
+    project.run('extract', '-m', 'sample', 'tree.jsonl')
+    with pytest.raises(ValueError, match='not the tree of a shard'):
+        merge_shards([DocTree(os.path.join(project.path, 'tree.jsonl'), BUILD_CONFIG)])
+
+
+@pytest.mark.parametrize('options', [
+    [],
+    ['--extractor', 'static'],
+    ['--link_types', '--link_relative_imports', '--generate_search_index'],
+])
+def test_sharded_build_matches_build(project, options):
+    project.run('build', '-m', 'sample', '-od', 'built', *options)
+    build_shards(project, 2, *options)
+    project.run('merge', '-od', 'merged', *options, 'shard1', 'shard2')
+    built = project.pages('built')
+    assert built
+    assert project.pages('merged') == built
+    # the shards render their module pages (none with the link options), merge the directory pages
+    shards = [project.pages('shard1'), project.pages('shard2')]
+    assert not set(shards[0]) & set(shards[1])
+    modules = [t for t in built if os.path.basename(t) != README + OUTPUT_EXT]
+    assert sorted(set(shards[0]) | set(shards[1])) == ([] if '--link_types' in options else sorted(modules))
@@ -0,0 +1,100 @@
+'''
+Tests of `build --since <rev>`: only the pages affected by the files changed since
+the revision (modified, added or removed), by the modules importing them and their
+directories are rendered again and the result is the same as a full build.
+'''
+
+import os
+import json
+import subprocess
+
+import pytest
+
+
+def git(project, *args: str):
+    subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com'] + list(args),
+        cwd=project.path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+
+@pytest.fixture
+def committed(project):
+    git(project, 'init', '-q')
+    git(project, 'add', 'sample')
+    git(project, 'commit', '-q', '-m', 'sample')
+    project.run('build', '-m', 'sample', '-od', 'built')
+    return project
+
+
+def build_since(project, rev: str = 'HEAD') -> tuple:
+    '''
+    Builds the changes since the revision. Returns the output and the pages which
+    were rendered (from the build report) and written.
+    '''
+    result = project.run('build', '-m', 'sample', '-od', 'built', '--since', rev, '--report', 'report.json', '-v')
+    with open(os.path.join(project.path, 'report.json')) as f:
+        rendered = sorted(json.load(f)['modules'])
+    lines = [line for line in result.stderr.splitlines() if line.startswith('DEBUG: rendering ')]
+    written = sorted([os.path.relpath(line[len('DEBUG: rendering '):], 'built') for line in lines])
+    return result.stderr, rendered, written
+
+
+def test_since_picks_up_new_and_modified_files(committed):
+    project = committed
+    project.edit(os.path.join('sample', 'extras', 'tools.py'), 'Returns the sum of the areas.', 'Sums the areas.')
+    with open(os.path.join(project.path, 'sample', 'shapes', 'triangle.py'), 'w') as f:
+        f.write("'''\nTriangles.\n'''\n\n\ndef corners() -> int:\n    return 3\n")
+    output, rendered, written = build_since(project)
+    assert 'changed since HEAD: 2 file(s)' in output
+    # with the pages of their directories, the new module is listed in its one
+    assert rendered == [
+        os.path.join('sample', 'extras', 'ReadMe.md'),
+        os.path.join('sample', 'extras', 'tools.md'),
+        os.path.join('sample', 'shapes', 'ReadMe.md'),
+        os.path.join('sample', 'shapes', 'triangle.md'),
+    ]
+    assert written == [
+        os.path.join('sample', 'extras', 'tools.md'),
+        os.path.join('sample', 'shapes', 'ReadMe.md'),
+        os.path.join('sample', 'shapes', 'triangle.md'),
+    ]
+    project.run('build', '-m', 'sample', '-od', 'fresh')
+    assert project.pages('built') == project.pages('fresh')
+
+
+def test_since_rebuilds_the_importers(committed):
+    project = committed
+    project.edit(os.path.join('sample', 'shapes', 'base.py'), 'sides = 0', 'sides = 2')
+    _, rendered, written = build_since(project)
+    # the other shapes and the shapes package import the base
+    assert rendered == [
+        os.path.join('sample', 'shapes', 'ReadMe.md'),
+        os.path.join('sample', 'shapes', 'base.md'),
+        os.path.join('sample', 'shapes', 'circle.md'),
+        os.path.join('sample', 'shapes', 'square.md'),
+    ]
+    assert written == [os.path.join('sample', 'shapes', 'base.md')]
+    project.run('build', '-m', 'sample', '-od', 'fresh')
+    assert project.pages('built') == project.pages('fresh')
+
+
+def test_since_removes_deleted_files(committed):
+    project = committed
+    os.remove(os.path.join(project.path, 'sample', 'shapes', 'square.py'))
+    output, rendered, written = build_since(project)
+    assert 'removed: 1' in output
+    assert rendered == written == [os.path.join('sample', 'shapes', 'ReadMe.md')]
+    project.run('build', '-m', 'sample', '-od', 'fresh')
+    assert project.pages('built') == project.pages('fresh')
+
+
+def test_since_without_changes_renders_nothing(committed):
+    output, rendered, written = build_since(committed)
+    assert 'changed since HEAD: 0 file(s)' in output
+    assert rendered == written == []
+
+
+def test_since_rejects_unknown_revision(committed):
+    result = committed.run('build', '-m', 'sample', '-od', 'built', '--since', 'unknown', check=False)
+    assert result.returncode == 1
+    assert 'cannot list the changes since `unknown`' in result.stderr
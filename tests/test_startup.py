@@ -0,0 +1,56 @@
+'''
+Startup budget of the command line. Every invocation (e.g. `code2doc -h` or
+`code2doc clean` in a pre-commit hook) imports `code2doc.run`, so it must stay
+cheap: the implementations of the commands are imported only when they run.
+'''
+
+import sys
+import subprocess
+
+from conftest import get_env
+
+MODULE = 'code2doc.run'
+REPEAT = 5
+# Allowed cumulative import time (best of the repeats). It was ~170 ms with the
+# commands imported eagerly and ~45 ms with the lazy imports.
+BUDGET_MS = 100
+# Must not be imported by `import code2doc.run`
+HEAVY_MODULES = [
+    'code2doc.builder',
+    'code2doc.doc_types',
+    'code2doc.generator',
+    'code2doc.renderer',
+    'code2doc.watch',
+    'inspect',
+    'multiprocessing',
+    'concurrent.futures',
+]
+
+
+def measure_imports() -> dict:
+    '''
+    Imports the module in a fresh interpreter and returns the cumulative import
+    time (in seconds) of every imported module.
+    '''
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {MODULE}'],
+        env=get_env(), stderr=subprocess.PIPE, check=True, universal_newlines=True).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_startup_budget():
+    runs = [measure_imports() for _ in range(REPEAT)]
+    best = min(r[MODULE] for r in runs) * 1000
+    assert best <= BUDGET_MS, f'import {MODULE} takes {best:.2f} ms (budget {BUDGET_MS} ms)'
+
+
+def test_no_heavy_imports():
+    imported = measure_imports()
+    heavy = [m for m in imported if any(m == h or m.startswith(h + '.') for h in HEAVY_MODULES)]
+    assert not heavy, f'imported at startup: {", ".join(sorted(heavy))}'
@@ -0,0 +1,54 @@
+'''
+Tests of the static extractor against the import one on the sample package. The
+static one finds the same documentation, except where only the runtime knows
+(see `static_types`).
+'''
+
+import os
+
+import pytest
+
+from conftest import SAMPLE
+from code2doc.builder import extract_module
+from code2doc.doc_types import FrozenClass
+
+MODULES = [[''], ['units'], ['shapes'], ['shapes', 'base'], ['shapes', 'circle'], ['shapes', 'square'], ['extras', 'tools']]
+
+
+def extract(name: list, static: bool) -> list:
+    module = extract_module(os.path.dirname(SAMPLE), 'sample', name, static)
+    return module.encode()[:-1]
+
+
+def without_properties(cls: FrozenClass) -> FrozenClass:
+    # the import extractor lists the properties as static variables, by their repr
+    statics = tuple([(n, v) for n, v in cls.statics if not v.startswith('<property object')])
+    return FrozenClass(cls.name, cls.doc, cls.base, cls.signature, cls.methods, statics, cls.variables)
+
+
+@pytest.mark.parametrize('name', MODULES)
+def test_static_matches_inspect(name):
+    static = extract(name, True)
+    module = extract_module(os.path.dirname(SAMPLE), 'sample', name, False)
+    module.classes = tuple([without_properties(c) for c in module.classes])
+    assert static == module.encode()[:-1]
+
+
+def test_inherited_class_signature():
+    module = extract_module(os.path.dirname(SAMPLE), 'sample', ['shapes', 'square'], True)
+    square = module.classes[0]
+    assert square.base == 'Shape'
+    assert square.signature == '(name: str)'
+    assert square.statics == (('label', 'square'),)
+    methods = dict([(f.name, f.signature) for _, functions in square.methods for f in functions])
+    assert methods['inscribed'] == '(self) -> sample.shapes.circle.Circle'
+    assert methods['scale'] == "(self, unit: str = 'mm', factor: float = 1000.0) -> 'Square'"
+
+
+@pytest.mark.parametrize('options', [[], ['--link_types', '--show_class_methods', '--show_class_variables']])
+def test_static_build_matches_build(project, options):
+    project.run('build', '-m', 'sample', '-od', 'built', *options)
+    project.run('build', '-m', 'sample', '-od', 'static', '--extractor', 'static', *options)
+    built = project.pages('built')
+    assert built
+    assert project.pages('static') == built
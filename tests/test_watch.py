@@ -0,0 +1,71 @@
+'''
+Tests of the watch command: it builds the docs, then rebuilds only the pages of
+the modules changed while it runs (with inotify and by polling).
+'''
+
+import os
+import sys
+import time
+import select
+import signal
+import subprocess
+
+import pytest
+
+from conftest import get_env
+
+TIMEOUT_SECONDS = 20
+
+
+class Watch:
+    ''' The watch command running in the background '''
+    def __init__(self, project, *args: str):
+        ''' constructor '''
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'code2doc.run', 'watch'] + list(args), cwd=project.path, env=get_env(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGINT)
+            try:
+                self.process.wait(TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process.stderr.close()
+
+    def wait_for(self, text: str) -> str:
+        '''
+        Returns the first line of the output containing the text. Fails the test if
+        it does not come in time.
+        '''
+        deadline = time.monotonic() + TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            ready, _, _ = select.select([self.process.stderr], [], [], deadline - time.monotonic())
+            line = self.process.stderr.readline() if ready else ''
+            if text in line:
+                return line
+            assert line or self.process.poll() is None, f'watch exited with {self.process.returncode}'
+        pytest.fail(f'no "{text}" in the output of watch')
+
+
+@pytest.mark.parametrize('options', [[], ['--poll']])
+def test_watch_rebuilds_changed_module(project, options):
+    with Watch(project, '-m', 'sample', '-od', 'built', *options) as watch:
+        assert 'written: 8,' in watch.wait_for('written:')
+        watch.wait_for('watching for changes')
+        project.edit(os.path.join('sample', 'extras', 'tools.py'), 'Returns the sum of the areas.', 'Sums the areas.')
+        assert 'tools.py' in watch.wait_for('changed:')
+        # the page of the module and of its directory (unchanged) are rendered
+        assert 'written: 1, unchanged: 1, removed: 0' in watch.wait_for('written:')
+        os.remove(os.path.join(project.path, 'sample', 'shapes', 'square.py'))
+        watch.wait_for('changed:')
+        assert 'removed: 1' in watch.wait_for('written:')
+    built = project.pages('built')
+    assert 'Sums the areas.' in built[os.path.join('sample', 'extras', 'tools.md')]
+    assert os.path.join('sample', 'shapes', 'square.md') not in built
+    project.run('build', '-m', 'sample', '-od', 'fresh')
+    assert built == project.pages('fresh')